@@ -0,0 +1,127 @@
+"""Versioned response cache for the honeypot listing endpoint."""
+
+import bisect
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable
+
+from api.models import HoneypotData
+
+HoneypotBuilder = Callable[[str, dict, bool], HoneypotData]
+
+
+class HoneypotListCache:
+    """Serves ``GET /honeypots`` from pre-serialized items.
+
+    The cache follows the state backend's honeypot version. When it moves,
+    only the honeypots changed since the cached version are rebuilt and
+    re-serialized; everything else is reused. Filtered pages are assembled
+    by joining already-encoded items and memoized until the next change,
+    so a poll against an unchanged fleet is a version check and a dict hit.
+
+    ETags carry the state's epoch next to the version, so a tag issued before
+    a restart never matches the same version number counted again.
+    """
+
+    def __init__(self, state, build_item: HoneypotBuilder, max_pages: int = 64):
+        self.state = state
+        self.build_item = build_item
+        self.max_pages = max_pages
+
+        self.epoch: str | None = None
+        self.version: int | None = None
+        self.items: dict[str, tuple[HoneypotData, bytes]] = {}
+        self.sorted_ids: list[str] = []
+        self.pages: OrderedDict[tuple, tuple[str, bytes, int]] = OrderedDict()
+
+    def refresh(self) -> int:
+        """Bring the cache up to date with the state backend."""
+        if self.version is None:
+            return self._reload()
+
+        version, changed = self.state.honeypot_changes_since(self.version)
+        if version == self.version:
+            return version
+        if changed is None:
+            return self._reload()
+
+        disabled = self.state.disabled_honeypots()
+        for honeypot_id in changed:
+            config = self.state.get_honeypot(honeypot_id)
+            if config is None:
+                if self.items.pop(honeypot_id, None) is not None:
+                    index = bisect.bisect_left(self.sorted_ids, honeypot_id)
+                    del self.sorted_ids[index]
+                continue
+            if honeypot_id not in self.items:
+                bisect.insort(self.sorted_ids, honeypot_id)
+            self.items[honeypot_id] = self._encode(
+                honeypot_id, config, honeypot_id in disabled
+            )
+
+        self.version = version
+        self.pages.clear()
+        return version
+
+    def _reload(self) -> int:
+        self.epoch = self.state.epoch()
+        version = self.state.honeypots_version()
+        disabled = self.state.disabled_honeypots()
+        self.items = {
+            honeypot_id: self._encode(honeypot_id, config, honeypot_id in disabled)
+            for honeypot_id, config in self.state.list_honeypots().items()
+        }
+        self.sorted_ids = sorted(self.items)
+        self.version = version
+        self.pages.clear()
+        return version
+
+    def _encode(
+        self, honeypot_id: str, config: dict, disabled: bool
+    ) -> tuple[HoneypotData, bytes]:
+        item = self.build_item(honeypot_id, config, disabled)
+        return item, item.model_dump_json().encode()
+
+    def get_page(
+        self,
+        status: str | None = None,
+        blockchain: str | None = None,
+        starred: bool | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> tuple[str, bytes, int]:
+        """Get the ETag, JSON body and total match count for a filtered page."""
+        version = self.refresh()
+        key = (status, blockchain, starred, limit, offset)
+
+        page = self.pages.get(key)
+        if page is not None:
+            self.pages.move_to_end(key)
+            return page
+
+        matching = [
+            encoded
+            for item, encoded in (self.items[i] for i in self.sorted_ids)
+            if (status is None or item.status == status)
+            and (blockchain is None or item.blockchain == blockchain)
+            and (starred is None or item.starred == starred)
+        ]
+        end = None if limit is None else offset + limit
+        body = b"[" + b",".join(matching[offset:end]) + b"]"
+        etag = f'W/"{self.epoch}-{version}-{zlib.crc32(repr(key).encode()):08x}"'
+
+        page = (etag, body, len(matching))
+        self.pages[key] = page
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return page
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an ``If-None-Match`` header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
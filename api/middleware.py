@@ -0,0 +1,66 @@
+"""ASGI middleware for QuantDog."""
+
+import time
+
+from utils.metrics import metrics
+from utils.profiling import SlowOperationProfiler
+
+
+class MetricsMiddleware:
+    """Records request counts and latency per route template.
+
+    Implemented as plain ASGI (not ``BaseHTTPMiddleware``) to avoid the
+    extra task and body buffering on every request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope, so requests are
+            # grouped by template (e.g. /honeypots/{honeypot_id}) not raw path
+            route = scope.get("route")
+            path = getattr(route, "path_format", None) or getattr(route, "path", "unmatched")
+            method = scope["method"]
+            metrics.histogram("http_request_duration_seconds", route=path, method=method).record(
+                time.perf_counter() - start
+            )
+            metrics.counter(
+                "http_requests_total", route=path, method=method, status=status_code
+            ).inc()
+
+
+class ProfilingMiddleware:
+    """Tracks each HTTP request with the slow operation profiler.
+
+    Does nothing unless the profiler is enabled, so it can stay installed and
+    be switched on at runtime when chasing a stall.
+    """
+
+    def __init__(self, app, profiler: SlowOperationProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        with self.profiler.track(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
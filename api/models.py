@@ -36,6 +36,12 @@ class Transaction(BaseModel):
     threat_level_at_time: float
 
 
+class SubmitTransactionRequest(BaseModel):
+    from_address: str = Field(..., min_length=1, max_length=128)
+    to_address: str = Field(..., min_length=1, max_length=128)
+    amount: float = Field(..., gt=0)
+
+
 class SimulateAttackRequest(BaseModel):
     intensity: float = Field(50.0, ge=0, le=100, description="Attack intensity")
     duration: Optional[int] = Field(None, description="Duration in seconds")
@@ -45,6 +51,12 @@ class ReduceThreatRequest(BaseModel):
     amount: float = Field(10.0, ge=0, le=100, description="Amount to reduce threat by")
 
 
+class ProfilingSettings(BaseModel):
+    enabled: Optional[bool] = None
+    budget_ms: Optional[float] = Field(None, gt=0, le=60000)
+    mode: Optional[str] = Field(None, pattern="^(stack|cprofile)$")
+
+
 class HoneypotData(BaseModel):
     model_config = ConfigDict(
         json_encoders={
@@ -109,10 +121,24 @@ class DeployHoneypotRequest(BaseModel):
     description: Optional[str] = Field(None, max_length=500)
 
 
+class BulkDeployHoneypotRequest(BaseModel):
+    count: int = Field(..., ge=1, le=50000, description="Number of honeypots to deploy")
+    name_prefix: str = Field("Quantum Honeypot", min_length=1, max_length=90)
+    blockchain: str = Field(..., pattern="^(ethereum|bitcoin|quantum)$")
+    protection_type: str = Field(..., pattern="^(rsa|ecdsa)$")
+    monitoring_sensitivity: str = Field(..., pattern="^(low|medium|high)$")
+    auto_response: bool = True
+    description: Optional[str] = Field(None, max_length=500)
+
+
+class BulkHoneypotRequest(BaseModel):
+    honeypot_ids: list[str] = Field(..., min_length=1, max_length=50000)
+
+
 class HoneypotInteraction(BaseModel):
     id: str
     honeypot_id: str
-    interaction_type: str = Field(..., pattern="^(connection_attempt|transaction|scan|probe|suspicious_activity)$")
+    interaction_type: str = Field(..., pattern="^(connection_attempt|transaction|scan|probe|suspicious_activity|funds_drained|manual_funds_drained)$")
     source_ip: str
     source_address: Optional[str] = None
     amount: Optional[float] = None
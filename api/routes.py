@@ -2,47 +2,121 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 import random
+from collections.abc import Callable
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
 
+from api.cache import HoneypotListCache, etag_matches
 from api.models import (
+    BulkDeployHoneypotRequest,
+    BulkHoneypotRequest,
     CryptoMethod,
     DeployHoneypotRequest,
     HoneypotConfig,
     HoneypotData,
     HoneypotInteraction,
+    ProfilingSettings,
     RecordInteractionRequest,
     ReduceThreatRequest,
     SimulateAttackRequest,
+    SubmitTransactionRequest,
     SystemMetrics,
     SystemSettings,
     ThreatLevel,
     ThreatStatus,
     Transaction,
 )
+from core.anomaly import RateAnomalyDetector
+from core.dormancy import SECONDS_PER_YEAR, DormancyScanner
 from core.router import CryptoRouter
+from core.sketches import AttackerSketches
 from core.threat_detector import ThreatDetector
+from services.analytics import GROUP_KEYS, InteractionTable, aggregate_frame, export_frame
 from services.blockchain import BlockchainService
+from services.registry import HoneypotRegistry
+from services.state import create_state_backend
+from services.transactions import TransactionFeed
 from utils.config import get_settings
+from utils.helpers import generate_wallet_addresses, initial_honeypot_balance
+from utils.log import log_event, raise_alert
+from utils.metrics import ProcessSampler, metrics
+from utils.profiling import LoopLagMonitor, profiler
+from utils.scheduler import TimerWheel
 
 router = APIRouter()
 settings = get_settings()
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-threat_detector = ThreatDetector()
-crypto_router = CryptoRouter()
+# Honeypot, interaction and threat state lives in a backend that can be shared
+# by several worker processes (see STATE_BACKEND in utils/config.py)
+state = create_state_backend(settings)
+
 blockchain_service = BlockchainService()
+dormancy_scanner = DormancyScanner(
+    blockchain_service, dormancy_period=settings.DORMANT_WALLET_YEARS * SECONDS_PER_YEAR
+)
+threat_detector = ThreatDetector(state=state, scanner=dormancy_scanner)
+crypto_router = CryptoRouter(state=state)
+
+# Transactions are routed once when submitted; GET /transactions only pages
+transaction_feed = TransactionFeed(
+    blockchain_service, threat_detector, crypto_router, capacity=settings.TRANSACTION_FEED_SIZE
+)
+
+# Distinct attacker counts and heavy hitters in fixed memory, per worker
+attacker_sketches = AttackerSketches(
+    window=settings.SKETCH_WINDOW_SECONDS,
+    buckets=settings.SKETCH_BUCKETS,
+    top_k=settings.SKETCH_TOP_K,
+    max_honeypots=settings.SKETCH_MAX_HONEYPOTS,
+)
+
+# Interaction bursts and source scans feed the threat level as they happen
+anomaly_detector = RateAnomalyDetector(
+    bucket_seconds=settings.ANOMALY_BUCKET_SECONDS,
+    halflife_seconds=settings.ANOMALY_HALFLIFE_SECONDS,
+    zscore=settings.ANOMALY_ZSCORE,
+    min_events=settings.ANOMALY_MIN_EVENTS,
+    scan_threshold=settings.SCAN_HONEYPOT_THRESHOLD,
+    scan_window=settings.SCAN_WINDOW_SECONDS,
+)
+
+# Honeypot configs are persisted to data/registry/ in the background
+registry = HoneypotRegistry(
+    path=settings.REGISTRY_PATH,
+    flush_interval=settings.REGISTRY_FLUSH_INTERVAL,
+    snapshot_interval=settings.REGISTRY_SNAPSHOT_INTERVAL,
+)
 
 balance_check_task: Optional[asyncio.Task] = None
 
+# Samples psutil stats off the event loop for /metrics
+process_sampler = ProcessSampler(metrics)
+
+# Loop lag sampling is always on; slow request/task profiling is opt-in and
+# can be toggled at runtime through PUT /debug/profiling
+profiler.configure(
+    enabled=settings.PROFILE_SLOW_REQUESTS,
+    budget=settings.PROFILE_BUDGET_MS / 1000,
+    mode=settings.PROFILE_MODE,
+)
+loop_monitor = LoopLagMonitor(
+    profiler,
+    interval=settings.LOOP_LAG_INTERVAL_MS / 1000,
+    stall_threshold=settings.LOOP_STALL_THRESHOLD_MS / 1000,
+)
+
+# Single driver for timed work: simulation expiry, threat decay, re-arming
+scheduler = TimerWheel(resolution=settings.SCHEDULER_RESOLUTION_MS / 1000)
+
 # Store the server start time
 server_start_time = datetime.utcnow()
 
-# Initialize honeypot configs with activation at server start (time = 0)
-honeypot_configs = {
+# Default honeypot configs with activation at server start (time = 0)
+DEFAULT_HONEYPOT_CONFIGS = {
     "honeypot_0": {
         "name": "Quantum Honeypot 1",
         "monitoring_sensitivity": "medium",
@@ -102,9 +176,227 @@ honeypot_configs = {
     }
 }
 
-disabled_honeypots = set()
+# Only the first worker to start seeds the state, preferring persisted honeypots
+persisted_configs, persisted_disabled = registry.load()
+if persisted_configs:
+    if state.seed_honeypots(persisted_configs):
+        for honeypot_id in persisted_disabled:
+            state.set_disabled(honeypot_id, True)
+elif state.seed_honeypots(DEFAULT_HONEYPOT_CONFIGS):
+    for honeypot_id, config in DEFAULT_HONEYPOT_CONFIGS.items():
+        registry.record_put(honeypot_id, config)
+
+
+# Columnar copy of recorded interactions for GET /analytics/interactions,
+# seeded with the history already in the state backend
+interaction_table = InteractionTable(max_rows=settings.ANALYTICS_MAX_ROWS)
+interaction_table.extend(reversed(state.list_interactions(limit=settings.ANALYTICS_MAX_ROWS)))
+
+
+def _honeypot_number(honeypot_id: str) -> Optional[int]:
+    try:
+        return int(honeypot_id.split("_")[1])
+    except (IndexError, ValueError):
+        return None
+
+
+# Honeypot ids come from a shared counter, initialized once past the highest
+# existing id, so allocating a batch of ids is O(1) however large the fleet.
+# That id is found before update_value, which must not call into the backend.
+_first_free_id = max(
+    (n for n in map(_honeypot_number, state.list_honeypots()) if n is not None),
+    default=-1,
+) + 1
+state.update_value(
+    "next_honeypot_id",
+    lambda next_id: next_id if next_id is not None else _first_free_id,
+)
+
+
+def allocate_honeypot_ids(count: int) -> list[str]:
+    """Reserve ``count`` new, never reused honeypot ids.
+
+    Ids that already exist are skipped, so a counter that lags behind the
+    stored honeypots (restored from the registry, say) never hands them out.
+    """
+    honeypot_ids: list[str] = []
+    while len(honeypot_ids) < count:
+        needed = count - len(honeypot_ids)
+        end = state.update_value("next_honeypot_id", lambda next_id: next_id + needed)
+        honeypot_ids.extend(
+            honeypot_id
+            for honeypot_id in (f"honeypot_{n}" for n in range(end - needed, end))
+            if not state.has_honeypot(honeypot_id)
+        )
+    return honeypot_ids
+
+
+def build_honeypot_config(
+    name: str,
+    blockchain: str,
+    protection_type: str,
+    monitoring_sensitivity: str,
+    auto_response: bool,
+    description: Optional[str],
+    wallet_address: str,
+    created_at: datetime,
+) -> dict:
+    """Build the stored config for a newly deployed honeypot."""
+    initial_balance = initial_honeypot_balance(blockchain)
+    return {
+        "name": name,
+        "monitoring_sensitivity": monitoring_sensitivity,
+        "protection_type": protection_type,
+        "auto_response": auto_response,
+        "routing_method": "classical",
+        "blockchain": blockchain,
+        "description": description or "",
+        "interaction_count": 0,
+        "last_interaction": None,
+        "threat_indicators": [],
+        "starred": False,
+        "created_at": created_at,
+        "activated_at": created_at,
+        "wallet_address": wallet_address,
+        "initial_balance": initial_balance,
+        "current_balance": initial_balance,
+        "status": "active",
+        # Store offset as 0 for newly created honeypots (just activated)
+        "_activation_offset": {"days": 0, "hours": 0, "minutes": 0}
+    }
+
+
+def save_honeypot(honeypot_id: str, config: dict) -> None:
+    """Store a honeypot config and queue it for persistence."""
+    state.put_honeypot(honeypot_id, config)
+    registry.record_put(honeypot_id, config)
+
+
+def update_honeypot(
+    honeypot_id: str, func: Callable[[dict], Optional[dict]]
+) -> Optional[dict]:
+    """Atomically update a honeypot config and queue it for persistence.
+
+    See ``StateBackend.update_honeypot``; returns None if nothing was written.
+    """
+    config = state.update_honeypot(honeypot_id, func)
+    if config is not None:
+        registry.record_put(honeypot_id, config)
+    return config
+
+
+def remove_honeypot(honeypot_id: str) -> bool:
+    """Delete a honeypot and queue the deletion for persistence."""
+    scheduler.cancel_key(("rearm", honeypot_id))
+    if not state.delete_honeypot(honeypot_id):
+        return False
+    registry.record_delete(honeypot_id)
+    return True
+
+
+def set_honeypot_disabled(honeypot_id: str, disabled: bool) -> None:
+    """Enable or disable a honeypot and queue the change for persistence."""
+    state.set_disabled(honeypot_id, disabled)
+    registry.record_disabled(honeypot_id, disabled)
+
+
+def rearm_honeypot(honeypot_id: str) -> bool:
+    """Return a triggered honeypot to active with its initial balance."""
+    def rearm(config: dict) -> Optional[dict]:
+        if config.get("status") != "triggered":
+            return None
+        config["status"] = "active"
+        config["current_balance"] = config.get("initial_balance", 1.0)
+        config["threat_indicators"] = []
+        config["last_interaction"] = None
+        return config
+
+    return update_honeypot(honeypot_id, rearm) is not None
+
+
+def drain_honeypot(honeypot_id: str) -> Optional[tuple[dict, float]]:
+    """Empty an active honeypot's wallet and mark it triggered, atomically.
+
+    Returns the updated config and the drained balance, or None if the
+    honeypot is gone, not active or already empty.
+    """
+    drained = []
+
+    def drain(config: dict) -> Optional[dict]:
+        balance = config.get("current_balance", 0)
+        if config.get("status") != "active" or balance <= 0:
+            return None
+        drained.append(balance)
+        config["current_balance"] = 0
+        config["status"] = "triggered"
+        config["last_interaction"] = datetime.utcnow()
+        config["interaction_count"] = config.get("interaction_count", 0) + 1
+        threat_indicators = config.setdefault("threat_indicators", [])
+        if "funds_drained" not in threat_indicators:
+            threat_indicators.append("funds_drained")
+        return config
+
+    config = update_honeypot(honeypot_id, drain)
+    return (config, drained[0]) if config is not None else None
+
+
+def schedule_rearm(honeypot_id: str) -> None:
+    """Re-arm a drained honeypot after HONEYPOT_REARM_SECONDS, if enabled."""
+    if settings.HONEYPOT_REARM_SECONDS > 0:
+        scheduler.call_later(
+            settings.HONEYPOT_REARM_SECONDS,
+            rearm_honeypot,
+            honeypot_id,
+            name="honeypot_rearm",
+            key=("rearm", honeypot_id),
+        )
+
+
+def decay_threat_level() -> None:
+    """Let the threat level fall toward baseline, then schedule the next step."""
+    threat_detector.decay(settings.THREAT_DECAY_AMOUNT, settings.THREAT_BASELINE)
+    scheduler.call_later(
+        settings.THREAT_DECAY_INTERVAL, decay_threat_level, key="threat_decay"
+    )
+
 
-honeypot_interactions = []
+def chain_tick() -> None:
+    """Mine pending transactions and scan new blocks, then schedule the next tick."""
+    if blockchain_service.pending_transactions:
+        blockchain_service.mine_pending_transactions("quantdog_miner")
+    patterns = threat_detector.analyze_blockchain_patterns()
+    blockchain_service.prune(settings.CHAIN_RETAINED_BLOCKS, dormancy_scanner.next_height)
+    if patterns["dormant_activations"]:
+        raise_alert(
+            "dormant_activation",
+            f"Dormant address activity: {patterns['dormant_activations']} activations",
+            severity="high" if patterns["suspicious_transactions"] else "warning",
+            **patterns,
+        )
+    scheduler.call_later(settings.CHAIN_SCAN_INTERVAL, chain_tick, key="chain_tick")
+
+
+def start_chain_scanning() -> None:
+    """Start the periodic chain tick for this worker's blockchain, if enabled."""
+    if settings.CHAIN_SCAN_INTERVAL > 0:
+        scheduler.call_later(settings.CHAIN_SCAN_INTERVAL, chain_tick, key="chain_tick")
+
+
+def store_interaction(interaction: dict, path: str) -> dict:
+    """Persist an interaction and add it to this worker's analytics table."""
+    with metrics.timer("ingest_duration_seconds", path=path):
+        stored = state.append_interaction(interaction)
+    metrics.counter("ingest_events_total", path=path).inc()
+    interaction_table.append(stored)
+    return stored
+
+
+def get_honeypot_or_404(honeypot_id: str) -> dict:
+    """Get a honeypot config from the state backend or raise a 404."""
+    config = state.get_honeypot(honeypot_id)
+    if config is None:
+        raise HTTPException(status_code=404, detail="Honeypot not found")
+    return config
 
 
 async def check_honeypot_balances():
@@ -114,86 +406,87 @@ async def check_honeypot_balances():
     
     while True:
         try:
-            check_count += 1
-            active_honeypots = 0
-            triggered_honeypots = 0
-            total_balance = 0
+            with profiler.track("honeypot_balance_check"):
+                check_count += 1
+                active_honeypots = 0
+                triggered_honeypots = 0
+                total_balance = 0
             
-            for honeypot_id, config in honeypot_configs.items():
-                if config.get("wallet_address"):
-                    current_balance = config.get("current_balance", 0)
-                    total_balance += current_balance
+                honeypot_configs = state.list_honeypots()
+                for honeypot_id, config in honeypot_configs.items():
+                    if config.get("wallet_address"):
+                        current_balance = config.get("current_balance", 0)
+                        total_balance += current_balance
                     
-                    if config.get("status") == "active":
-                        active_honeypots += 1
-                    elif config.get("status") == "triggered":
-                        triggered_honeypots += 1
+                        if config.get("status") == "active":
+                            active_honeypots += 1
+                        elif config.get("status") == "triggered":
+                            triggered_honeypots += 1
             
-            if check_count % 10 == 0:
-                total_interactions = sum(config.get("interaction_count", 0) for config in honeypot_configs.values())
-                print(f"\n📊 HONEYPOT SYSTEM STATUS REPORT (Check #{check_count}):")
-                print(f"    Active honeypots: {active_honeypots}")
-                print(f"    Triggered honeypots: {triggered_honeypots}")
-                print(f"    Total balance: {total_balance:.4f}")
-                print(f"    Total interactions: {total_interactions}")
-                print(f"    Next check in 30 seconds\n")
+                if check_count % 10 == 0:
+                    total_interactions = sum(config.get("interaction_count", 0) for config in honeypot_configs.values())
+                    log_event(
+                        logger, logging.INFO, "honeypot_status_report",
+                        f"📊 Honeypot system status report (check #{check_count})",
+                        active_honeypots=active_honeypots,
+                        triggered_honeypots=triggered_honeypots,
+                        total_balance=round(total_balance, 4),
+                        total_interactions=total_interactions,
+                    )
                 
-            for honeypot_id, config in honeypot_configs.items():
-                if config.get("status") == "active" and config.get("wallet_address"):
-                    current_balance = config.get("current_balance", 0)
-                    wallet_address = config.get("wallet_address", "unknown")
+                for honeypot_id, config in honeypot_configs.items():
+                    if config.get("status") == "active" and config.get("wallet_address"):
+                        current_balance = config.get("current_balance", 0)
+                        wallet_address = config.get("wallet_address", "unknown")
                     
-                    if random.random() < 0.1:
-                        logger.info(f"Checking balance for {honeypot_id} ({wallet_address[:10]}...): {current_balance}")
+                        log_event(
+                            logger, logging.INFO, "balance_checked",
+                            f"Checking balance for {honeypot_id} ({wallet_address[:10]}...)",
+                            sample_rate=0.1,
+                            balance=current_balance,
+                        )
                     
-                    if random.random() < 0.05 and current_balance > 0:
-                        previous_balance = current_balance
-                        config["current_balance"] = 0
-                        config["status"] = "triggered"
-                        config["last_interaction"] = datetime.utcnow()
+                        if random.random() < 0.05 and current_balance > 0:
+                            drained = drain_honeypot(honeypot_id)
+                            if drained is None:
+                                # Changed by another request or worker since the snapshot
+                                continue
+                            config, previous_balance = drained
                         
-                        interaction_id = f"int_{len(honeypot_interactions)}_{honeypot_id}"
-                        drain_interaction = {
-                            "id": interaction_id,
-                            "honeypot_id": honeypot_id,
-                            "interaction_type": "funds_drained",
-                            "source_ip": f"192.168.{random.randint(1,255)}.{random.randint(1,255)}",
-                            "source_address": f"0x{''.join(random.choices('0123456789abcdef', k=40))}",
-                            "amount": previous_balance,
-                            "details": {
-                                "message": "Honeypot funds were drained by malicious actor",
-                                "previous_balance": previous_balance,
-                                "new_balance": 0,
-                                "blockchain": config.get("blockchain", "unknown"),
-                                "wallet_address": wallet_address
-                            },
-                            "timestamp": datetime.utcnow(),
-                            "threat_level": "critical",
-                            "auto_responded": config.get("auto_response", False)
-                        }
-                        honeypot_interactions.append(drain_interaction)
-                        config["interaction_count"] += 1
+                            drain_interaction = {
+                                "honeypot_id": honeypot_id,
+                                "interaction_type": "funds_drained",
+                                "source_ip": f"192.168.{random.randint(1,255)}.{random.randint(1,255)}",
+                                "source_address": f"0x{''.join(random.choices('0123456789abcdef', k=40))}",
+                                "amount": previous_balance,
+                                "details": {
+                                    "message": "Honeypot funds were drained by malicious actor",
+                                    "previous_balance": previous_balance,
+                                    "new_balance": 0,
+                                    "blockchain": config.get("blockchain", "unknown"),
+                                    "wallet_address": wallet_address
+                                },
+                                "timestamp": datetime.utcnow(),
+                                "threat_level": "critical",
+                                "auto_responded": config.get("auto_response", False)
+                            }
+                            store_interaction(drain_interaction, path="monitor")
+                            metrics.counter("threats_detected_total", source="funds_drained").inc()
+                            schedule_rearm(honeypot_id)
                         
-                        if "funds_drained" not in config.get("threat_indicators", []):
-                            config["threat_indicators"].append("funds_drained")
-                        
-                        alert_msg = f"CRITICAL ALERT: Honeypot {honeypot_id} ({config.get('name', 'Unknown')}) COMPROMISED!"
-                        balance_msg = f"Funds drained: {previous_balance} {config.get('blockchain', 'tokens')} from {wallet_address}"
-                        
-                        logger.error(alert_msg)
-                        logger.error(balance_msg)
-                        print(f"\n{'='*80}")
-                        print(alert_msg)
-                        print(balance_msg)
-                        print(f"Threat level: CRITICAL | Auto-response: {config.get('auto_response', False)}")
-                        print(f"{'='*80}\n")
+                            raise_alert(
+                                "honeypot_compromised",
+                                f"CRITICAL ALERT: Honeypot {honeypot_id} ({config.get('name', 'Unknown')}) COMPROMISED!",
+                                severity="critical",
+                                funds_drained=f"{previous_balance} {config.get('blockchain', 'tokens')} from {wallet_address}",
+                                threat_level="CRITICAL",
+                                auto_response=config.get("auto_response", False),
+                            )
             
             await asyncio.sleep(30)
             
         except Exception as e:
-            error_msg = f"❌ Error in balance check task: {e}"
-            logger.error(error_msg)
-            print(error_msg)
+            logger.error(f"❌ Error in balance check task: {e}")
             await asyncio.sleep(60)
 
 
@@ -201,28 +494,31 @@ async def start_honeypot_monitoring():
     """Start the honeypot balance monitoring task."""
     global balance_check_task
     balance_check_task = asyncio.create_task(check_honeypot_balances())
-    startup_msg = "QuantDog Honeypot System STARTED - Background monitoring active"
-    logger.info(startup_msg)
-    print(f"\n{'='*80}")
-    print(startup_msg)
-    print(f"Active honeypots: {len(honeypot_configs)}")
-    print(f"Check interval: 30 seconds")
-    print(f"{'='*80}\n")
+    # Decay runs on the monitoring worker only, so it is applied once
+    if settings.THREAT_DECAY_INTERVAL > 0:
+        scheduler.call_later(
+            settings.THREAT_DECAY_INTERVAL, decay_threat_level, key="threat_decay"
+        )
+    log_event(
+        logger, logging.INFO, "monitoring_started",
+        "QuantDog Honeypot System STARTED - Background monitoring active",
+        active_honeypots=len(state.list_honeypots()),
+        check_interval_seconds=30,
+    )
     return balance_check_task
 
 
 async def stop_honeypot_monitoring():
     """Stop the honeypot balance monitoring task."""
     global balance_check_task
+    scheduler.cancel_key("threat_decay")
     if balance_check_task:
         balance_check_task.cancel()
         try:
             await balance_check_task
         except asyncio.CancelledError:
             pass
-    shutdown_msg = "QuantDog Honeypot System STOPPED - Background monitoring disabled"
-    logger.info(shutdown_msg)
-    print(shutdown_msg)
+    logger.info("QuantDog Honeypot System STOPPED - Background monitoring disabled")
 
 
 @router.get("/status", response_model=ThreatStatus)
@@ -256,11 +552,12 @@ async def simulate_attack(request: SimulateAttackRequest):
     threat_detector.simulate_attack(request.intensity)
 
     if request.duration:
-        async def reduce_after_delay():
-            await asyncio.sleep(request.duration)
-            threat_detector.reduce_threat(request.intensity)
-
-        asyncio.create_task(reduce_after_delay())
+        scheduler.call_later(
+            request.duration,
+            threat_detector.reduce_threat,
+            request.intensity,
+            name="simulation_expiry",
+        )
 
     return await get_status()
 
@@ -273,30 +570,36 @@ async def reduce_threat(request: ReduceThreatRequest):
 
 
 @router.get("/transactions", response_model=list[Transaction])
-async def get_transactions(limit: int = 10):
-    """Get recent transactions with their cryptographic methods."""
-    transactions = []
-    for i in range(limit):
-        threat_at_time = threat_detector.get_historical_threat(i)
-        crypto_method = crypto_router.get_active_crypto_method(threat_at_time)
-
-        transactions.append(Transaction(
-            id=f"tx_{i}",
-            amount=1000.0 * (i + 1),
-            from_address=f"0x{'a' * 40}",
-            to_address=f"0x{'b' * 40}",
-            timestamp=datetime.utcnow(),
-            crypto_method=CryptoMethod.POST_QUANTUM if crypto_method == "post_quantum" else CryptoMethod.CLASSICAL,
-            threat_level_at_time=threat_at_time
-        ))
-
-    return transactions
+async def get_transactions(
+    response: Response,
+    limit: int = Query(10, ge=1, le=1000),
+    cursor: Optional[int] = Query(None, ge=0),
+):
+    """Get recent transactions with their cryptographic methods, newest first.
+
+    Pass the ``X-Next-Cursor`` header of a response as ``cursor`` to get the
+    next (older) page; the header is absent on the last page. Each worker
+    keeps its own feed: with several workers, a page only lists what was
+    submitted to the worker serving it, and is empty until there is some.
+    """
+    records, next_cursor = transaction_feed.page(limit=limit, cursor=cursor)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    response.headers["X-Total-Count"] = str(len(transaction_feed))
+    return records
+
+
+@router.post("/transactions", response_model=Transaction)
+async def submit_transaction(request: SubmitTransactionRequest):
+    """Route a transaction by the current threat level and record it."""
+    return transaction_feed.submit(request.from_address, request.to_address, request.amount)
 
 
 @router.get("/debug/honeypot-configs")
 async def get_honeypot_configs_debug():
     """Debug endpoint to see all honeypot configs."""
     # Create a copy with dynamic times calculated
+    honeypot_configs = state.list_honeypots()
     debug_configs = {}
     for honeypot_id, config in honeypot_configs.items():
         debug_config = config.copy()
@@ -307,7 +610,8 @@ async def get_honeypot_configs_debug():
             debug_config["activated_at_dynamic"] = get_dynamic_activation_time(
                 offset_hours=offset.get("hours", 0),
                 offset_days=offset.get("days", 0),
-                offset_minutes=offset.get("minutes", 0)
+                offset_minutes=offset.get("minutes", 0),
+                reference=config.get("created_at")
             )
             debug_config["activation_offset_info"] = f"{offset.get('days', 0)}d {offset.get('hours', 0)}h {offset.get('minutes', 0)}m ago"
         
@@ -316,76 +620,171 @@ async def get_honeypot_configs_debug():
     return {
         "total_configs": len(honeypot_configs),
         "configs": debug_configs,
-        "disabled_honeypots": list(disabled_honeypots),
+        "disabled_honeypots": list(state.disabled_honeypots()),
         "current_time": datetime.utcnow()
     }
 
 
-@router.get("/honeypots", response_model=list[HoneypotData])
-async def get_honeypots():
-    """Get status of all honeypot systems."""
-    honeypots = []
-    current_time = datetime.utcnow()
+def get_dynamic_activation_time(
+    offset_hours: int = 0,
+    offset_days: int = 0,
+    offset_minutes: int = 0,
+    reference: Optional[datetime] = None,
+) -> datetime:
+    """Get an activation time offset back from ``reference`` (server start by default)."""
+    return (reference or server_start_time) - timedelta(
+        days=offset_days, hours=offset_hours, minutes=offset_minutes
+    )
 
-    for honeypot_id, config in honeypot_configs.items():
-        try:
-            index = int(honeypot_id.split('_')[1])
-        except (IndexError, ValueError):
-            index = len(honeypots)
 
-        if honeypot_id in disabled_honeypots:
-            status = "disabled"
-        else:
-            status = config.get("status", "active")
+def build_honeypot_data(honeypot_id: str, config: dict, disabled: bool) -> HoneypotData:
+    """Build the API representation of a honeypot config."""
+    index = _honeypot_number(honeypot_id) or 0
+
+    # Dynamically calculate activation time if offset is stored
+    activated_at = config.get("activated_at")
+    if "_activation_offset" in config:
+        offset = config["_activation_offset"]
+        activated_at = get_dynamic_activation_time(
+            offset_hours=offset.get("hours", 0),
+            offset_days=offset.get("days", 0),
+            offset_minutes=offset.get("minutes", 0),
+            reference=config.get("created_at")
+        )
+
+    return HoneypotData(
+        id=honeypot_id,
+        name=config.get("name", f"Quantum Honeypot {index+1}"),
+        status="disabled" if disabled else config.get("status", "active"),
+        last_interaction=config.get("last_interaction"),
+        interaction_count=config.get("interaction_count", 0),
+        threat_indicators=config.get("threat_indicators", []),
+        protection_type=config.get("protection_type", "ecdsa"),
+        monitoring_sensitivity=config.get("monitoring_sensitivity", "medium"),
+        blockchain=config.get("blockchain", "ethereum"),
+        description=config.get("description", ""),
+        starred=config.get("starred", False),
+        activated_at=activated_at,
+        wallet_address=config.get("wallet_address"),
+        current_balance=config.get("current_balance"),
+        initial_balance=config.get("initial_balance")
+    )
 
-        # Dynamically calculate activation time if offset is stored
-        activated_at = config.get("activated_at")
-        if "_activation_offset" in config:
-            offset = config["_activation_offset"]
-            activated_at = get_dynamic_activation_time(
-                offset_hours=offset.get("hours", 0),
-                offset_days=offset.get("days", 0),
-                offset_minutes=offset.get("minutes", 0)
-            )
 
-        honeypots.append(HoneypotData(
-            id=honeypot_id,
-            name=config.get("name", f"Quantum Honeypot {index+1}"),
-            status=status,
-            last_interaction=config.get("last_interaction"),
-            interaction_count=config.get("interaction_count", 0),
-            threat_indicators=config.get("threat_indicators", []),
-            protection_type=config.get("protection_type", "ecdsa"),
-            monitoring_sensitivity=config.get("monitoring_sensitivity", "medium"),
-            blockchain=config.get("blockchain", "ethereum"),
-            description=config.get("description", ""),
-            starred=config.get("starred", False),
-            activated_at=activated_at,
-            wallet_address=config.get("wallet_address"),
-            current_balance=config.get("current_balance"),
-            initial_balance=config.get("initial_balance")
-        ))
-
-    honeypots.sort(key=lambda x: x.id)
-
-    return honeypots
+honeypot_list_cache = HoneypotListCache(state, build_honeypot_data)
 
 
-@router.get("/metrics", response_model=SystemMetrics)
-async def get_system_metrics():
-    """Get current system performance metrics."""
-    import time
+@router.get("/honeypots", response_model=list[HoneypotData])
+async def get_honeypots(
+    status: Optional[str] = None,
+    blockchain: Optional[str] = None,
+    starred: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Get status of all honeypot systems.
+
+    Served from a versioned cache; send the returned ``ETag`` back in
+    ``If-None-Match`` to get a 304 while nothing has changed.
+    """
+    etag, body, total = honeypot_list_cache.get_page(
+        status=status, blockchain=blockchain, starred=starred, limit=limit, offset=offset
+    )
+    headers = {"ETag": etag, "X-Total-Count": str(total)}
 
-    import psutil
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
 
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/metrics", response_model=SystemMetrics)
+async def get_system_metrics():
+    """Get current system performance metrics for this worker."""
     return SystemMetrics(
-        cpu_usage=psutil.cpu_percent(),
-        memory_usage=psutil.virtual_memory().percent,
+        cpu_usage=process_sampler.cpu_percent,
+        memory_usage=process_sampler.memory_percent,
         active_connections=len(asyncio.all_tasks()),
-        processed_transactions=1234,
-        threats_detected=42,
-        uptime_seconds=time.time()
+        processed_transactions=int(metrics.total("routing_decisions_total")),
+        threats_detected=int(metrics.total("threats_detected_total")),
+        uptime_seconds=metrics.uptime()
+    )
+
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Expose all runtime metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.get("/debug/loop")
+async def get_loop_debug(include_stacks: bool = True):
+    """Event loop lag, profiler settings and recent stall/slow operation captures."""
+    captures = list(profiler.captures)
+    if not include_stacks:
+        captures = [
+            {key: value for key, value in capture.items() if key not in ("stack", "profile")}
+            for capture in captures
+        ]
+    return {
+        "loop": loop_monitor.snapshot(),
+        "profiling": {
+            "enabled": profiler.enabled,
+            "mode": profiler.mode,
+            "budget_ms": profiler.budget * 1000,
+            "inflight": profiler.inflight(),
+        },
+        "captures": captures,
+    }
+
+
+@router.put("/debug/profiling")
+async def update_profiling(request: ProfilingSettings):
+    """Turn slow request/task profiling on or off, or change its budget or mode."""
+    profiler.configure(
+        enabled=request.enabled,
+        budget=request.budget_ms / 1000 if request.budget_ms is not None else None,
+        mode=request.mode,
+    )
+    logger.info(
+        f"Profiling {'enabled' if profiler.enabled else 'disabled'} "
+        f"(mode={profiler.mode}, budget={profiler.budget * 1000:.0f}ms)"
     )
+    return {
+        "enabled": profiler.enabled,
+        "mode": profiler.mode,
+        "budget_ms": profiler.budget * 1000,
+    }
+
+
+@router.delete("/debug/loop/captures")
+async def clear_loop_captures():
+    """Discard stored stall and slow operation captures."""
+    cleared = len(profiler.captures)
+    profiler.captures.clear()
+    return {"cleared": cleared}
+
+
+@router.get("/debug/dormancy")
+async def get_dormancy_debug():
+    """Dormant address scanner statistics for this worker's chain."""
+    return dormancy_scanner.snapshot()
+
+
+@router.get("/debug/sketches")
+async def get_sketches_debug():
+    """Attacker sketch tracking and memory statistics."""
+    return attacker_sketches.snapshot()
+
+
+@router.get("/debug/scheduler")
+async def get_scheduler_debug():
+    """Pending timers and timer wheel statistics."""
+    return scheduler.snapshot()
 
 
 @router.post("/crypto/switch/{method}")
@@ -416,12 +815,13 @@ async def get_threat_history(hours: int = 24):
 @router.put("/honeypots/{honeypot_id}/config")
 async def update_honeypot_config(honeypot_id: str, config: HoneypotConfig):
     """Update honeypot configuration."""
-    honeypot_configs[honeypot_id] = {
-        "monitoring_sensitivity": config.monitoring_sensitivity,
-        "protection_type": config.protection_type,
-        "auto_response": config.auto_response,
-        "routing_method": config.routing_method
-    }
+    def apply(current: dict) -> dict:
+        # Only these settings change; the rest of the config is kept
+        current.update(config.model_dump())
+        return current
+
+    if update_honeypot(honeypot_id, apply) is None:
+        raise HTTPException(status_code=404, detail="Honeypot not found")
 
     if config.protection_type == "rsa":
         crypto_router.force_classical()
@@ -437,10 +837,10 @@ async def update_honeypot_config(honeypot_id: str, config: HoneypotConfig):
 @router.post("/honeypots/{honeypot_id}/disable")
 async def disable_honeypot(honeypot_id: str):
     """Disable a specific honeypot."""
-    if honeypot_id not in honeypot_configs:
+    if not state.has_honeypot(honeypot_id):
         raise HTTPException(status_code=404, detail="Honeypot not found")
 
-    disabled_honeypots.add(honeypot_id)
+    set_honeypot_disabled(honeypot_id, True)
 
     return {"message": f"Honeypot {honeypot_id} has been disabled"}
 
@@ -448,10 +848,10 @@ async def disable_honeypot(honeypot_id: str):
 @router.post("/honeypots/{honeypot_id}/enable")
 async def enable_honeypot(honeypot_id: str):
     """Enable a specific honeypot."""
-    if honeypot_id not in honeypot_configs:
+    if not state.has_honeypot(honeypot_id):
         raise HTTPException(status_code=404, detail="Honeypot not found")
 
-    disabled_honeypots.discard(honeypot_id)
+    set_honeypot_disabled(honeypot_id, False)
 
     return {"message": f"Honeypot {honeypot_id} has been enabled"}
 
@@ -459,32 +859,29 @@ async def enable_honeypot(honeypot_id: str):
 @router.post("/honeypots/{honeypot_id}/star")
 async def toggle_honeypot_star(honeypot_id: str):
     """Toggle the starred status of a honeypot."""
-    if honeypot_id not in honeypot_configs:
+    def toggle(config: dict) -> dict:
+        config["starred"] = not config.get("starred", False)
+        return config
+
+    config = update_honeypot(honeypot_id, toggle)
+    if config is None:
         raise HTTPException(status_code=404, detail="Honeypot not found")
     
-    current_starred = honeypot_configs[honeypot_id].get("starred", False)
-    honeypot_configs[honeypot_id]["starred"] = not current_starred
-    
-    action = "starred" if not current_starred else "unstarred"
-    logger.info(f"⭐ Honeypot {honeypot_id} ({honeypot_configs[honeypot_id].get('name', 'Unknown')}) {action}")
+    action = "starred" if config["starred"] else "unstarred"
+    logger.info(f"⭐ Honeypot {honeypot_id} ({config.get('name', 'Unknown')}) {action}")
     
     return {
         "message": f"Honeypot {honeypot_id} {action}",
-        "starred": not current_starred
+        "starred": config["starred"]
     }
 
 
 @router.delete("/honeypots/{honeypot_id}")
 async def delete_honeypot(honeypot_id: str):
     """Delete a specific honeypot permanently."""
-    if honeypot_id not in honeypot_configs:
+    if not remove_honeypot(honeypot_id):
         raise HTTPException(status_code=404, detail="Honeypot not found")
 
-    del honeypot_configs[honeypot_id]
-    
-    disabled_honeypots.discard(honeypot_id)
-
-
     return {"message": f"Honeypot {honeypot_id} has been permanently deleted"}
 
 
@@ -521,88 +918,124 @@ async def get_system_settings():
 @router.post("/honeypots/deploy")
 async def deploy_honeypot(request: DeployHoneypotRequest):
     """Deploy a new honeypot with the specified configuration."""
-    logger.info(f"🚀 Deploying new honeypot: {request.name} on {request.blockchain}")
-    
-    existing_ids = list(honeypot_configs.keys())
-    existing_nums = []
-    for honeypot_id in existing_ids:
-        try:
-            num = int(honeypot_id.split('_')[1])
-            existing_nums.append(num)
-        except (IndexError, ValueError):
-            continue
-    
-    new_id_num = 0
-    while new_id_num in existing_nums:
-        new_id_num += 1
-    
-    new_honeypot_id = f"honeypot_{new_id_num}"
-
-    import secrets
-    if request.blockchain == "ethereum":
-        wallet_address = f"0x{secrets.token_hex(20)}"
-    elif request.blockchain == "bitcoin":
-        wallet_address = f"bc1q{secrets.token_hex(16)[:32]}"
-    else:
-        wallet_address = f"0x{secrets.token_hex(20)}"
-    
-    initial_balance = 1.0 if request.blockchain == "ethereum" else 0.01 if request.blockchain == "bitcoin" else 100.0
+    new_honeypot_id = allocate_honeypot_ids(1)[0]
+    wallet_address = generate_wallet_addresses(request.blockchain, 1)[0]
+    config = build_honeypot_config(
+        name=request.name,
+        blockchain=request.blockchain,
+        protection_type=request.protection_type,
+        monitoring_sensitivity=request.monitoring_sensitivity,
+        auto_response=request.auto_response,
+        description=request.description,
+        wallet_address=wallet_address,
+        created_at=datetime.utcnow(),
+    )
+    initial_balance = config["initial_balance"]
+    save_honeypot(new_honeypot_id, config)
+
+    raise_alert(
+        "honeypot_deployed",
+        f"🎯 NEW HONEYPOT DEPLOYED: {new_honeypot_id} ({request.name})",
+        severity="info",
+        blockchain=request.blockchain,
+        wallet=wallet_address,
+        balance=initial_balance,
+        protection=request.protection_type,
+        status="ACTIVE",
+    )
 
-    current_time = datetime.utcnow()
-    honeypot_configs[new_honeypot_id] = {
-        "name": request.name,
-        "monitoring_sensitivity": request.monitoring_sensitivity,
-        "protection_type": request.protection_type,
-        "auto_response": request.auto_response,
-        "routing_method": "classical",
+    return {
+        "message": f"Honeypot '{request.name}' deployed successfully",
+        "honeypot_id": new_honeypot_id,
         "blockchain": request.blockchain,
-        "description": request.description or "",
-        "interaction_count": 0,
-        "last_interaction": None,
-        "threat_indicators": [],
-        "starred": False,
-        "created_at": current_time,
-        "activated_at": current_time,
-        "wallet_address": wallet_address,
-        "initial_balance": initial_balance,
-        "current_balance": initial_balance,
-        "status": "active",
-        # Store offset as 0 for newly created honeypots (just activated)
-        "_activation_offset": {"days": 0, "hours": 0, "minutes": 0}
+        "protection_type": request.protection_type,
+        "status": "active"
     }
 
 
-    logger.info(f"✅ Honeypot deployed successfully: {new_honeypot_id} ({request.name})")
-    logger.info(f"📍 Wallet address: {wallet_address}")
-    logger.info(f"💰 Initial balance: {initial_balance} {request.blockchain}")
-    
-    print(f"\n🎯 NEW HONEYPOT DEPLOYED:")
-    print(f"   ID: {new_honeypot_id}")
-    print(f"   Name: {request.name}")
-    print(f"   Blockchain: {request.blockchain}")
-    print(f"   Wallet: {wallet_address}")
-    print(f"   Balance: {initial_balance}")
-    print(f"   Protection: {request.protection_type}")
-    print(f"   Status: ACTIVE\n")
+@router.post("/fleet/deploy")
+async def bulk_deploy_honeypots(request: BulkDeployHoneypotRequest):
+    """Deploy a fleet of identically configured honeypots in one batch."""
+    honeypot_ids = allocate_honeypot_ids(request.count)
+    wallet_addresses = generate_wallet_addresses(request.blockchain, request.count)
+    current_time = datetime.utcnow()
+
+    configs = {}
+    for honeypot_id, wallet_address in zip(honeypot_ids, wallet_addresses, strict=True):
+        configs[honeypot_id] = build_honeypot_config(
+            name=f"{request.name_prefix} {_honeypot_number(honeypot_id) + 1}",
+            blockchain=request.blockchain,
+            protection_type=request.protection_type,
+            monitoring_sensitivity=request.monitoring_sensitivity,
+            auto_response=request.auto_response,
+            description=request.description,
+            wallet_address=wallet_address,
+            created_at=current_time,
+        )
+
+    state.put_honeypots(configs)
+    for honeypot_id, config in configs.items():
+        registry.record_put(honeypot_id, config)
+
+    logger.info(
+        f"🚀 Fleet deployed: {request.count} {request.blockchain} honeypots "
+        f"({honeypot_ids[0]}..{honeypot_ids[-1]})"
+    )
 
     return {
-        "message": f"Honeypot '{request.name}' deployed successfully",
-        "honeypot_id": new_honeypot_id,
+        "message": f"Deployed {request.count} honeypots",
+        "count": request.count,
+        "honeypot_ids": honeypot_ids,
         "blockchain": request.blockchain,
-        "protection_type": request.protection_type,
         "status": "active"
     }
 
 
+def _set_fleet_disabled(honeypot_ids: list[str], disabled: bool) -> list[str]:
+    updated = state.set_disabled_many(honeypot_ids, disabled)
+    for honeypot_id in updated:
+        registry.record_disabled(honeypot_id, disabled)
+    return updated
+
+
+def _fleet_result(action: str, requested: list[str], updated: list[str]) -> dict:
+    updated_set = set(updated)
+    not_found = [honeypot_id for honeypot_id in requested if honeypot_id not in updated_set]
+    logger.info(f"🛠️ Fleet {action}: {len(updated)} honeypots, {len(not_found)} not found")
+    return {
+        "message": f"{len(updated)} honeypots {action}",
+        "count": len(updated),
+        "not_found": not_found
+    }
+
+
+@router.post("/fleet/enable")
+async def bulk_enable_honeypots(request: BulkHoneypotRequest):
+    """Enable many honeypots at once."""
+    updated = _set_fleet_disabled(request.honeypot_ids, False)
+    return _fleet_result("enabled", request.honeypot_ids, updated)
+
+
+@router.post("/fleet/disable")
+async def bulk_disable_honeypots(request: BulkHoneypotRequest):
+    """Disable many honeypots at once."""
+    updated = _set_fleet_disabled(request.honeypot_ids, True)
+    return _fleet_result("disabled", request.honeypot_ids, updated)
+
+
+@router.post("/fleet/delete")
+async def bulk_delete_honeypots(request: BulkHoneypotRequest):
+    """Delete many honeypots permanently."""
+    deleted = state.delete_honeypots(request.honeypot_ids)
+    for honeypot_id in deleted:
+        registry.record_delete(honeypot_id)
+    return _fleet_result("deleted", request.honeypot_ids, deleted)
+
+
 @router.post("/honeypots/{honeypot_id}/interactions")
 async def record_interaction(honeypot_id: str, interaction: RecordInteractionRequest):
     """Record a new interaction with a honeypot."""
-    if honeypot_id not in honeypot_configs:
-        raise HTTPException(status_code=404, detail="Honeypot not found")
-    
-    interaction_id = f"int_{len(honeypot_interactions)}_{honeypot_id}"
-    
-    honeypot_config = honeypot_configs[honeypot_id]
+    honeypot_config = get_honeypot_or_404(honeypot_id)
     auto_responded = False
     
     if honeypot_config.get("auto_response", False):
@@ -610,7 +1043,7 @@ async def record_interaction(honeypot_id: str, interaction: RecordInteractionReq
             auto_responded = True
     
     new_interaction = HoneypotInteraction(
-        id=interaction_id,
+        id="",  # assigned by the state backend
         honeypot_id=honeypot_id,
         interaction_type=interaction.interaction_type,
         source_ip=interaction.source_ip,
@@ -622,32 +1055,59 @@ async def record_interaction(honeypot_id: str, interaction: RecordInteractionReq
         auto_responded=auto_responded
     )
     
-    honeypot_interactions.append(new_interaction.dict())
-    
-    honeypot_configs[honeypot_id]["interaction_count"] += 1
-    honeypot_configs[honeypot_id]["last_interaction"] = datetime.utcnow()
-    
+    interaction_id = store_interaction(new_interaction.dict(), path="api")["id"]
+    attacker_sketches.record(honeypot_id, {
+        "source_ip": interaction.source_ip,
+        "source_address": interaction.source_address,
+    })
+    for anomaly in anomaly_detector.observe(honeypot_id, interaction.source_ip):
+        threat_detector.record_anomaly(anomaly)
+        metrics.counter("threats_detected_total", source=anomaly["type"]).inc()
+        raise_alert(
+            "rate_anomaly",
+            f"📈 ANOMALY: {anomaly['type'].replace('_', ' ')} ({anomaly['key'] or 'fleet'})",
+            severity="high",
+            type=anomaly["type"],
+            key=anomaly["key"] or "fleet",
+            count=anomaly["count"],
+        )
     if interaction.threat_level in ["high", "critical"]:
-        threat_indicators = honeypot_configs[honeypot_id].get("threat_indicators", [])
-        if interaction.interaction_type not in threat_indicators:
-            threat_indicators.append(interaction.interaction_type)
-            honeypot_configs[honeypot_id]["threat_indicators"] = threat_indicators
+        metrics.counter("threats_detected_total", source=interaction.interaction_type).inc()
+    
+    def count_interaction(config: dict) -> dict:
+        config["interaction_count"] = config.get("interaction_count", 0) + 1
+        config["last_interaction"] = datetime.utcnow()
+        if interaction.threat_level in ["high", "critical"]:
+            threat_indicators = config.setdefault("threat_indicators", [])
+            if interaction.interaction_type not in threat_indicators:
+                threat_indicators.append(interaction.interaction_type)
+        return config
+
+    # None if the honeypot was deleted meanwhile; the interaction still stands
+    honeypot_config = update_honeypot(honeypot_id, count_interaction) or honeypot_config
     
-    honeypot_name = honeypot_configs[honeypot_id].get("name", "Unknown")
-    logger.info(f"🔍 Interaction recorded for {honeypot_id} ({honeypot_name})")
-    logger.info(f"   Type: {interaction.interaction_type}")
-    logger.info(f"   Source: {interaction.source_ip}")
-    logger.info(f"   Threat: {interaction.threat_level}")
-    logger.info(f"   Auto-response: {auto_responded}")
+    honeypot_name = honeypot_config.get("name", "Unknown")
+    log_event(
+        logger, logging.INFO, "interaction_recorded",
+        f"🔍 Interaction recorded for {honeypot_id} ({honeypot_name})",
+        sample_rate=settings.LOG_INTERACTION_SAMPLE_RATE,
+        type=interaction.interaction_type,
+        source=interaction.source_ip,
+        threat=interaction.threat_level,
+        auto_response=auto_responded,
+    )
     
     if interaction.threat_level in ["high", "critical"]:
-        print(f"\n⚠️  HIGH THREAT INTERACTION DETECTED:")
-        print(f"   Honeypot: {honeypot_name} ({honeypot_id})")
-        print(f"   Type: {interaction.interaction_type}")
-        print(f"   Source IP: {interaction.source_ip}")
-        print(f"   Threat Level: {interaction.threat_level.upper()}")
-        print(f"   Amount: {interaction.amount}")
-        print(f"   Auto-responded: {auto_responded}\n")
+        raise_alert(
+            "high_threat_interaction",
+            f"⚠️  HIGH THREAT INTERACTION DETECTED: {honeypot_name} ({honeypot_id})",
+            severity="high" if interaction.threat_level == "high" else "critical",
+            type=interaction.interaction_type,
+            source_ip=interaction.source_ip,
+            threat_level=interaction.threat_level.upper(),
+            amount=interaction.amount,
+            auto_responded=auto_responded,
+        )
     
     return {
         "message": "Interaction recorded successfully",
@@ -659,19 +1119,10 @@ async def record_interaction(honeypot_id: str, interaction: RecordInteractionReq
 @router.get("/honeypots/{honeypot_id}/interactions", response_model=list[HoneypotInteraction])
 async def get_honeypot_interactions(honeypot_id: str, limit: int = 50, offset: int = 0):
     """Get interactions for a specific honeypot."""
-    if honeypot_id not in honeypot_configs:
+    if not state.has_honeypot(honeypot_id):
         raise HTTPException(status_code=404, detail="Honeypot not found")
     
-    honeypot_specific_interactions = [
-        interaction for interaction in honeypot_interactions 
-        if interaction["honeypot_id"] == honeypot_id
-    ]
-    
-    sorted_interactions = sorted(
-        honeypot_specific_interactions, 
-        key=lambda x: x["timestamp"], 
-        reverse=True
-    )[offset:offset + limit]
+    sorted_interactions = state.list_interactions(honeypot_id, limit=limit, offset=offset)
     
     return [HoneypotInteraction(**interaction) for interaction in sorted_interactions]
 
@@ -679,25 +1130,45 @@ async def get_honeypot_interactions(honeypot_id: str, limit: int = 50, offset: i
 @router.get("/interactions", response_model=list[HoneypotInteraction])
 async def get_all_interactions(limit: int = 100, offset: int = 0):
     """Get all honeypot interactions across the system."""
-    sorted_interactions = sorted(
-        honeypot_interactions, 
-        key=lambda x: x["timestamp"], 
-        reverse=True
-    )[offset:offset + limit]
+    sorted_interactions = state.list_interactions(limit=limit, offset=offset)
     
     return [HoneypotInteraction(**interaction) for interaction in sorted_interactions]
 
 
+@router.get("/attackers")
+async def get_attackers(top: int = Query(10, ge=1, le=100)):
+    """Distinct sources and heaviest sources across the fleet in the sketch window.
+
+    Counts are estimates: distinct counts are within a few percent and
+    heavy hitter counts may be slightly high, never low.
+    """
+    return attacker_sketches.summary(top=top)
+
+
+@router.get("/anomalies")
+async def get_anomalies():
+    """Rate anomaly detector statistics and the most recent anomalies."""
+    return anomaly_detector.snapshot()
+
+
+@router.get("/honeypots/{honeypot_id}/attackers")
+async def get_honeypot_attackers(honeypot_id: str, top: int = Query(10, ge=1, le=100)):
+    """Distinct and heaviest sources for one honeypot in the sketch window."""
+    if not state.has_honeypot(honeypot_id):
+        raise HTTPException(status_code=404, detail="Honeypot not found")
+    summary = attacker_sketches.summary(honeypot_id, top=top)
+    if summary is None:
+        # No recent interactions, or evicted in favour of more active honeypots
+        empty = {"distinct": 0, "total": 0, "top": []}
+        summary = {field: dict(empty) for field in attacker_sketches.FIELDS}
+        summary["window_seconds"] = attacker_sketches.window
+    return summary
+
+
 @router.post("/honeypots/{honeypot_id}/simulate-interaction")
 async def simulate_honeypot_interaction(honeypot_id: str):
     """Simulate a random interaction for testing purposes."""
-    if honeypot_id not in honeypot_configs:
-        raise HTTPException(status_code=404, detail="Honeypot not found")
-    
-    honeypot_name = honeypot_configs[honeypot_id].get("name", "Unknown")
-    logger.info(f"🎲 Simulating interaction for {honeypot_id} ({honeypot_name})")
-    
-    import random
+    honeypot_name = get_honeypot_or_404(honeypot_id).get("name", "Unknown")
     
     interaction_types = ["connection_attempt", "transaction", "scan", "probe", "suspicious_activity"]
     threat_levels = ["low", "medium", "high", "critical"]
@@ -719,11 +1190,13 @@ async def simulate_honeypot_interaction(honeypot_id: str):
         threat_level=selected_threat
     )
     
-    print(f"🎭 SIMULATING INTERACTION:")
-    print(f"   Honeypot: {honeypot_name} ({honeypot_id})")
-    print(f"   Type: {selected_type}")
-    print(f"   Threat: {selected_threat}")
-    print(f"   Source: {simulated_interaction.source_ip}")
+    log_event(
+        logger, logging.INFO, "interaction_simulated",
+        f"🎭 Simulating interaction for {honeypot_id} ({honeypot_name})",
+        type=selected_type,
+        threat=selected_threat,
+        source=simulated_interaction.source_ip,
+    )
     
     return await record_interaction(honeypot_id, simulated_interaction)
 
@@ -731,54 +1204,125 @@ async def simulate_honeypot_interaction(honeypot_id: str):
 @router.get("/debug/system-status")
 async def get_system_debug_status():
     """Get detailed system status for debugging."""
-    active_count = sum(1 for config in honeypot_configs.values() if config.get("status") == "active")
-    triggered_count = sum(1 for config in honeypot_configs.values() if config.get("status") == "triggered")
-    total_balance = sum(config.get("current_balance", 0) for config in honeypot_configs.values())
-    total_interactions = sum(config.get("interaction_count", 0) for config in honeypot_configs.values())
-    
+    honeypot_configs = state.list_honeypots()
+    # Configs are dicts in the state backend, so one pass over them beats
+    # building a frame; interaction breakdowns come from the columnar table
+    active_count = triggered_count = total_interactions = 0
+    total_balance = 0.0
+    honeypots = {}
+    for honeypot_id, config in honeypot_configs.items():
+        honeypot_status = config.get("status")
+        if honeypot_status == "active":
+            active_count += 1
+        elif honeypot_status == "triggered":
+            triggered_count += 1
+        total_balance += config.get("current_balance", 0)
+        total_interactions += config.get("interaction_count", 0)
+        honeypots[honeypot_id] = {
+            "name": config.get("name"),
+            "status": honeypot_status,
+            "balance": config.get("current_balance"),
+            "interactions": config.get("interaction_count", 0),
+            "starred": config.get("starred", False),
+            "wallet": config.get("wallet_address")
+        }
+
     status = {
         "total_honeypots": len(honeypot_configs),
         "active_honeypots": active_count,
         "triggered_honeypots": triggered_count,
         "total_balance": total_balance,
         "total_interactions": total_interactions,
-        "total_recorded_interactions": len(honeypot_interactions),
+        "total_recorded_interactions": state.count_interactions(),
+        "interactions_by_type": interaction_table.counts_by("interaction_type"),
+        "interactions_by_severity": interaction_table.counts_by("threat_level"),
         "monitoring_active": balance_check_task is not None and not balance_check_task.done(),
-        "honeypots": {
-            honeypot_id: {
-                "name": config.get("name"),
-                "status": config.get("status"),
-                "balance": config.get("current_balance"),
-                "interactions": config.get("interaction_count", 0),
-                "starred": config.get("starred", False),
-                "wallet": config.get("wallet_address")
-            }
-            for honeypot_id, config in honeypot_configs.items()
-        }
+        "honeypots": honeypots,
     }
     
-    print(f"\n🔍 SYSTEM DEBUG STATUS:")
-    print(f"   Total honeypots: {len(honeypot_configs)}")
-    print(f"   Active: {active_count}, Triggered: {triggered_count}")
-    print(f"   Total balance: {total_balance:.4f}")
-    print(f"   Total interactions: {total_interactions}")
-    print(f"   Monitoring task running: {status['monitoring_active']}")
-    print()
+    log_event(
+        logger, logging.INFO, "debug_system_status",
+        "🔍 System debug status",
+        total_honeypots=len(honeypot_configs),
+        active=active_count,
+        triggered=triggered_count,
+        total_balance=round(total_balance, 4),
+        total_interactions=total_interactions,
+        monitoring_active=status["monitoring_active"],
+    )
     
     return status
 
 
+@router.get("/analytics/interactions")
+async def get_interaction_analytics(
+    by: list[str] = Query(["honeypot"]),
+    bucket: str = Query("1h", pattern="^[0-9]+(s|min|h|D)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=100000),
+):
+    """Aggregate this worker's interactions by honeypot, type, severity, source or time.
+
+    ``by`` can be repeated (e.g. ``by=honeypot&by=severity``); ``time``
+    groups into ``bucket``-wide intervals. Groups are ordered by count.
+    """
+    try:
+        # Large tables take a while to group, so only the copy runs on the loop
+        result = await asyncio.to_thread(
+            aggregate_frame,
+            interaction_table.frame(copy=True),
+            by,
+            bucket=bucket,
+            since=since,
+            until=until,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422, detail=f"{e}; expected {', '.join(GROUP_KEYS)}"
+        ) from e
+    total_groups = len(result)
+    result = result.head(limit)
+    for column in result.select_dtypes(include="datetime").columns:
+        result[column] = result[column].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    return {
+        "by": by,
+        "rows": len(interaction_table),
+        "groups": total_groups,
+        "results": result.astype(object).where(result.notna(), None).to_dict(orient="records"),
+    }
+
+
+@router.get("/analytics/interactions/export")
+async def export_interactions(format: str = Query("parquet", pattern="^(parquet|arrow)$")):
+    """Download this worker's interaction table as Parquet or Arrow for offline analysis."""
+    try:
+        # Copy on the loop, serialize off it
+        data = await asyncio.to_thread(export_frame, interaction_table.frame(copy=True), format)
+    except ImportError:
+        raise HTTPException(
+            status_code=501, detail="Export needs pyarrow (install the 'analytics' extra)"
+        ) from None
+    media_type, extension = {
+        "parquet": ("application/vnd.apache.parquet", "parquet"),
+        "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+    }[format]
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="interactions.{extension}"'},
+    )
+
+
 @router.post("/honeypots/reset-all")
 async def reset_all_honeypots():
     """Reset all honeypots to active state with original balances."""
     reset_count = 0
+    honeypot_configs = state.list_honeypots()
     
     for honeypot_id, config in honeypot_configs.items():
-        if config.get("status") == "triggered":
-            config["status"] = "active"
-            config["current_balance"] = config.get("initial_balance", 1.0)
-            config["threat_indicators"] = []
-            config["last_interaction"] = None
+        if config.get("status") == "triggered" and rearm_honeypot(honeypot_id):
+            scheduler.cancel_key(("rearm", honeypot_id))
             reset_count += 1
     
     logger.info(f"🔄 Reset {reset_count} triggered honeypots to active state")
@@ -793,10 +1337,7 @@ async def reset_all_honeypots():
 @router.post("/debug/trigger-drain/{honeypot_id}")
 async def trigger_manual_drain(honeypot_id: str):
     """Manually trigger a fund drain for testing purposes."""
-    if honeypot_id not in honeypot_configs:
-        raise HTTPException(status_code=404, detail="Honeypot not found")
-    
-    config = honeypot_configs[honeypot_id]
+    config = get_honeypot_or_404(honeypot_id)
     if config.get("status") != "active":
         raise HTTPException(status_code=400, detail="Honeypot is not active")
     
@@ -804,14 +1345,12 @@ async def trigger_manual_drain(honeypot_id: str):
     if current_balance <= 0:
         raise HTTPException(status_code=400, detail="Honeypot already has no balance")
     
-    previous_balance = current_balance
-    config["current_balance"] = 0
-    config["status"] = "triggered"
-    config["last_interaction"] = datetime.utcnow()
+    drained = drain_honeypot(honeypot_id)
+    if drained is None:
+        raise HTTPException(status_code=400, detail="Honeypot is not active")
+    config, previous_balance = drained
     
-    interaction_id = f"int_{len(honeypot_interactions)}_{honeypot_id}"
     drain_interaction = {
-        "id": interaction_id,
         "honeypot_id": honeypot_id,
         "interaction_type": "manual_funds_drained",
         "source_ip": "127.0.0.1",
@@ -827,21 +1366,18 @@ async def trigger_manual_drain(honeypot_id: str):
         "threat_level": "critical",
         "auto_responded": config.get("auto_response", False)
     }
-    honeypot_interactions.append(drain_interaction)
-    config["interaction_count"] += 1
-    
-    if "funds_drained" not in config.get("threat_indicators", []):
-        config["threat_indicators"].append("funds_drained")
+    interaction_id = store_interaction(drain_interaction, path="manual")["id"]
+    metrics.counter("threats_detected_total", source="manual_funds_drained").inc()
+    schedule_rearm(honeypot_id)
     
     honeypot_name = config.get("name", "Unknown")
-    alert_msg = f"🧪 MANUAL TEST: Honeypot {honeypot_id} ({honeypot_name}) DRAINED"
-    
-    logger.error(alert_msg)
-    print(f"\n{'='*80}")
-    print(alert_msg)
-    print(f"💸 Amount drained: {previous_balance}")
-    print(f"🔬 This was a manual test trigger")
-    print(f"{'='*80}\n")
+    raise_alert(
+        "manual_drain",
+        f"🧪 MANUAL TEST: Honeypot {honeypot_id} ({honeypot_name}) DRAINED",
+        severity="critical",
+        amount_drained=previous_balance,
+        note="This was a manual test trigger",
+    )
     
     return {
         "message": f"Successfully drained {previous_balance} from {honeypot_id}",
@@ -4,8 +4,10 @@ from fastapi import WebSocket
 
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, bus=None):
         self.active_connections: list[WebSocket] = []
+        # Optional EventBus; when set, broadcasts reach every worker's clients
+        self.bus = bus
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -18,6 +20,13 @@ class ConnectionManager:
         await websocket.send_text(message)
 
     async def broadcast(self, message: dict):
+        if self.bus is not None:
+            await self.bus.publish(message)
+        else:
+            await self.broadcast_local(message)
+
+    async def broadcast_local(self, message: dict):
+        """Send a message to the clients connected to this worker only."""
         message_text = json.dumps(message)
         for connection in self.active_connections:
             try:
@@ -0,0 +1,171 @@
+"""Shared helpers for the benchmark suite: stand-in environment, timing, results."""
+
+import json
+import os
+import platform
+import subprocess
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+# Throughput below (1 - tolerance) x baseline is reported as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+def stand_in_environment(directory: str) -> None:
+    """Point the API at throwaway local state before it is imported.
+
+    Settings are read when ``utils.config`` is imported, so this must run
+    before anything under ``api`` or ``main`` is imported.
+    """
+    os.environ.update(
+        {
+            "STATE_BACKEND": "memory",
+            "STATE_SQLITE_PATH": os.path.join(directory, "state.db"),
+            "REGISTRY_PATH": os.path.join(directory, "honeypots.json"),
+            "EVENT_BUS_ENABLED": "false",
+            "PROFILE_SLOW_REQUESTS": "false",
+            "ALERT_SINKS": "none",
+            "LOG_LEVEL": "WARNING",
+            "LOG_FILE": "",
+        }
+    )
+
+
+def latency_summary(histogram, elapsed: float, operations: int) -> dict:
+    """Build a result entry: throughput plus per-operation latency."""
+    return {
+        "throughput": operations / elapsed if elapsed else 0.0,
+        "operations": operations,
+        "mean_us": histogram.sum / histogram.count * 1e6 if histogram.count else 0.0,
+        "p50_us": histogram.percentile(0.5) * 1e6,
+        "p99_us": histogram.percentile(0.99) * 1e6,
+        "max_us": histogram.max * 1e6,
+    }
+
+
+def _calibrate(run_once: Callable[[int], float], min_time: float) -> int:
+    """Find an iteration count that takes at least ``min_time`` seconds."""
+    iterations = 1
+    while True:
+        elapsed = run_once(iterations)
+        if elapsed >= min_time or iterations >= 10_000_000:
+            return iterations
+        iterations *= 10 if elapsed < min_time / 10 else 2
+
+
+def bench(
+    func: Callable[[], object],
+    setup: Callable[[], object] | None = None,
+    iterations: int | None = None,
+    repeat: int = 5,
+    min_time: float = 0.1,
+) -> dict:
+    """Time ``func`` and report the best of ``repeat`` runs.
+
+    ``setup`` runs before every run (outside the timing), for benchmarks
+    whose subject accumulates state.
+    """
+    from utils.metrics import LatencyHistogram
+
+    def run_once(count: int) -> float:
+        if setup:
+            setup()
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        return time.perf_counter() - start
+
+    iterations = iterations or _calibrate(run_once, min_time)
+    histogram = LatencyHistogram()
+    best = float("inf")
+    for _ in range(repeat):
+        elapsed = run_once(iterations)
+        histogram.record(elapsed / iterations)
+        best = min(best, elapsed)
+    return latency_summary(histogram, best, iterations)
+
+
+async def abench(
+    func: Callable[[], Awaitable[object]],
+    iterations: int,
+    repeat: int = 5,
+) -> dict:
+    """Async variant of ``bench`` with a fixed iteration count."""
+    from utils.metrics import LatencyHistogram
+
+    histogram = LatencyHistogram()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await func()
+        elapsed = time.perf_counter() - start
+        histogram.record(elapsed / iterations)
+        best = min(best, elapsed)
+    return latency_summary(histogram, best, iterations)
+
+
+def environment_info() -> dict:
+    """Describe where a run happened, so results are compared like for like."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(results: dict, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> tuple[list[str], list[str]]:
+    """Compare throughput of two runs.
+
+    Returns the report lines and the names of benchmarks that regressed.
+    """
+    lines = [f"{'benchmark':<52} {'baseline':>12} {'current':>12} {'change':>8}"]
+    regressions = []
+    base_benchmarks = baseline.get("benchmarks", {})
+    for name, result in sorted(current.get("benchmarks", {}).items()):
+        base = base_benchmarks.get(name)
+        if base is None or not base.get("throughput"):
+            lines.append(f"{name:<52} {'-':>12} {result['throughput']:>12.1f} {'new':>8}")
+            continue
+        ratio = result["throughput"] / base["throughput"]
+        flag = ""
+        if ratio < 1 - tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        lines.append(
+            f"{name:<52} {base['throughput']:>12.1f} {result['throughput']:>12.1f} "
+            f"{(ratio - 1) * 100:>+7.1f}%{flag}"
+        )
+    return lines, regressions
+
+
+def format_result(name: str, result: dict) -> str:
+    return (
+        f"{name:<52} {result['throughput']:>12.1f}/s  "
+        f"p50 {result['p50_us']:>10.1f}us  p99 {result['p99_us']:>10.1f}us"
+    )
@@ -0,0 +1,167 @@
+"""In-process ASGI load generator for the HTTP API.
+
+Requests are driven straight into the ASGI app (no sockets or HTTP parsing),
+so the numbers measure the application itself: routing, validation, state
+access and serialization. Each scenario runs ``concurrency`` client tasks
+against the app with its lifespan (background monitors included) running.
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.common import latency_summary
+
+
+class _Response:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self):
+        self.status = 0
+        self.headers: list = []
+        self.body = bytearray()
+
+
+async def asgi_request(
+    app, method: str, url: str, body: bytes = b"", headers: dict | None = None
+) -> _Response:
+    """Send one HTTP request through the ASGI app."""
+    parts = urlsplit(url)
+    raw_headers = [(b"host", b"bench")]
+    if body:
+        raw_headers += [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    response = _Response()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response.status = message["status"]
+            response.headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response.body += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
+
+
+async def run_scenario(app, make_request, requests: int, concurrency: int) -> dict:
+    """Issue ``requests`` requests from ``concurrency`` concurrent clients."""
+    from utils.metrics import LatencyHistogram
+
+    histogram = LatencyHistogram()
+    errors = 0
+    issued = 0
+
+    async def client():
+        nonlocal errors, issued
+        while issued < requests:
+            issued += 1
+            method, url, body, headers = make_request(issued)
+            start = time.perf_counter()
+            response = await asgi_request(app, method, url, body, headers)
+            histogram.record(time.perf_counter() - start)
+            if response.status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = latency_summary(histogram, elapsed, requests)
+    result["concurrency"] = concurrency
+    result["errors"] = errors
+    return result
+
+
+async def _run(quick: bool) -> dict:
+    import main
+
+    app = main.app
+    requests = 500 if quick else 5000
+    concurrency = 16
+    fleet = 200 if quick else 2000
+    results = {}
+
+    async with app.router.lifespan_context(app):
+        # Seed a fleet and some interaction history to page through
+        seeded = await asgi_request(
+            app, "POST", "/api/v1/fleet/deploy",
+            json.dumps({"count": fleet, "name_prefix": "Bench", "blockchain": "ethereum",
+                        "protection_type": "ecdsa", "monitoring_sensitivity": "medium"}).encode(),
+        )
+        if seeded.status != 200:
+            raise RuntimeError(f"Seeding the fleet failed: {seeded.status} {bytes(seeded.body)}")
+        ingest_body = json.dumps({
+            "interaction_type": "probe",
+            "source_ip": "10.0.0.1",
+            "amount": 1.0,
+            "threat_level": "low",
+        }).encode()
+        for i in range(1000 if not quick else 200):
+            await asgi_request(app, "POST", f"/api/v1/honeypots/honeypot_{i % fleet}/interactions", ingest_body)
+
+        transaction_body = json.dumps(
+            {"from_address": "0xbench", "to_address": "0xfeed", "amount": 2500.0}
+        ).encode()
+        for _ in range(1000 if not quick else 200):
+            await asgi_request(app, "POST", "/api/v1/transactions", transaction_body)
+
+        etag = dict(
+            (await asgi_request(app, "GET", "/api/v1/honeypots")).headers
+        )[b"etag"].decode()
+
+        scenarios = {
+            "GET /status": lambda i: ("GET", "/api/v1/status", b"", None),
+            f"GET /honeypots [fleet={fleet}]": lambda i: ("GET", "/api/v1/honeypots", b"", None),
+            f"GET /honeypots [fleet={fleet}, If-None-Match]": lambda i: (
+                "GET", "/api/v1/honeypots", b"", {"If-None-Match": etag}
+            ),
+            "GET /honeypots?limit=50": lambda i: ("GET", "/api/v1/honeypots?limit=50", b"", None),
+            "GET /interactions?limit=100": lambda i: (
+                "GET", "/api/v1/interactions?limit=100", b"", None
+            ),
+            "GET /transactions?limit=100": lambda i: (
+                "GET", "/api/v1/transactions?limit=100", b"", None
+            ),
+            "POST /transactions": lambda i: (
+                "POST", "/api/v1/transactions", transaction_body, None
+            ),
+            "POST /honeypots/{id}/interactions": lambda i: (
+                "POST", f"/api/v1/honeypots/honeypot_{i % fleet}/interactions", ingest_body, None
+            ),
+        }
+        for name, make_request in scenarios.items():
+            results[f"load.{name}"] = await run_scenario(app, make_request, requests, concurrency)
+    return results
+
+
+def run(quick: bool = False) -> dict:
+    """Run every load scenario."""
+    return asyncio.run(_run(quick))
@@ -0,0 +1,150 @@
+"""Compare interaction ingest throughput with the async logging pipeline on and off.
+
+Each mode runs in a fresh interpreter (settings are read at import time).
+Its stdout goes either to a file (``--sink file``, writes are cheap) or to a
+pipe drained at a fixed rate (``--sink pipe``), which behaves like a busy
+terminal or container log driver: once the pipe buffer fills, every
+synchronous write blocks the event loop.
+
+    python -m benchmarks.logging_throughput --events 20000 --sink pipe
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+THREAT_LEVELS = ("low", "low", "medium", "medium", "high")
+
+
+async def _ingest(events: int) -> dict:
+    from api.models import RecordInteractionRequest
+    from api.routes import record_interaction
+    from utils.config import get_settings
+    from utils.log import configure_logging, stop_logging
+    from utils.metrics import metrics
+
+    requests = [
+        RecordInteractionRequest(
+            interaction_type="probe",
+            source_ip=f"10.0.{i // 250 % 250}.{i % 250}",
+            amount=1.0,
+            threat_level=THREAT_LEVELS[i % len(THREAT_LEVELS)],
+        )
+        for i in range(events)
+    ]
+
+    configure_logging(get_settings())
+    start = time.perf_counter()
+    for request in requests:
+        await record_interaction("honeypot_0", request)
+    ingest_seconds = time.perf_counter() - start
+
+    # Time for the writer thread to drain what the handlers queued
+    stop_logging()
+    total_seconds = time.perf_counter() - start
+    return {
+        "events": events,
+        "ingest_seconds": round(ingest_seconds, 4),
+        "events_per_second": round(events / ingest_seconds),
+        "drained_seconds": round(total_seconds, 4),
+        "dropped_records": int(metrics.total("log_records_dropped_total")),
+    }
+
+
+def _run_worker(events: int) -> None:
+    result = asyncio.run(_ingest(events))
+    sys.stderr.write(json.dumps(result) + "\n")
+
+
+def _drain_pipe(pipe, bytes_per_second: int, chunk_size: int = 4096) -> None:
+    """Read a pipe no faster than ``bytes_per_second``."""
+    delay = chunk_size / bytes_per_second
+    while pipe.read(chunk_size):
+        time.sleep(delay)
+
+
+def _run_mode(
+    events: int,
+    log_async: bool,
+    sample_rate: float,
+    output_dir: str,
+    sink: str,
+    pipe_rate: int,
+) -> dict:
+    env = {
+        **os.environ,
+        "LOG_ASYNC": "true" if log_async else "false",
+        "LOG_INTERACTION_SAMPLE_RATE": str(sample_rate),
+        "REGISTRY_PATH": os.path.join(output_dir, "honeypots.json"),
+        "STATE_BACKEND": "memory",
+    }
+    command = [sys.executable, "-m", "benchmarks.logging_throughput", "--worker", "--events", str(events)]
+
+    if sink == "pipe":
+        process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        drainer = threading.Thread(target=_drain_pipe, args=(process.stdout, pipe_rate))
+        drainer.start()
+        stderr = process.stderr.read().decode()
+        process.wait()
+        drainer.join()
+    else:
+        with open(os.path.join(output_dir, "stdout.log"), "w") as stdout:
+            process = subprocess.run(
+                command, env=env, stdout=stdout, stderr=subprocess.PIPE, text=True
+            )
+        stderr = process.stderr
+
+    if process.returncode != 0:
+        raise RuntimeError(f"benchmark worker failed:\n{stderr}")
+    return json.loads(stderr.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--sink", choices=("file", "pipe"), default="file")
+    parser.add_argument("--pipe-rate", type=int, default=2 * 1024 * 1024,
+                        help="bytes per second the pipe sink is drained at")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode; the best is reported")
+    parser.add_argument("--sample-rate", type=float, default=1.0,
+                        help="LOG_INTERACTION_SAMPLE_RATE for the async run")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_worker(args.events)
+        return
+
+    modes = [
+        ("sync", False, 1.0),
+        ("async", True, 1.0),
+    ]
+    if args.sample_rate < 1.0:
+        modes.append((f"async, sampled {args.sample_rate:g}", True, args.sample_rate))
+
+    results = {}
+    for name, log_async, sample_rate in modes:
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as output_dir:
+                runs.append(
+                    _run_mode(args.events, log_async, sample_rate, output_dir,
+                              args.sink, args.pipe_rate)
+                )
+        r = results[name] = max(runs, key=lambda run: run["events_per_second"])
+        print(f"{name:>22}: {r['events_per_second']:>8} events/s "
+              f"(ingest {r['ingest_seconds']}s, drained {r['drained_seconds']}s, "
+              f"{r['dropped_records']} records dropped)")
+
+    speedup = results["async"]["events_per_second"] / results["sync"]["events_per_second"]
+    print(f"{'async vs sync':>22}: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Microbenchmarks for the core classes."""
+
+import asyncio
+import tempfile
+
+from benchmarks.common import abench, bench
+
+
+class _NullWebSocket:
+    """Stands in for a connected client; sending costs a coroutine switch."""
+
+    async def send_text(self, message: str) -> None:
+        pass
+
+
+def _threat_detector(results: dict, quick: bool) -> None:
+    from core.threat_detector import ThreatDetector
+    from services.state import MemoryStateBackend
+
+    detector = ThreatDetector(state=MemoryStateBackend())
+    results["micro.threat_detector.get_current_threat_level"] = bench(
+        detector.get_current_threat_level
+    )
+
+    # simulate_attack appends to the indicator and history lists, so each run
+    # starts from a fresh detector with a fixed number of attacks
+    fresh = {}
+
+    def reset():
+        fresh["detector"] = ThreatDetector(state=MemoryStateBackend())
+
+    results["micro.threat_detector.simulate_attack_x1000"] = bench(
+        lambda: [fresh["detector"].simulate_attack(0.01) for _ in range(1000)],
+        setup=reset,
+        iterations=1,
+    )
+
+
+def _crypto_router(results: dict, quick: bool) -> None:
+    from core.router import CryptoRouter
+
+    router = CryptoRouter()
+    transaction = {"value": 50000}
+    levels = [10.0, 90.0]
+    counter = [0]
+
+    def route():
+        counter[0] += 1
+        router.route_transaction(transaction, levels[counter[0] & 1])
+
+    results["micro.crypto_router.route_transaction"] = bench(route)
+    results["micro.crypto_router.get_active_crypto_method"] = bench(
+        lambda: router.get_active_crypto_method(30.0)
+    )
+
+
+def _blockchain_service(results: dict, quick: bool) -> None:
+    from services.blockchain import BlockchainService
+
+    blocks = 20 if quick else 100
+    per_block = 10
+
+    service = BlockchainService()
+    for block in range(blocks):
+        for i in range(per_block):
+            service.create_transaction(f"addr_{i}", f"addr_{i + 1}", 1.0, "classical")
+        service.mine_pending_transactions(f"miner_{block}")
+
+    results["micro.blockchain.create_transaction"] = bench(
+        lambda: service.create_transaction("a", "b", 1.0, "classical"),
+        setup=lambda: service.pending_transactions.clear(),
+    )
+    results[f"micro.blockchain.get_balance_{blocks}_blocks"] = bench(
+        lambda: service.get_balance("addr_3")
+    )
+    results[f"micro.blockchain.is_chain_valid_{blocks}_blocks"] = bench(
+        service.is_chain_valid
+    )
+    results[f"micro.blockchain.get_transaction_history_{blocks}_blocks"] = bench(
+        service.get_transaction_history
+    )
+
+
+def _dormancy_scanner(results: dict, quick: bool) -> None:
+    from datetime import datetime, timedelta
+
+    from core.dormancy import SECONDS_PER_YEAR, DormancyScanner
+    from services.blockchain import BlockchainService
+
+    addresses = 100_000 if quick else 1_000_000
+    per_block = 1000
+    service = BlockchainService()
+    genesis = datetime(2015, 1, 1).isoformat()
+    for height in range(addresses // per_block):
+        base = height * per_block
+        service.blocks.append({
+            "index": height,
+            "timestamp": genesis,
+            "transactions": [
+                {"from": None, "to": f"addr_{base + i}", "amount": 1.0}
+                for i in range(per_block)
+            ],
+        })
+    scanner = DormancyScanner(service, dormancy_period=5 * SECONDS_PER_YEAR)
+    scanner.scan()
+
+    # Each run adds one block of 100 spends, a few from dormant addresses
+    now = datetime.utcnow()
+    counter = [0]
+
+    def add_block():
+        counter[0] += 1
+        service.blocks.append({
+            "index": len(service.blocks),
+            "timestamp": (now + timedelta(seconds=counter[0])).isoformat(),
+            "transactions": [
+                {"from": f"addr_{(counter[0] * 100 + i) % addresses}", "to": f"new_{i}", "amount": 1.0}
+                for i in range(100)
+            ],
+        })
+
+    results[f"micro.dormancy_scanner.scan_new_block_{addresses}_addresses"] = bench(
+        scanner.scan, setup=add_block, iterations=1, repeat=20
+    )
+
+
+def _connection_manager(results: dict, quick: bool) -> None:
+    from api.websocket import ConnectionManager
+
+    clients = 200 if quick else 2000
+    manager = ConnectionManager()
+    manager.active_connections = [_NullWebSocket() for _ in range(clients)]
+    message = {"type": "threat_update", "data": {"threat_level": 42.0, "status": "medium"}}
+
+    results[f"micro.connection_manager.broadcast_local_{clients}_clients"] = asyncio.run(
+        abench(lambda: manager.broadcast_local(message), iterations=20 if quick else 50)
+    )
+
+
+def _state_backends(results: dict, quick: bool) -> None:
+    from datetime import datetime
+
+    from services.state import MemoryStateBackend, SQLiteStateBackend
+
+    interaction = {
+        "honeypot_id": "honeypot_0",
+        "interaction_type": "probe",
+        "source_ip": "10.0.0.1",
+        "source_address": None,
+        "amount": 1.0,
+        "details": {},
+        "timestamp": datetime.utcnow(),
+        "threat_level": "low",
+        "auto_responded": False,
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {
+            "memory": MemoryStateBackend(),
+            "sqlite": SQLiteStateBackend(f"{directory}/state.db"),
+        }
+        for name, backend in backends.items():
+            results[f"micro.state.{name}.append_interaction"] = bench(
+                lambda backend=backend: backend.append_interaction(dict(interaction)),
+                iterations=500 if quick else 2000,
+                repeat=3,
+            )
+            results[f"micro.state.{name}.list_interactions_100"] = bench(
+                lambda backend=backend: backend.list_interactions(limit=100)
+            )
+            backend.close()
+
+
+def _honeypot_list_cache(results: dict, quick: bool) -> None:
+    from datetime import datetime
+
+    from api.cache import HoneypotListCache
+    from api.routes import build_honeypot_config, build_honeypot_data
+    from services.state import MemoryStateBackend
+
+    count = 500 if quick else 5000
+    state = MemoryStateBackend()
+    for i in range(count):
+        state.put_honeypot(
+            f"honeypot_{i}",
+            build_honeypot_config(
+                name=f"Bench {i}",
+                blockchain="ethereum",
+                protection_type="ecdsa",
+                monitoring_sensitivity="medium",
+                auto_response=True,
+                description="",
+                wallet_address=f"0x{i:040x}",
+                created_at=datetime.utcnow(),
+            ),
+        )
+    cache = HoneypotListCache(state, build_honeypot_data)
+    cache.refresh()
+
+    results[f"micro.honeypot_list_cache.get_page_cached_{count}"] = bench(
+        lambda: cache.get_page(limit=100)
+    )
+
+    changed = [0]
+
+    def update_one():
+        changed[0] = (changed[0] + 1) % count
+        honeypot_id = f"honeypot_{changed[0]}"
+        config = state.get_honeypot(honeypot_id)
+        config["interaction_count"] += 1
+        state.put_honeypot(honeypot_id, config)
+        cache.get_page(limit=100)
+
+    results[f"micro.honeypot_list_cache.get_page_after_update_{count}"] = bench(update_one)
+
+
+def _attacker_sketches(results: dict, quick: bool) -> None:
+    from core.sketches import AttackerSketches
+
+    sketches = AttackerSketches()
+    counter = [0]
+
+    def record():
+        counter[0] += 1
+        i = counter[0]
+        sketches.record(
+            f"honeypot_{i % 50}",
+            {"source_ip": f"10.{i % 251}.{i % 97}.1", "source_address": f"0x{i % 4093:040x}"},
+        )
+
+    for _ in range(5000):
+        record()
+    results["micro.attacker_sketches.record"] = bench(record)
+    results["micro.attacker_sketches.fleet_summary"] = bench(
+        lambda: sketches.summary(top=10), iterations=20 if quick else 100, repeat=3
+    )
+
+
+def _anomaly_detector(results: dict, quick: bool) -> None:
+    from core.anomaly import RateAnomalyDetector
+
+    detector = RateAnomalyDetector()
+    counter = [0]
+
+    def observe():
+        counter[0] += 1
+        i = counter[0]
+        detector.observe(f"honeypot_{i % 1000}", f"10.{i % 251}.{i % 97}.1")
+
+    results["micro.anomaly_detector.observe"] = bench(observe)
+
+
+def _runtime_utilities(results: dict, quick: bool) -> None:
+    from utils.metrics import LatencyHistogram
+    from utils.scheduler import TimerWheel
+
+    histogram = LatencyHistogram()
+    results["micro.latency_histogram.record"] = bench(lambda: histogram.record(0.0123))
+
+    wheel = TimerWheel()
+    results["micro.timer_wheel.call_later_cancel"] = bench(
+        lambda: wheel.call_later(30.0, print).cancel()
+    )
+
+
+SECTIONS = (
+    _threat_detector,
+    _crypto_router,
+    _blockchain_service,
+    _dormancy_scanner,
+    _connection_manager,
+    _state_backends,
+    _honeypot_list_cache,
+    _attacker_sketches,
+    _anomaly_detector,
+    _runtime_utilities,
+)
+
+
+def run(quick: bool = False) -> dict:
+    """Run every microbenchmark."""
+    results: dict = {}
+    for section in SECTIONS:
+        section(results, quick)
+    return results
@@ -0,0 +1,75 @@
+"""Run the benchmark suite and store the results as JSON.
+
+    python -m benchmarks.run                      # everything
+    python -m benchmarks.run --suite micro --quick
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Results are written to ``benchmarks/results/<timestamp>-<commit>.json``.
+With ``--compare``, throughput is compared against an earlier run and the
+exit status is non-zero if any benchmark regressed beyond ``--tolerance``.
+"""
+
+import argparse
+import importlib
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.common import (
+    DEFAULT_TOLERANCE,
+    compare_results,
+    environment_info,
+    format_result,
+    load_results,
+    save_results,
+    stand_in_environment,
+)
+
+SUITES = {
+    "micro": "benchmarks.micro",
+    "load": "benchmarks.load",
+    "websocket": "benchmarks.websocket_fanout",
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="QuantDog benchmark suite")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="suite to run (repeatable); default: all")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke run")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/...)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed throughput drop before flagging a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        stand_in_environment(directory)
+
+        info = environment_info()
+        results = {"meta": {**info, "quick": args.quick}, "benchmarks": {}}
+        for suite in args.suite or list(SUITES):
+            print(f"== {suite}")
+            suite_results = importlib.import_module(SUITES[suite]).run(quick=args.quick)
+            for name, result in suite_results.items():
+                print(format_result(name, result))
+            results["benchmarks"].update(suite_results)
+
+    output = args.output or (
+        f"benchmarks/results/{datetime.utcnow():%Y%m%d-%H%M%S}-{info['commit'] or 'unknown'}.json"
+    )
+    save_results(results, output)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        lines, regressions = compare_results(load_results(args.compare), results, args.tolerance)
+        print()
+        print("\n".join(lines))
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""WebSocket fan-out harness with thousands of simulated clients.
+
+Each client is a real connection to the ``/ws`` endpoint, driven through the
+ASGI interface with in-memory queues instead of sockets. The harness
+broadcasts through ``ConnectionManager.broadcast`` (and so through the event
+bus) and measures how long it takes until every client has the message.
+"""
+
+import asyncio
+import json
+import time
+
+from benchmarks.common import latency_summary
+
+MARKER = '"type": "benchmark"'
+
+
+class SimulatedClient:
+    """One WebSocket client speaking ASGI to the app."""
+
+    def __init__(self, on_message):
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.on_message = on_message
+        self.received = 0
+
+    async def receive(self) -> dict:
+        return await self.inbox.get()
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.send" and MARKER in message.get("text", ""):
+            self.received += 1
+            self.on_message()
+
+    def scope(self) -> dict:
+        return {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "scheme": "ws",
+            "path": "/ws",
+            "raw_path": b"/ws",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"bench")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+            "subprotocols": [],
+        }
+
+
+async def _fanout(app, manager, clients: int, messages: int) -> dict:
+    from utils.metrics import LatencyHistogram
+
+    pending = 0
+    all_delivered = asyncio.Event()
+
+    def delivered():
+        nonlocal pending
+        pending -= 1
+        if pending == 0:
+            all_delivered.set()
+
+    connections = [SimulatedClient(delivered) for _ in range(clients)]
+    tasks = []
+    connect_start = time.perf_counter()
+    for client in connections:
+        tasks.append(asyncio.create_task(app(client.scope(), client.receive, client.send)))
+        client.inbox.put_nowait({"type": "websocket.connect"})
+    await asyncio.gather(*(client.accepted.wait() for client in connections))
+    connect_seconds = time.perf_counter() - connect_start
+
+    histogram = LatencyHistogram()
+    start = time.perf_counter()
+    for sequence in range(messages):
+        pending = clients
+        all_delivered.clear()
+        sent = time.perf_counter()
+        await manager.broadcast({"type": "benchmark", "sequence": sequence})
+        await all_delivered.wait()
+        histogram.record(time.perf_counter() - sent)
+    elapsed = time.perf_counter() - start
+
+    disconnect_start = time.perf_counter()
+    for client in connections:
+        client.inbox.put_nowait({"type": "websocket.disconnect", "code": 1000})
+    await asyncio.gather(*tasks, return_exceptions=True)
+    disconnect_seconds = time.perf_counter() - disconnect_start
+
+    result = latency_summary(histogram, elapsed, messages * clients)
+    result.update(
+        clients=clients,
+        broadcasts=messages,
+        connect_seconds=round(connect_seconds, 4),
+        disconnect_seconds=round(disconnect_seconds, 4),
+        lost=clients * messages - sum(client.received for client in connections),
+    )
+    return result
+
+
+async def _run(quick: bool) -> dict:
+    import main
+
+    app = main.app
+    results = {}
+    sizes = (100, 1000) if quick else (100, 1000, 5000)
+    async with app.router.lifespan_context(app):
+        for clients in sizes:
+            results[f"websocket.fanout_{clients}_clients"] = await _fanout(
+                app, main.manager, clients, messages=10 if quick else 50
+            )
+    return results
+
+
+def run(quick: bool = False) -> dict:
+    """Run the fan-out harness at several client counts."""
+    return asyncio.run(_run(quick))
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(quick=True), indent=2))
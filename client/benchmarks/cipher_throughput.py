@@ -0,0 +1,122 @@
+"""Payload sealing and opening throughput, in Gbps per core.
+
+Seals ``--records`` payloads of ``--size`` bytes on one flow, opens them
+again, and seals each payload of a TCP packet onto a record stream the way
+the packet path does, with a sink process reading the stream. Throughput is
+payload bits over the CPU time of this process, so it is what one core
+sustains, whatever else the machine is doing.
+
+    python -m benchmarks.cipher_throughput --size 1400 --records 50000
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import time
+
+from quantdog.client.network.headers import IPPROTO_TCP, parse_packet
+from quantdog.client.network.records import RecordUplink
+from quantdog.client.security.cipher import CIPHERS, Flow, FlowCiphers
+
+PEER = "192.0.2.1"
+FLOW = Flow(IPPROTO_TCP, 40000, 443)
+
+
+def _tcp_packet(payload: bytes) -> bytearray:
+    ip = bytearray(20)
+    ip[0] = 0x45
+    ip[2:4] = (40 + len(payload)).to_bytes(2, "big")
+    ip[8] = 64
+    ip[9] = IPPROTO_TCP
+    ip[12:16] = bytes((10, 0, 0, 1))
+    ip[16:20] = bytes((192, 0, 2, 1))
+    tcp = bytearray(20)
+    tcp[0:2] = FLOW.src_port.to_bytes(2, "big")
+    tcp[2:4] = FLOW.dst_port.to_bytes(2, "big")
+    tcp[12] = 5 << 4
+    return ip + tcp + payload
+
+
+def _sink(server: socket.socket):
+    connection, _ = server.accept()
+    with connection:
+        while connection.recv(1 << 20):
+            pass
+
+
+def _stream(sealer: FlowCiphers, key: bytes, payload: bytes, records: int):
+    """CPU seconds to seal ``records`` packets onto a record stream."""
+    server = socket.create_server(("127.0.0.1", 0))
+    sink = multiprocessing.get_context("fork").Process(
+        target=_sink, args=(server,)
+    )
+    sink.start()
+    uplink = RecordUplink(
+        server.getsockname()[1], mark=0, max_buffer=records * len(payload) * 2
+    )
+    packet = parse_packet(_tcp_packet(payload))
+    start = time.process_time()
+    for _ in range(records):
+        record = sealer.seal(PEER, key, FLOW, packet.payload)
+        uplink.send("127.0.0.1", record)
+    while uplink.pending:
+        uplink.flush()
+    cpu = time.process_time() - start
+    uplink.close()
+    sink.join()
+    server.close()
+    return cpu
+
+
+def _gbps(payload_bytes: int, cpu: float) -> float:
+    return round(payload_bytes * 8 / cpu / 1e9, 3)
+
+
+def run(cipher: str, size: int, records: int) -> dict:
+    key = os.urandom(32)
+    payload = os.urandom(size)
+    sealer = FlowCiphers(cipher, max_flows=1)
+    opener = FlowCiphers(cipher, max_flows=1, window=records)
+
+    start = time.process_time()
+    sealed = [sealer.seal(PEER, key, FLOW, payload) for _ in range(records)]
+    seal_cpu = time.process_time() - start
+
+    start = time.process_time()
+    opened = [opener.open(PEER, key, record) for record in sealed]
+    open_cpu = time.process_time() - start
+    if any(data != payload for data in opened):
+        raise AssertionError("Opened payload differs")
+
+    stream_cpu = _stream(sealer, key, payload, records)
+
+    total = size * records
+    return {
+        "seal": _gbps(total, seal_cpu),
+        "open": _gbps(total, open_cpu),
+        "stream": _gbps(total, stream_cpu),
+        "overhead": len(sealed[0]) - size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1400)
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument(
+        "--cipher", choices=sorted(CIPHERS), action="append", default=None
+    )
+    args = parser.parse_args()
+
+    for cipher in args.cipher or sorted(CIPHERS):
+        r = run(cipher, args.size, args.records)
+        print(
+            f"{cipher:>17}: seal {r['seal']:>6} Gbps, open {r['open']:>6} "
+            f"Gbps, seal + stream {r['stream']:>6} Gbps per core "
+            f"({args.size} B payloads, {r['overhead']} B overhead)"
+        )
+
+
+if __name__ == "__main__":
+    main()
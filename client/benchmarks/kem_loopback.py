@@ -0,0 +1,128 @@
+"""KEM handshakes between two agents over loopback, full and resumed.
+
+Starts a ``KEMListener`` on a free local port and runs client handshakes
+against it: the first from scratch, the rest resuming with the ticket from
+the previous one, then the same number with tickets discarded so every
+handshake pays for ML-KEM, first generating each client keypair inline and
+then taking it from a ``KeypairPool`` deep enough for the whole burst.
+Checks that both agents derived the same session key each time and reports
+latency and CPU time per handshake.
+
+    python -m benchmarks.kem_loopback --handshakes 200
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+
+from quantdog.client.common import settings
+from quantdog.client.network.handshakes import kem_handshake
+from quantdog.client.network.kem_listener import KEMListener
+from quantdog.client.security.cipher import session_id
+from quantdog.client.security.handshake import TicketStore
+from quantdog.client.security.keypool import KeypairPool
+
+HOST = "127.0.0.1"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_listening(port: int, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+
+
+async def _run(
+    listener: KEMListener,
+    handshakes: int,
+    resume: bool,
+    keypairs: KeypairPool,
+) -> dict:
+    tickets = TicketStore()
+    resumed = mismatched = 0
+    wall = cpu = 0.0
+    for _ in range(handshakes):
+        if not resume:
+            tickets = TicketStore()
+        had_ticket = len(tickets) > 0
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        key = await kem_handshake(HOST, listener.port, tickets, keypairs)
+        wall += time.perf_counter() - start_wall
+        cpu += time.process_time() - start_cpu
+        resumed += had_ticket
+        # The server records the key just after its last read; give its
+        # handler thread a moment before comparing
+        for _ in range(100):
+            if listener.sessions.get(session_id(key)) == key:
+                break
+            await asyncio.sleep(0.001)
+        else:
+            mismatched += 1
+        listener.sessions.invalidate(session_id(key))
+    return {
+        "handshakes": handshakes,
+        "resumed": resumed,
+        "mismatched_keys": mismatched,
+        "mean_ms": round(wall / handshakes * 1e3, 3),
+        # Both agents run in this process, so this is client + server CPU
+        "cpu_ms": round(cpu / handshakes * 1e3, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--handshakes", type=int, default=200)
+    parser.add_argument("--kemalg", default=settings.kemalg)
+    args = parser.parse_args()
+    settings.kemalg = args.kemalg
+
+    listener = KEMListener(host=HOST, kem_port=_free_port())
+    thread = threading.Thread(target=listener.start, daemon=True)
+    thread.start()
+    _wait_listening(listener.port)
+
+    # Never started, so every keypair is generated on the spot
+    inline = KeypairPool(settings.kemalg, depth=0)
+    pooled = KeypairPool(settings.kemalg, depth=args.handshakes)
+    failed = False
+    try:
+        for name, resume, keypairs in (
+            ("resumed", True, inline),
+            ("full", False, inline),
+            ("pooled", False, pooled),
+        ):
+            if keypairs is pooled:
+                pooled.start()
+                while len(pooled) < args.handshakes:
+                    time.sleep(0.01)
+            r = asyncio.run(_run(listener, args.handshakes, resume, keypairs))
+            failed |= r["mismatched_keys"] > 0
+            print(
+                f"{name:>8}: {r['mean_ms']:>7} ms, {r['cpu_ms']:>7} ms CPU "
+                f"per handshake ({r['resumed']}/{r['handshakes']} resumed, "
+                f"{r['mismatched_keys']} mismatched keys)"
+            )
+        print(f"keypair pool: {pooled.stats()}")
+    finally:
+        pooled.stop()
+        listener.stop()
+        thread.join()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
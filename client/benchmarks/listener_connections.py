@@ -0,0 +1,127 @@
+"""Many concurrent peers against the event-driven TCP listener.
+
+Starts an echo ``TCPListener`` on a free local port, opens ``--peers``
+client connections and keeps them all open, then has every peer send
+``--messages`` messages and read each echo back, driven from one selector
+on the client side too. Reports the connect time, echo round trips per
+second, and how many threads the listener needed for all of it. With
+``--max-connections`` below ``--peers``, the peers beyond the limit wait in
+the backlog and are never served, since no peer disconnects.
+
+    python -m benchmarks.listener_connections --peers 2000 --messages 20
+"""
+
+import argparse
+import os
+import selectors
+import socket
+import threading
+import time
+
+from quantdog.client.network.tcp_listener import TCPListener
+
+HOST = "127.0.0.1"
+MESSAGE = os.urandom(256)
+
+
+def _connect(port: int, peers: int) -> list[socket.socket]:
+    clients = []
+    for _ in range(peers):
+        sock = socket.socket()
+        sock.setblocking(False)
+        sock.connect_ex((HOST, port))
+        clients.append(sock)
+    # Wait for the handshakes (the kernel completes them from the backlog)
+    selector = selectors.DefaultSelector()
+    for sock in clients:
+        selector.register(sock, selectors.EVENT_WRITE)
+    pending = len(clients)
+    while pending:
+        for key, _ in selector.select(5):
+            selector.unregister(key.fileobj)
+            pending -= 1
+    selector.close()
+    return clients
+
+
+def _echo(clients: list[socket.socket], messages: int, timeout: float):
+    """Ping-pong on every connection at once; returns completed peers."""
+    selector = selectors.DefaultSelector()
+    left = {}
+    for sock in clients:
+        sock.send(MESSAGE)
+        left[sock] = [messages, len(MESSAGE)]
+        selector.register(sock, selectors.EVENT_READ)
+    done = 0
+    deadline = time.monotonic() + timeout
+    while len(left) > done and time.monotonic() < deadline:
+        for key, _ in selector.select(1):
+            sock = key.fileobj
+            state = left[sock]
+            state[1] -= len(sock.recv(65536))
+            if state[1] > 0:
+                continue
+            state[0] -= 1
+            if state[0] == 0:
+                selector.unregister(sock)
+                done += 1
+            else:
+                sock.send(MESSAGE)
+                state[1] = len(MESSAGE)
+    selector.close()
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--peers", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-connections", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    listener = TCPListener(
+        HOST,
+        0,
+        listener_type="Echo",
+        backlog=args.peers,
+        max_connections=args.max_connections or args.peers,
+        workers=args.workers,
+    )
+    # Echoing every message would drown the output in debug logs
+    listener.data_received = lambda connection, data: connection.send(data)
+    thread = threading.Thread(target=listener.start, daemon=True)
+    threads_before = threading.active_count()
+    thread.start()
+    while not listener.is_running:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    clients = _connect(listener.port, args.peers)
+    connect_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    done = _echo(clients, args.messages, args.timeout)
+    echo_s = time.perf_counter() - start
+    held = listener.stats()["connections"]
+    threads = threading.active_count() - threads_before
+
+    for sock in clients:
+        sock.close()
+    listener.stop()
+    thread.join()
+
+    print(
+        f"{args.peers} peers connected in {connect_s:.2f} s, "
+        f"{held} accepted by the listener"
+    )
+    print(
+        f"{done}/{args.peers} peers finished {args.messages} round trips: "
+        f"{done * args.messages / echo_s:,.0f} round trips/s"
+    )
+    print(f"listener threads: {threads} (selector + {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Packet throughput through a multi-queue TUN device with one worker per queue.
+
+Creates a throwaway TUN device routed at a test subnet and floods it with UDP
+from local sender processes, one flow per destination port. Each worker
+parses and rewrites every packet it reads (the client's per-packet fast
+path), checks that it sees each flow in order and that no flow reaches more
+than one worker, and sends it on through its raw socket like the client
+does. The packets are readdressed to a local sink socket, which counts what
+arrives, so writes are measured as well as reads. Needs root.
+
+    sudo python -m benchmarks.tun_throughput --queues 1,2,4 --flows 64
+"""
+
+import argparse
+import contextlib
+import functools
+import multiprocessing
+import os
+import socket
+import struct
+import time
+
+from pyroute2 import IPRoute
+
+from quantdog.client.network.batch import TunBatchIO
+from quantdog.client.network.headers import parse_packet
+from quantdog.client.network.interfaces import open_tun_queues
+from quantdog.client.network.workers import TunWorkerPool
+
+TUN_NAME = "qdbench"
+TUN_ADDRESS = "10.119.0.1"
+TARGET_ADDRESS = "10.119.0.2"
+BASE_PORT = 20000
+SINK_PORT = 11777
+# Payload: flow number and per-flow sequence number
+_SEQUENCE = struct.Struct("!II")
+
+
+def _worker(
+    results, batch: int, idle_seconds: float, tun_fd: int, tun_name: str
+):
+    tun_io = TunBatchIO(tun_fd, batch)
+    last_seq: dict[int, int] = {}
+    packets = reordered = 0
+    first = last = 0.0
+    try:
+        while tun_io.wait(idle_seconds):
+            for data in tun_io.read_batch():
+                packet = parse_packet(data)
+                if packet is None or packet.transport is None:
+                    continue
+                flow, seq = _SEQUENCE.unpack_from(packet.payload)
+                if seq <= last_seq.get(flow, -1):
+                    reordered += 1
+                last_seq[flow] = seq
+                packets += 1
+                packet.set_dst(TUN_ADDRESS)
+                packet.set_dst_port(SINK_PORT)
+                tun_io.queue(packet.data)
+            last = time.perf_counter()
+            if not first:
+                first = last
+            tun_io.flush()
+    except KeyboardInterrupt:
+        pass
+    tun_io.close()
+    results.put(
+        {
+            "packets": packets,
+            "reordered": reordered,
+            "flows": sorted(last_seq),
+            "first": first,
+            "last": last,
+            "wakeups": tun_io.wakeups,
+            "write_drops": tun_io.write_drops,
+        }
+    )
+
+
+def _sink(results, ready, idle_seconds: float):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 24)
+    sock.bind((TUN_ADDRESS, SINK_PORT))
+    sock.settimeout(idle_seconds)
+    ready.set()
+    packets = 0
+    first = last = 0.0
+    buffer = bytearray(2048)
+    with contextlib.suppress(TimeoutError, KeyboardInterrupt):
+        while True:
+            sock.recv_into(buffer)
+            last = time.perf_counter()
+            if not first:
+                first = last
+            packets += 1
+    sock.close()
+    results.put({"packets": packets, "first": first, "last": last})
+
+
+def _sender(flows: range, packets: int):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    payload = bytearray(_SEQUENCE.size + 32)
+    for seq in range(packets):
+        for flow in flows:
+            _SEQUENCE.pack_into(payload, 0, flow, seq)
+            # A full device queue shows up as lost packets, not an error
+            with contextlib.suppress(OSError):
+                sock.sendto(payload, (TARGET_ADDRESS, BASE_PORT + flow))
+    sock.close()
+
+
+def _run(
+    queues: int, batch: int, flows: int, packets: int, senders: int
+) -> dict:
+    tun_fds = open_tun_queues(TUN_NAME, queues)
+    ipr = IPRoute()
+    try:
+        device = ipr.link_lookup(ifname=TUN_NAME)[0]
+        ipr.addr("add", index=device, address=TUN_ADDRESS, prefixlen=24)
+        ipr.link("set", index=device, state="up", txqlen=10000)
+
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        sink_results = context.Queue()
+        sink_ready = context.Event()
+        sink = context.Process(
+            target=_sink, args=(sink_results, sink_ready, 2.0)
+        )
+        sink.start()
+        sink_ready.wait()
+        pool = TunWorkerPool(
+            tun_fds,
+            TUN_NAME,
+            target=functools.partial(_worker, results, batch, 1.0),
+        )
+        pool.start()
+
+        share = -(-flows // senders)
+        sender_processes = [
+            context.Process(
+                target=_sender,
+                args=(range(i, min(i + share, flows)), packets),
+            )
+            for i in range(0, flows, share)
+        ]
+        for process in sender_processes:
+            process.start()
+        for process in sender_processes:
+            process.join()
+
+        reports = [results.get() for _ in pool.workers]
+        pool.join()
+        sunk = sink_results.get()
+        sink.join()
+    finally:
+        for tun_fd in tun_fds:
+            os.close(tun_fd)
+        ipr.close()
+
+    received = sum(report["packets"] for report in reports)
+    active = [report for report in reports if report["packets"]]
+    elapsed = (
+        max(r["last"] for r in active) - min(r["first"] for r in active)
+        if active
+        else 0.0
+    )
+    written = (
+        sunk["last"] - min(r["first"] for r in active)
+        if sunk["packets"]
+        else 0.0
+    )
+    seen = [flow for report in reports for flow in report["flows"]]
+    return {
+        "queues": queues,
+        "batch": batch,
+        "sent": flows * packets,
+        "received": received,
+        "packets_per_second": round(received / elapsed) if elapsed else 0,
+        "forwarded": sunk["packets"],
+        "forwarded_per_second": (
+            round(sunk["packets"] / written) if written else 0
+        ),
+        "write_drops": sum(report["write_drops"] for report in reports),
+        "per_worker": [report["packets"] for report in reports],
+        "reordered": sum(report["reordered"] for report in reports),
+        "split_flows": len(seen) - len(set(seen)),
+        "packets_per_wakeup": round(
+            received / max(1, sum(report["wakeups"] for report in reports)), 1
+        ),
+    }
+
+
+def _report(r: dict):
+    print(
+        f"{r['queues']:>3} queues, batch {r['batch']:>3}: "
+        f"{r['packets_per_second']:>8} packets/s read, "
+        f"{r['forwarded_per_second']:>8} packets/s forwarded "
+        f"({r['packets_per_wakeup']} per wakeup, "
+        f"{r['received']}/{r['sent']} received, "
+        f"{r['forwarded']} forwarded, {r['write_drops']} write drops, "
+        "per worker "
+        f"{r['per_worker']}, {r['reordered']} reordered, "
+        f"{r['split_flows']} flows split across workers)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queues", default="1,2,4", help="comma separated")
+    parser.add_argument(
+        "--batch", default="1,64", help="packets per wakeup, comma separated"
+    )
+    parser.add_argument("--flows", type=int, default=64)
+    parser.add_argument("--packets", type=int, default=2000, help="per flow")
+    parser.add_argument("--senders", type=int, default=2)
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        parser.error("creating a TUN device needs root")
+
+    for queues in map(int, args.queues.split(",")):
+        for batch in map(int, args.batch.split(",")):
+            r = _run(queues, batch, args.flows, args.packets, args.senders)
+            _report(r)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,7 @@ import psutil
 import structlog
 
 from quantdog.client.common import check_sudo, logger
-from quantdog.client.network import (
-    create_tun_interface,
-    packet_listener,
-)
+from quantdog.client.network import TunWorkerPool, create_tun_interface
 from quantdog.client.network.kem_listener import KEMListener
 from quantdog.client.network.pqc_listener_tcp import PQCListenerTCP
 
@@ -15,8 +12,8 @@ from quantdog.client.network.pqc_listener_tcp import PQCListenerTCP
 def main():
     check_sudo()
     tun_name: str = "tunqd"
-    with create_tun_interface(tun_name) as tun_fd:
-        logger.info("Created interface '%s'.", tun_name, tun_fd=tun_fd)
+    with create_tun_interface(tun_name) as tun_fds:
+        logger.info("Created interface '%s'.", tun_name, tun_fds=tun_fds)
         for interface_name, details in psutil.net_if_addrs().items():
             stats = psutil.net_if_stats().get(interface_name, None)
             logger.debug(
@@ -26,8 +23,13 @@ def main():
                 stats=stats,
             )
 
-        pqc_listener_tcp = PQCListenerTCP()
+        # Fork the queue workers before any listener thread exists
+        tun_workers = TunWorkerPool(tun_fds, tun_name)
+        tun_workers.start()
+
         kem_listener = KEMListener()
+        # Decrypts with the session keys the KEM listener negotiates
+        pqc_listener_tcp = PQCListenerTCP(sessions=kem_listener.sessions)
 
         listener_threads: list[threading.Thread] = []
 
@@ -37,7 +39,7 @@ def main():
         for thread in listener_threads:
             thread.start()
 
-        packet_listener(tun_fd, tun_name)
+        tun_workers.run()
 
         structlog.contextvars.clear_contextvars()
         logger.info("Stopping listeners...")
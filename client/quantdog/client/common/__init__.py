@@ -16,9 +16,54 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent.parent.parent
 
 class Settings(BaseSettings):
     packet_length: int = 1500
+    # Packets read per wakeup before processed ones are flushed
+    packet_batch: int = 64
     pqc_port: int = 11777
     kem_port: int = 11778
     kemalg: str = "ML-KEM-512"
+    # Packets held per destination while its KEM handshake runs
+    kem_parked_packets: int = 64
+    kem_timeout: float = 5.0
+    # Keypairs generated ahead of time for client handshakes
+    kem_keypair_pool: int = 32
+    # How long a server honours a session ticket for resumption
+    kem_ticket_lifetime: float = 86400.0
+    # Session keys are renegotiated after session_key_ttl seconds;
+    # destinations without a server are retried after no_server_ttl
+    # seconds, doubling per failure up to no_server_max_ttl
+    session_cache_size: int = 1024
+    session_key_ttl: float = 3600.0
+    no_server_ttl: float = 30.0
+    no_server_max_ttl: float = 3600.0
+    # AEAD for payloads: aes-256-gcm or chacha20-poly1305
+    data_cipher: str = "aes-256-gcm"
+    # Records a receiver accepts out of order, per flow
+    replay_window: int = 1024
+    # Sealed records waiting for a peer's record stream, in bytes
+    record_buffer: int = 4194304
+    # Flows per session; a client renegotiates when it needs more
+    session_max_flows: int = 4096
+    # Flows tracked per worker; idle flows are dropped after a timeout that
+    # depends on their state (seconds)
+    flow_table_size: int = 65536
+    flow_syn_timeout: float = 30.0
+    flow_idle_timeout: float = 300.0
+    flow_closing_timeout: float = 10.0
+    # TCP listeners: accept queue length, connections served at once,
+    # handler threads and socket receive buffer size in bytes
+    listener_backlog: int = 1024
+    listener_max_connections: int = 4096
+    listener_workers: int = 8
+    listener_recv_buffer: int = 262144
+    # TUN queues, each served by its own worker process
+    tun_queues: int = 1
+    # Processed packets leave through a raw socket with this fwmark, which
+    # policy routing sends out of the uplink; everything else takes the
+    # TUN default route in routing table tun_route_table
+    uplink_mark: int = 0x5144
+    tun_route_table: int = 11777
+    # Dissect packets with scapy for logging (slow)
+    debug: bool = False
 
 
 @cache
@@ -1,4 +1,14 @@
-from quantdog.client.network.interfaces import create_tun_interface
+from quantdog.client.network.interfaces import (
+    create_tun_interface,
+    open_tun_queues,
+)
 from quantdog.client.network.packets import packet_listener, process_packet
+from quantdog.client.network.workers import TunWorkerPool
 
-__all__ = ["create_tun_interface", "packet_listener", "process_packet"]
+__all__ = [
+    "TunWorkerPool",
+    "create_tun_interface",
+    "open_tun_queues",
+    "packet_listener",
+    "process_packet",
+]
@@ -0,0 +1,201 @@
+"""Per-connection state for the packet path, keyed by 5-tuple.
+
+The table follows each TCP connection through its lifecycle as seen from
+its outgoing segments: a SYN opens it, the first segment after that (or
+any segment of a connection we did not see open) makes it established, a
+FIN starts closing it and an RST ends it at once. UDP flows are simply
+established.
+
+Each lifecycle state has its own idle timeout, and keeps its flows in an
+``OrderedDict`` ordered by last activity. Since every flow in one of them
+has the same timeout, the oldest are the first to expire, and ``sweep``
+pops from the front until it meets a live flow: O(expired), not O(flows).
+Past ``capacity``, half-open flows are evicted first, so a SYN flood
+cannot push out established connections.
+
+Entries also cache what the packet path decided for the flow (the session
+key and its sealer), so a packet of a known flow skips those lookups, and
+how far its payload has been sent on.
+"""
+
+import time
+from collections import OrderedDict
+
+from quantdog.client.network.headers import (
+    IPPROTO_TCP,
+    TCP_ACK,
+    TCP_FIN,
+    TCP_RST,
+    TCP_SYN,
+    IPv4Packet,
+)
+
+NEW = 0
+ESTABLISHED = 1
+CLOSING = 2
+STATE_NAMES = ("new", "established", "closing")
+
+# Which states give up flows first when the table is full
+_EVICTION_ORDER = (NEW, CLOSING, ESTABLISHED)
+
+
+class FlowEntry:
+    """One tracked flow, with its counters and cached decisions."""
+
+    __slots__ = (
+        "key",
+        "state",
+        "packets",
+        "bytes",
+        "created",
+        "last_seen",
+        # Cached session key lookup: key, NO_SERVER or None, until when it
+        # holds and the session cache generation it came from
+        "secret",
+        "valid_until",
+        "generation",
+        "sealer",
+        # TCP sequence number after the last payload byte sent on, None
+        # until the first
+        "next_seq",
+    )
+
+    def __init__(self, key: int, state: int, now: float):
+        self.key = key
+        self.state = state
+        self.packets = 0
+        self.bytes = 0
+        self.created = now
+        self.last_seen = now
+        self.secret: bytes | None = None
+        self.valid_until = 0.0
+        self.generation = -1
+        self.sealer = None
+        self.next_seq: int | None = None
+
+
+class FlowTable:
+    """Flows by 5-tuple, with lifecycle tracking and idle expiry."""
+
+    def __init__(
+        self,
+        capacity: int = 65536,
+        syn_timeout: float = 30.0,
+        idle_timeout: float = 300.0,
+        closing_timeout: float = 10.0,
+        clock=time.monotonic,
+    ):
+        self.capacity = capacity
+        self.timeouts = (syn_timeout, idle_timeout, closing_timeout)
+        self.clock = clock
+        self._flows: dict[int, FlowEntry] = {}
+        # Per state, oldest activity first
+        self._queues: tuple[OrderedDict[int, FlowEntry], ...] = (
+            OrderedDict(),
+            OrderedDict(),
+            OrderedDict(),
+        )
+        self.created = 0
+        self.closed = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._flows)
+
+    def get(self, key: int) -> FlowEntry | None:
+        return self._flows.get(key)
+
+    def track(self, packet: IPv4Packet, now: float | None = None):
+        """Account ``packet`` to its flow and return the flow.
+
+        Returns None if the packet has no 5-tuple. A flow ended by an RST
+        is returned once more, already removed from the table.
+        """
+        key = packet.flow_key
+        if key is None:
+            return None
+        if now is None:
+            now = self.clock()
+        flags = packet.tcp_flags
+        entry = self._flows.get(key)
+
+        if entry is None:
+            if (
+                packet.protocol == IPPROTO_TCP
+                and flags & (TCP_SYN | TCP_ACK) == TCP_SYN
+            ):
+                state = NEW
+            else:
+                # Mid-stream (e.g. opened before we started) or UDP
+                state = ESTABLISHED
+            entry = FlowEntry(key, state, now)
+            self._flows[key] = entry
+            self._queues[state][key] = entry
+            self.created += 1
+            if len(self._flows) > self.capacity:
+                self._evict(key)
+        else:
+            if flags & TCP_FIN:
+                state = CLOSING
+            elif entry.state == NEW and not flags & TCP_SYN:
+                state = ESTABLISHED
+            else:
+                state = entry.state
+            if state != entry.state:
+                del self._queues[entry.state][key]
+                self._queues[state][key] = entry
+                entry.state = state
+            else:
+                self._queues[state].move_to_end(key)
+
+        entry.packets += 1
+        entry.bytes += len(packet)
+        entry.last_seen = now
+        if flags & TCP_RST:
+            self._remove(entry)
+            self.closed += 1
+        return entry
+
+    def _remove(self, entry: FlowEntry):
+        del self._flows[entry.key]
+        del self._queues[entry.state][entry.key]
+
+    def _evict(self, added: int):
+        for state in _EVICTION_ORDER:
+            queue = self._queues[state]
+            # Never the flow that was just added
+            if queue and next(iter(queue)) != added:
+                key, _ = queue.popitem(last=False)
+                del self._flows[key]
+                self.evicted += 1
+                return
+
+    def sweep(self, now: float | None = None) -> int:
+        """Drop the flows idle for longer than their state's timeout."""
+        if now is None:
+            now = self.clock()
+        expired = 0
+        for queue, timeout in zip(self._queues, self.timeouts, strict=True):
+            deadline = now - timeout
+            while queue:
+                key, entry = next(iter(queue.items()))
+                if entry.last_seen > deadline:
+                    break
+                del queue[key]
+                del self._flows[key]
+                expired += 1
+        self.expired += expired
+        return expired
+
+    def stats(self) -> dict[str, int]:
+        return {
+            **{
+                name: len(queue)
+                for name, queue in zip(STATE_NAMES, self._queues, strict=True)
+            },
+            "created": self.created,
+            "closed": self.closed,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,261 @@
+"""KEM handshakes run off the packet thread.
+
+``HandshakeManager`` runs handshakes on an asyncio loop in a background
+thread, so an unreachable destination costs the packet loop nothing while
+its connect times out. Packets for a destination whose handshake is in
+flight are parked (copied) in a bounded per-destination queue, and every
+packet that arrives meanwhile joins the same handshake instead of starting
+another. When it finishes, a wakeup fd lets the packet thread's selector
+notice, and ``completed`` puts the result into the session key cache on the
+packet thread, right before handing back the parked packets. Until then the
+destination's packets keep being parked behind them, so a newer packet of a
+flow can never be sealed ahead of an older one. The manager also runs the
+pool of pregenerated keypairs that full handshakes take theirs from.
+"""
+
+import asyncio
+import contextlib
+import os
+import socket
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable
+from functools import cache
+
+from quantdog.client.common import logger, settings
+from quantdog.client.network.sessions import SessionKeyCache
+from quantdog.client.security.handshake import (
+    ClientHandshake,
+    HandshakeError,
+    TicketStore,
+)
+from quantdog.client.security.keypool import KeypairPool
+
+
+@cache
+def get_ticket_store() -> TicketStore:
+    """Session tickets from the servers we negotiated with, by address."""
+    return TicketStore(
+        capacity=settings.session_cache_size,
+        lifetime=settings.kem_ticket_lifetime,
+    )
+
+
+@cache
+def get_keypair_pool() -> KeypairPool:
+    """Keypairs generated ahead of the handshakes that need them."""
+    return KeypairPool(settings.kemalg, depth=settings.kem_keypair_pool)
+
+
+async def _open_uplink(
+    peer: str, port: int
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connect to ``peer`` with the uplink mark, so it bypasses the TUN."""
+    loop = asyncio.get_running_loop()
+    family, kind, proto, _, address = (
+        await loop.getaddrinfo(peer, port, type=socket.SOCK_STREAM)
+    )[0]
+    sock = socket.socket(family, kind, proto)
+    try:
+        if settings.uplink_mark:
+            sock.setsockopt(
+                socket.SOL_SOCKET, socket.SO_MARK, settings.uplink_mark
+            )
+        sock.setblocking(False)
+        await loop.sock_connect(sock, address)
+    except BaseException:
+        sock.close()
+        raise
+    return await asyncio.open_connection(sock=sock)
+
+
+async def kem_handshake(
+    peer: str,
+    port: int | None = None,
+    tickets: TicketStore | None = None,
+    keypairs: KeypairPool | None = None,
+) -> bytes:
+    """Negotiate a session key with the QuantDog server on ``peer``.
+
+    Resumes with the ticket from the previous handshake if there is one.
+    """
+    if tickets is None:
+        tickets = get_ticket_store()
+    if keypairs is None:
+        keypairs = get_keypair_pool()
+    # Unmarked, the SYN would follow the default route back into the TUN
+    reader, writer = await _open_uplink(peer, port or settings.kem_port)
+    try:
+        handshake = ClientHandshake(
+            settings.kemalg, ticket=tickets.pop(peer), keypairs=keypairs
+        )
+        writer.write(handshake.initiate())
+        while not handshake.complete:
+            data = await reader.read(4096)
+            if not data:
+                raise HandshakeError("Connection closed during handshake")
+            writer.write(handshake.receive_data(data))
+        await writer.drain()
+    finally:
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+    tickets.put(peer, handshake.new_ticket, handshake.lifetime)
+    logger.debug(
+        "KEM handshake with %s complete.", peer, resumed=handshake.resumed
+    )
+    return handshake.session_key
+
+
+class HandshakeManager:
+    """Single-flight, non-blocking handshakes with packet parking."""
+
+    def __init__(
+        self,
+        cache: SessionKeyCache,
+        handshake: Callable[[str], Awaitable[bytes]] = kem_handshake,
+        max_parked: int = 64,
+        timeout: float = 5.0,
+        keypairs: KeypairPool | None = None,
+    ):
+        self.cache = cache
+        self.keypairs = keypairs
+        self.handshake = handshake
+        self.max_parked = max_parked
+        self.timeout = timeout
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        # peer -> packets waiting for its handshake
+        self._pending: dict[str, list[bytearray]] = {}
+        self._lock = threading.Lock()
+        # (peer, session key or None if the handshake failed)
+        self._completed: deque[tuple[str, bytes | None]] = deque()
+        self._wakeup_r = self._wakeup_w = -1
+        self.started = 0
+        self.merged = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def wakeup_fd(self) -> int:
+        """Readable whenever ``completed`` has something to return."""
+        return self._wakeup_r
+
+    def start(self):
+        """Start the handshake thread (in the process that will use it)."""
+        if self._thread is not None:
+            return
+        if self.keypairs is not None:
+            self.keypairs.start()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="kem-handshakes", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        # Abandon the handshakes still running; their packets are dropped
+        tasks = asyncio.all_tasks(self._loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self._loop.run_until_complete(asyncio.wait(tasks, timeout=1))
+        self._loop.close()
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        self._thread = self._loop = None
+        if self.keypairs is not None:
+            self.keypairs.stop()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def park(self, peer: str, packet: memoryview) -> bool:
+        """Hold ``packet`` until ``peer``'s handshake finishes.
+
+        Starts the handshake unless one is already running. Returns False
+        if the peer's queue is full and the packet was dropped.
+        """
+        with self._lock:
+            parked = self._pending.get(peer)
+            if parked is None:
+                parked = self._pending[peer] = []
+                self.started += 1
+                start = True
+            else:
+                self.merged += 1
+                start = False
+            if len(parked) >= self.max_parked:
+                self.dropped += 1
+                return False
+            parked.append(bytearray(packet))
+
+        if start:
+            asyncio.run_coroutine_threadsafe(self._run(peer), self._loop)
+        return True
+
+    async def _run(self, peer: str):
+        secret = None
+        try:
+            secret = await asyncio.wait_for(self.handshake(peer), self.timeout)
+        except (OSError, HandshakeError) as e:
+            # Timed out, refused, unreachable or not a QuantDog server
+            logger.debug("KEM port not found on %s.", peer, error=e)
+        except Exception as e:
+            logger.exception("KEM handshake with %s failed: %s", peer, e)
+
+        # The peer stays pending, parking its packets, until ``completed``
+        self._completed.append((peer, secret))
+        with contextlib.suppress(BlockingIOError):
+            os.write(self._wakeup_w, b"\x00")
+
+    def completed(self) -> list[tuple[str, bool, list[bytearray]]]:
+        """Take the finished handshakes: (peer, succeeded, parked packets).
+
+        Call this on the packet thread and replay the parked packets before
+        processing any newer ones: the session keys are only published to
+        the cache here.
+        """
+        with contextlib.suppress(BlockingIOError):
+            while os.read(self._wakeup_r, 4096):
+                pass
+        done = []
+        while self._completed:
+            peer, secret = self._completed.popleft()
+            if secret is None:
+                backoff = self.cache.put_negative(peer)
+                logger.debug("Retrying %s later.", peer, retry_in=backoff)
+            else:
+                self.cache.put(peer, secret)
+            with self._lock:
+                parked = self._pending.pop(peer)
+                if secret is None:
+                    self.failed += 1
+                else:
+                    self.succeeded += 1
+            done.append((peer, secret is not None, parked))
+        return done
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "pending": len(self._pending),
+                "started": self.started,
+                "merged": self.merged,
+                "succeeded": self.succeeded,
+                "failed": self.failed,
+                "dropped": self.dropped,
+            }
+        if self.keypairs is not None:
+            stats["keypairs"] = self.keypairs.stats()
+        return stats
@@ -0,0 +1,285 @@
+"""Zero-copy IPv4/TCP/UDP header access for the packet hot path.
+
+``parse_packet`` reads the headers straight out of the buffer a packet was
+read into, and ``IPv4Packet`` rewrites addresses and ports in that buffer.
+Checksums are patched incrementally (RFC 1624, eqn. 3) instead of being
+recomputed over the whole packet, so a rewrite costs the same no matter how
+large the payload is. Because the update only depends on the words that
+changed, it stays correct for the first fragment of a fragmented datagram,
+whose transport checksum covers data we never see.
+
+Replacing the payload changes the lengths, so ``with_payload`` copies the
+headers into a new buffer and computes the checksums in full.
+"""
+
+import socket
+import struct
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
+
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+_U64 = struct.Struct("!Q")
+
+# Offsets into the IPv4 header
+_TOTAL_LENGTH = 2
+_FRAGMENT = 6
+_PROTOCOL = 9
+_CHECKSUM = 10
+_SRC = 12
+_DST = 16
+
+
+def checksum_adjust(checksum: int, old: int, new: int) -> int:
+    """Patch a one's complement checksum after a field changed.
+
+    ``old`` and ``new`` are the 16- or 32-bit values of the field (a 32-bit
+    field counts as two 16-bit words).
+    """
+    total = (
+        (~checksum & 0xFFFF)
+        + (~old >> 16 & 0xFFFF)
+        + (~old & 0xFFFF)
+        + (new >> 16)
+        + (new & 0xFFFF)
+    )
+    total = (total & 0xFFFF) + (total >> 16)
+    total = (total & 0xFFFF) + (total >> 16)
+    # The old high word of a 16-bit field is 0, whose complement 0xFFFF is
+    # the other zero and cancels out in the folded sum
+    return ~total & 0xFFFF
+
+
+def internet_checksum(data) -> int:
+    """One's complement checksum of ``data`` (RFC 1071).
+
+    Summing 16-bit words with end-around carry is the same as reducing the
+    whole buffer, read as one big integer, modulo 0xFFFF, so the sum is
+    done in C by ``int.from_bytes``.
+    """
+    if len(data) % 2:
+        data = bytes(data) + b"\x00"
+    value = int.from_bytes(data, "big")
+    total = value % 0xFFFF
+    if total == 0 and value:
+        # A non-zero sum of 0xFFFF, not 0
+        total = 0xFFFF
+    return ~total & 0xFFFF
+
+
+class IPv4Packet:
+    """Header view over one IPv4 packet held in a writable buffer."""
+
+    __slots__ = (
+        "data",
+        "header_length",
+        "protocol",
+        "transport",
+        "checksum_offset",
+        "payload_offset",
+    )
+
+    def __init__(
+        self,
+        data: memoryview,
+        header_length: int,
+        protocol: int,
+        transport: int | None,
+        checksum_offset: int | None,
+        payload_offset: int,
+    ):
+        self.data = data
+        self.header_length = header_length
+        self.protocol = protocol
+        # Offset of the TCP/UDP header, None for non-first fragments and
+        # other protocols
+        self.transport = transport
+        self.checksum_offset = checksum_offset
+        self.payload_offset = payload_offset
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @property
+    def src(self) -> str:
+        return socket.inet_ntoa(self.data[_SRC:_DST])
+
+    @property
+    def dst(self) -> str:
+        return socket.inet_ntoa(self.data[_DST : _DST + 4])
+
+    @property
+    def src_port(self) -> int | None:
+        if self.transport is None:
+            return None
+        return _U16.unpack_from(self.data, self.transport)[0]
+
+    @property
+    def dst_port(self) -> int | None:
+        if self.transport is None:
+            return None
+        return _U16.unpack_from(self.data, self.transport + 2)[0]
+
+    @property
+    def payload(self) -> memoryview:
+        return self.data[self.payload_offset :]
+
+    @property
+    def flow_key(self) -> int | None:
+        """Protocol, addresses and ports packed into one int: the 5-tuple."""
+        transport = self.transport
+        if transport is None:
+            return None
+        return (
+            self.protocol << 96
+            | _U64.unpack_from(self.data, _SRC)[0] << 32
+            | _U32.unpack_from(self.data, transport)[0]
+        )
+
+    @property
+    def tcp_seq(self) -> int:
+        """TCP sequence number, 0 if this is not a TCP segment."""
+        if self.transport is None or self.protocol != IPPROTO_TCP:
+            return 0
+        return _U32.unpack_from(self.data, self.transport + 4)[0]
+
+    @property
+    def tcp_flags(self) -> int:
+        """TCP flags (``TCP_SYN`` etc.), 0 if this is not a TCP segment."""
+        if self.transport is None or self.protocol != IPPROTO_TCP:
+            return 0
+        return self.data[self.transport + 13]
+
+    def _adjust_transport(self, old: int, new: int) -> None:
+        offset = self.checksum_offset
+        if offset is None:
+            return
+        checksum = _U16.unpack_from(self.data, offset)[0]
+        if self.protocol == IPPROTO_UDP:
+            if checksum == 0:
+                # The sender did not compute one
+                return
+            checksum = checksum_adjust(checksum, old, new) or 0xFFFF
+        else:
+            checksum = checksum_adjust(checksum, old, new)
+        _U16.pack_into(self.data, offset, checksum)
+
+    def _set_address(self, offset: int, address: str) -> None:
+        data = self.data
+        old = _U32.unpack_from(data, offset)[0]
+        data[offset : offset + 4] = socket.inet_aton(address)
+        new = _U32.unpack_from(data, offset)[0]
+        checksum = _U16.unpack_from(data, _CHECKSUM)[0]
+        _U16.pack_into(data, _CHECKSUM, checksum_adjust(checksum, old, new))
+        # Addresses are part of the TCP/UDP pseudo-header
+        self._adjust_transport(old, new)
+
+    def _set_port(self, offset: int, port: int) -> None:
+        if self.transport is None:
+            raise ValueError("Packet has no transport header")
+        offset += self.transport
+        old = _U16.unpack_from(self.data, offset)[0]
+        _U16.pack_into(self.data, offset, port)
+        self._adjust_transport(old, port)
+
+    def set_src(self, address: str) -> None:
+        self._set_address(_SRC, address)
+
+    def set_dst(self, address: str) -> None:
+        self._set_address(_DST, address)
+
+    def set_src_port(self, port: int) -> None:
+        self._set_port(0, port)
+
+    def set_dst_port(self, port: int) -> None:
+        self._set_port(2, port)
+
+    def with_payload(self, payload) -> "IPv4Packet":
+        """A copy of this packet carrying ``payload`` instead.
+
+        The IP total length, UDP length and both checksums are recomputed.
+        """
+        if self.transport is None:
+            raise ValueError("Packet has no transport header")
+        if _U16.unpack_from(self.data, _FRAGMENT)[0] & 0x3FFF:
+            raise ValueError("Cannot replace the payload of a fragment")
+        header_length, transport = self.header_length, self.transport
+        data = bytearray(self.data[: self.payload_offset])
+        data += payload
+        total_length = len(data)
+        if total_length > 0xFFFF:
+            raise ValueError("Packet too large")
+
+        _U16.pack_into(data, _TOTAL_LENGTH, total_length)
+        _U16.pack_into(data, _CHECKSUM, 0)
+        _U16.pack_into(data, _CHECKSUM, internet_checksum(data[:header_length]))
+
+        segment_length = total_length - header_length
+        if self.protocol == IPPROTO_UDP:
+            _U16.pack_into(data, transport + 4, segment_length)
+        _U16.pack_into(data, self.checksum_offset, 0)
+        pseudo_header = (
+            data[_SRC : _DST + 4]
+            + bytes((0, self.protocol))
+            + _U16.pack(segment_length)
+        )
+        checksum = internet_checksum(pseudo_header + data[transport:])
+        if self.protocol == IPPROTO_UDP and checksum == 0:
+            checksum = 0xFFFF
+        _U16.pack_into(data, self.checksum_offset, checksum)
+
+        return IPv4Packet(
+            memoryview(data),
+            header_length,
+            self.protocol,
+            transport,
+            self.checksum_offset,
+            self.payload_offset,
+        )
+
+
+def parse_packet(buffer) -> IPv4Packet | None:
+    """Parse the headers of the IPv4 packet at the start of ``buffer``.
+
+    Returns None for anything that is not a well-formed IPv4 packet. The
+    view shares ``buffer``, so it is only valid until the buffer is reused.
+    """
+    data = memoryview(buffer)
+    if len(data) < 20 or data[0] >> 4 != 4:
+        return None
+    header_length = (data[0] & 0x0F) * 4
+    total_length = _U16.unpack_from(data, _TOTAL_LENGTH)[0]
+    if header_length < 20 or not header_length <= total_length <= len(data):
+        return None
+    data = data[:total_length]
+
+    protocol = data[_PROTOCOL]
+    transport = checksum_offset = None
+    payload_offset = header_length
+    if _U16.unpack_from(data, _FRAGMENT)[0] & 0x1FFF == 0:
+        if protocol == IPPROTO_TCP and total_length >= header_length + 20:
+            payload_offset += (data[header_length + 12] >> 4) * 4
+            if header_length + 20 <= payload_offset <= total_length:
+                transport = header_length
+                checksum_offset = header_length + 16
+            else:
+                payload_offset = header_length
+        elif protocol == IPPROTO_UDP and total_length >= header_length + 8:
+            transport = header_length
+            checksum_offset = header_length + 6
+            payload_offset = header_length + 8
+
+    return IPv4Packet(
+        data,
+        header_length,
+        protocol,
+        transport,
+        checksum_offset,
+        payload_offset,
+    )
@@ -5,22 +5,49 @@ from contextlib import contextmanager
 
 from pyroute2 import IPRoute
 
-from quantdog.client.common import logger
+from quantdog.client.common import logger, settings
 
 # TUN/TAP constants
 TUNSETIFF = 0x400454CA
 IFF_TUN = 0x0001
 IFF_NO_PI = 0x1000
+IFF_MULTI_QUEUE = 0x0100
+# Kernel limit on the queues of one TUN device
+MAX_TUN_QUEUES = 256
+
+
+def open_tun_queues(name: str, queues: int = 1) -> list[int]:
+    """Open ``queues`` file descriptors attached to the TUN device ``name``.
+
+    With more than one queue the device is created with IFF_MULTI_QUEUE and
+    the kernel spreads packets over the queues by flow hash.
+    """
+    if not 1 <= queues <= MAX_TUN_QUEUES:
+        raise ValueError(f"TUN queues must be between 1 and {MAX_TUN_QUEUES}")
+    flags = IFF_TUN | IFF_NO_PI
+    if queues > 1:
+        flags |= IFF_MULTI_QUEUE
+    ifr = struct.pack("16sH", name.encode("utf-8"), flags)
+
+    tun_fds: list[int] = []
+    try:
+        for _ in range(queues):
+            tun_fd = os.open("/dev/net/tun", os.O_RDWR)
+            tun_fds.append(tun_fd)
+            fcntl.ioctl(tun_fd, TUNSETIFF, ifr)
+    except OSError:
+        for tun_fd in tun_fds:
+            os.close(tun_fd)
+        raise
+    return tun_fds
 
 
 @contextmanager
-def create_tun_interface(name: str = "tun0"):
+def create_tun_interface(name: str = "tun0", queues: int = settings.tun_queues):
     ipr = IPRoute()
-    tun_fd = os.open("/dev/net/tun", os.O_RDWR)
-    ifr = struct.pack("16sH", name.encode("utf-8"), IFF_TUN | IFF_NO_PI)
-    fcntl.ioctl(tun_fd, TUNSETIFF, ifr)
+    tun_fds = open_tun_queues(name, queues)
 
-    logger.debug("/dev/net/%s created.", name)
+    logger.debug("/dev/net/%s created.", name, queues=queues)
 
     device = ipr.link_lookup(ifname=name)[0]
     ipr.addr(
@@ -35,10 +62,29 @@ def create_tun_interface(name: str = "tun0"):
     logger.debug("%s up", name)
     os.system(f"ip route add 10.118.0.0/24 dev {name}")
     logger.debug("Route added")
-    os.system(f"ip route add default via 10.117.0.1 dev {name}")
-    logger.debug("Default gateway added")
-
-    yield tun_fd
+    # The TUN default route goes in its own table, used by every packet
+    # except the ones the workers send on with the uplink mark; routes in
+    # the main table more specific than a default route still win
+    mark, table = settings.uplink_mark, settings.tun_route_table
+    policy = [
+        f"not fwmark {mark} table {table}",
+        "table main suppress_prefixlength 0",
+    ]
+    os.system(f"ip route add default via 10.117.0.1 dev {name} table {table}")
+    for rule in policy:
+        os.system(f"ip rule add {rule}")
+    logger.debug("Default gateway added", table=table, mark=mark)
+    # Sent on unchanged, the packets still carry the TUN address as source
+    masquerade = f"POSTROUTING -m mark --mark {mark} -j MASQUERADE"
+    os.system(f"iptables -t nat -A {masquerade}")
+    logger.debug("Uplink masquerading enabled")
 
-    os.close(tun_fd)
-    ipr.close()
+    try:
+        yield tun_fds
+    finally:
+        os.system(f"iptables -t nat -D {masquerade}")
+        for rule in policy:
+            os.system(f"ip rule del {rule}")
+        for tun_fd in tun_fds:
+            os.close(tun_fd)
+        ipr.close()
@@ -1,36 +1,59 @@
 import logging
-import socket
 
 from quantdog.client.common import logger, settings
-from quantdog.client.network.tcp_listener import TCPListener
+from quantdog.client.network.sessions import SessionKeyCache
+from quantdog.client.network.tcp_listener import Connection, TCPListener
+from quantdog.client.security.cipher import session_id
+from quantdog.client.security.handshake import ServerHandshake, TicketStore
 
 
 class KEMListener(TCPListener):
     """Listener for handling KEM exchanges"""
 
     def __init__(
-        self, host: str = "0.0.0.0", kem_port: int = settings.kem_port
+        self,
+        host: str = "0.0.0.0",
+        kem_port: int = settings.kem_port,
+        sessions: SessionKeyCache | None = None,
+        tickets: TicketStore | None = None,
     ):
-        super().__init__(host, kem_port, listener_type="KEM")
+        super().__init__(
+            host,
+            kem_port,
+            listener_type="KEM",
+            idle_timeout=settings.kem_timeout,
+        )
+        # Session keys by session id, for decrypting the clients' traffic
+        if sessions is None:
+            sessions = SessionKeyCache(
+                capacity=settings.session_cache_size,
+                ttl=settings.session_key_ttl,
+            )
+        if tickets is None:
+            tickets = TicketStore(
+                capacity=settings.session_cache_size,
+                lifetime=settings.kem_ticket_lifetime,
+            )
+        self.sessions = sessions
+        self.tickets = tickets
 
-    def handler(self, client_socket: socket.socket, client_address: tuple):
+    def connection_made(self, connection: Connection):
+        connection.state = ServerHandshake({settings.kemalg}, self.tickets)
+
+    def data_received(self, connection: Connection, data: bytes):
         """Handler for KEM procedure"""
-        try:
-            while True:
-                data = client_socket.recv(1024)
-                if not data:
-                    break
-
-                logger.debug("Data received: %s", data.hex())
-
-                # Echo the data back
-                client_socket.send(data)
-
-        except Exception as e:
-            logger.error(f"Error handling client {client_address}: {e}")
-        finally:
-            client_socket.close()
-            logger.info(f"Connection with {client_address} closed")
+        handshake = connection.state
+        connection.send(handshake.receive_data(data))
+        if handshake.complete:
+            self.sessions.put(
+                session_id(handshake.session_key), handshake.session_key
+            )
+            logger.debug(
+                "KEM handshake with %s complete.",
+                connection.address[0],
+                resumed=handshake.resumed,
+            )
+            connection.close()
 
 
 # Example usage
@@ -1,146 +1,304 @@
-import os
-import socket
 import uuid
 from functools import cache
 
 import structlog
-from scapy.layers.inet import IP, TCP, UDP
-from scapy.packet import Packet
 
 from quantdog.client.common import logger, settings
+from quantdog.client.network.batch import TunBatchIO
+from quantdog.client.network.flows import STATE_NAMES, FlowEntry, FlowTable
+from quantdog.client.network.handshakes import (
+    HandshakeManager,
+    get_keypair_pool,
+)
+from quantdog.client.network.headers import (
+    IPPROTO_TCP,
+    IPv4Packet,
+    parse_packet,
+)
+from quantdog.client.network.records import RecordUplink
+from quantdog.client.network.sessions import NO_SERVER, SessionKeyCache
+from quantdog.client.security.cipher import (
+    Flow,
+    FlowCiphers,
+    FlowsExhausted,
+    SequenceExhausted,
+)
 
 
 @cache
-def get_secret_cache() -> dict[str, bytes]:
-    return dict()
+def get_secret_cache() -> SessionKeyCache:
+    return SessionKeyCache(
+        capacity=settings.session_cache_size,
+        ttl=settings.session_key_ttl,
+        negative_ttl=settings.no_server_ttl,
+        max_negative_ttl=settings.no_server_max_ttl,
+    )
 
 
-# Probably want to convert this to an LRU cache somehow
 SECRET_CACHE = get_secret_cache()
 
 
-def process_packet(packet: Packet):
-    tcp = packet.getlayer(TCP)
-    udp = packet.getlayer(UDP)
-
-    if tcp is not None:
-        process_tcp_packet(packet, tcp)
-    # if udp is not None:
-    #     process_udp_packet(packet, udp)
+@cache
+def get_handshake_manager() -> HandshakeManager:
+    return HandshakeManager(
+        SECRET_CACHE,
+        max_parked=settings.kem_parked_packets,
+        timeout=settings.kem_timeout,
+        keypairs=get_keypair_pool(),
+    )
 
 
-def add_kem_secret(dst_ip: str):
-    dst_kem_port = settings.kem_port
+HANDSHAKES = get_handshake_manager()
 
-    SECRET_CACHE.setdefault(dst_ip, b"\x00")
-    try:
-        kem_client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        kem_client.settimeout(5)
-        kem_client.connect((dst_ip, dst_kem_port))
-        logger.debug("Connected for KEM encryption!")
-        return True
-    except TimeoutError:
-        logger.debug("KEM port not found on %s.", dst_ip)
-        structlog.contextvars.clear_contextvars()
-        return False
-    except Exception as e:
-        logger.exception(str(e))
-        structlog.contextvars.clear_contextvars()
-        raise
 
-
-def process_tcp_packet(packet: Packet, tcp: Packet):
-    if not tcp.payload:
-        return
-
-    structlog.contextvars.bind_contextvars(
-        src_port=packet[TCP].sport,
-        src_ip=packet[IP].src,
-        dst_port=packet[TCP].dport,
-        dst_ip=packet[IP].dst,
-        len=packet[IP].len,
-        payload=tcp.payload,
-        packet_request_id=uuid.uuid4().hex,
+@cache
+def get_flow_ciphers() -> FlowCiphers:
+    return FlowCiphers(
+        settings.data_cipher,
+        max_peers=settings.session_cache_size,
+        max_flows=settings.session_max_flows,
     )
 
-    logger.debug("TCP packet identified.")
 
-    # This is going to be modified and encrypted as a payload
-    payload_packet = packet.copy()
-    transport_packet = packet
+FLOW_CIPHERS = get_flow_ciphers()
 
-    dst_ip = transport_packet[IP].dst
 
-    cached_secret = SECRET_CACHE.get(dst_ip)
-    if cached_secret == b"\x00":
-        # No point in doing the encryption if we know there's no server
-        return
+@cache
+def get_flow_table() -> FlowTable:
+    return FlowTable(
+        capacity=settings.flow_table_size,
+        syn_timeout=settings.flow_syn_timeout,
+        idle_timeout=settings.flow_idle_timeout,
+        closing_timeout=settings.flow_closing_timeout,
+    )
 
-    if dst_ip not in SECRET_CACHE:
-        addition_successful = add_kem_secret(dst_ip)
-        if not addition_successful:
-            return
 
-    payload_packet[IP].dst = "127.0.0.1"
-    transport_packet[TCP].dport = settings.pqc_port
-    payload_layer = transport_packet.lastlayer()
-    logger.debug("Encrypting packet using %s.", settings.kemalg)
+FLOWS = get_flow_table()
 
-    payload_layer.load = "HEYO"
 
-    del transport_packet[IP].len
-    del transport_packet[IP].chksum
-    del transport_packet[TCP].chksum
+@cache
+def get_record_uplink() -> RecordUplink:
+    return RecordUplink(
+        settings.pqc_port,
+        settings.uplink_mark,
+        max_peers=settings.session_cache_size,
+        max_buffer=settings.record_buffer,
+    )
 
-    transport_packet = IP(transport_packet.build())
 
+RECORDS = get_record_uplink()
+
+_SEQ_MASK = 0xFFFFFFFF
+
+
+def dissect(packet: IPv4Packet) -> str:
+    """Summarize a packet with scapy. Slow: for debug logging only."""
+    from scapy.layers.inet import IP
+
+    return IP(bytes(packet.data)).summary()
+
+
+def process_packet(
+    packet: IPv4Packet, replayed: bool = False
+) -> IPv4Packet | None:
+    """Handle a packet; returns the packet to send on, if any.
+
+    ``replayed`` packets were parked earlier and already counted.
+    """
+    if packet.transport is None:
+        return None
+
+    if packet.protocol == IPPROTO_TCP:
+        return process_tcp_packet(packet, replayed)
+    # elif packet.protocol == IPPROTO_UDP:
+    #     process_udp_packet(packet)
+    return None
+
+
+def resolve_flow(flow: FlowEntry, packet: IPv4Packet, now: float):
+    """The session key (or ``NO_SERVER``/None) for ``flow``'s destination.
+
+    Cached in the flow, with its sealer, until the key expires or the
+    session cache changes. A session out of flows is renegotiated like one
+    out of sequence numbers: None, and the packet waits for the new key.
+    """
+    generation = SECRET_CACHE.generation
+    if flow.generation == generation and now < flow.valid_until:
+        return flow.secret
+    dst_ip = packet.dst
+    secret, valid_until = SECRET_CACHE.lookup(dst_ip)
+    flow.secret = secret
+    flow.valid_until = valid_until
+    flow.generation = generation
+    flow.sealer = None
+    if secret is not None and secret != NO_SERVER:
+        try:
+            flow.sealer = FLOW_CIPHERS.sealer(
+                dst_ip,
+                secret,
+                Flow(packet.protocol, packet.src_port, packet.dst_port),
+            )
+        except FlowsExhausted:
+            SECRET_CACHE.invalidate(dst_ip)
+            logger.info(
+                "Session flows exhausted, renegotiating.", dst_ip=dst_ip
+            )
+            flow.secret = None
+            flow.generation = -1
+            return None
+    return secret
+
+
+def _bind_packet(packet: IPv4Packet, flow: FlowEntry):
+    """Put a packet's details in the log context. Debug logging only."""
     structlog.contextvars.bind_contextvars(
-        src_port=transport_packet[TCP].sport,
-        src_ip=transport_packet[IP].src,
-        dst_port=transport_packet[TCP].dport,
-        dst_ip=transport_packet[IP].dst,
-        len=transport_packet[IP].len,
-        payload=tcp.payload,
+        src_port=packet.src_port,
+        src_ip=packet.src,
+        dst_port=packet.dst_port,
+        dst_ip=packet.dst,
+        len=len(packet),
+        flow_state=STATE_NAMES[flow.state],
+        packet_request_id=uuid.uuid4().hex,
+        payload=bytes(packet.payload),
+        packet=dissect(packet),
     )
 
-    logger.debug("Modifications complete.")
 
-    # TODO
-    # 1. Identify whether a Quantdog is running on that server
-    # 2. Perform a key exchange with the Quantdog server
-    # 3. Send the modified packet
-    #
-    # Maybe I should be encrypting the *entire packet?*
+def _debug_done(message: str, *args):
+    """Log the last debug line for a packet and clear its log context."""
+    logger.debug(message, *args)
     structlog.contextvars.clear_contextvars()
 
 
-def process_udp_packet(packet: Packet, udp: Packet):
-    if not udp.payload:
-        return
+def process_tcp_packet(
+    packet: IPv4Packet, replayed: bool = False
+) -> IPv4Packet | None:
+    now = FLOWS.clock()
+    flow = FLOWS.get(packet.flow_key) if replayed else None
+    if flow is None:
+        # Every segment counts, including the SYN/FIN/RST without payload
+        flow = FLOWS.track(packet, now)
+    if packet.payload_offset == len(packet):
+        return None
+
+    dst_ip = packet.dst
+    # Logging context, request ids and dissection cost more than the rest
+    # of the packet path, so like dissect they are for debugging only
+    debug = settings.debug
+    if debug:
+        _bind_packet(packet, flow)
+        logger.debug("TCP packet identified.")
+
+    cached_secret = resolve_flow(flow, packet, now)
+    if cached_secret == NO_SERVER:
+        # No point in doing the encryption if we know there's no server
+        if debug:
+            _debug_done("No QuantDog server, passing through.")
+        return packet
+
+    if cached_secret is None:
+        # Processed again once the handshake finishes
+        parked = HANDSHAKES.park(dst_ip, packet.data)
+        if debug:
+            _debug_done(
+                "Packet parked for KEM handshake."
+                if parked
+                else "Handshake queue full, packet dropped."
+            )
+        return None
+
+    # The record stream must carry the flow's bytes once and in order, so
+    # retransmitted bytes are cut off and a segment past a gap waits for
+    # the retransmission of what is missing
+    payload = packet.payload
+    seq = packet.tcp_seq
+    if flow.next_seq is not None:
+        sent = (flow.next_seq - seq) & _SEQ_MASK
+        if sent >= len(payload):
+            if debug:
+                _debug_done(
+                    "Payload already sent."
+                    if sent <= _SEQ_MASK >> 1
+                    else "Payload past a gap, dropped."
+                )
+            return None
+        payload = payload[sent:]
 
-    structlog.contextvars.bind_contextvars(
-        src_port=packet[UDP].sport,
-        src_ip=packet[IP].src,
-        dst_port=packet[UDP].dport,
-        dst_ip=packet[IP].dst,
-        payload=udp.payload,
-    )
+    try:
+        record = flow.sealer.seal(payload)
+    except SequenceExhausted:
+        # Renegotiate; the packet is retransmitted under the new key
+        SECRET_CACHE.invalidate(dst_ip)
+        logger.info(
+            "Flow sequence numbers exhausted, renegotiating.", dst_ip=dst_ip
+        )
+        structlog.contextvars.clear_contextvars()
+        return None
 
-    raw_packet_bytes = bytes(packet)
+    # The record goes on the stream to the peer's PQC listener; the segment
+    # itself is consumed
+    if not RECORDS.send(dst_ip, record):
+        if debug:
+            _debug_done("Record stream full, packet dropped.")
+        return None
+    flow.next_seq = (seq + len(packet.payload)) & _SEQ_MASK
 
-    structlog.contextvars.bind_contextvars()
+    if debug:
+        structlog.contextvars.bind_contextvars(record_len=len(record))
+        _debug_done("Encrypted payload using %s.", settings.data_cipher)
+    return None
 
-    logger.debug("UDP packet identified.")
-    structlog.contextvars.clear_contextvars()
+
+def process_udp_packet(packet: IPv4Packet):
+    if packet.payload_offset == len(packet):
+        return
+
+    if settings.debug:
+        structlog.contextvars.bind_contextvars(
+            src_port=packet.src_port,
+            src_ip=packet.src,
+            dst_port=packet.dst_port,
+            dst_ip=packet.dst,
+            payload=bytes(packet.payload),
+            packet=dissect(packet),
+        )
+        _debug_done("UDP packet identified.")
 
 
 def packet_listener(tun_fd: int, tun_name: str):
     logger.info("Server running. Use CTRL+C to exit.")
+    # Packets are read into, and rewritten in, preallocated buffers
+    tun_io = TunBatchIO(
+        tun_fd,
+        settings.packet_batch,
+        settings.packet_length,
+        settings.uplink_mark,
+    )
+    HANDSHAKES.start()
+    tun_io.watch(HANDSHAKES.wakeup_fd)
+    # Record streams with a backlog wake the loop once they can take more
+    RECORDS.selector = tun_io.selector
     try:
         while True:
-            raw_packet = os.read(tun_fd, settings.packet_length)
-            packet = IP(raw_packet)
-            processed_packet = process_packet(packet)
+            ready = tun_io.wait(1.0)
+            FLOWS.sweep()
+            if not ready:
+                continue
+            for _, _, parked in HANDSHAKES.completed():
+                for data in parked:
+                    packet = parse_packet(data)
+                    if packet is not None:
+                        packet = process_packet(packet, replayed=True)
+                    if packet is not None:
+                        tun_io.queue(packet.data)
+            for data in tun_io.read_batch():
+                packet = parse_packet(data)
+                if packet is not None:
+                    packet = process_packet(packet)
+                if packet is not None:
+                    tun_io.queue(packet.data)
+            tun_io.flush()
+            RECORDS.flush()
 
     except KeyboardInterrupt:
         pass
@@ -148,5 +306,15 @@ def packet_listener(tun_fd: int, tun_name: str):
     except Exception as e:
         logger.exception(str(e))
     finally:
+        RECORDS.close()
+        tun_io.close()
+        HANDSHAKES.stop()
         structlog.contextvars.clear_contextvars()
-        logger.info("Shutting down.")
+        logger.info(
+            "Shutting down.",
+            secret_cache=SECRET_CACHE.stats(),
+            flows=FLOWS.stats(),
+            handshakes=HANDSHAKES.stats(),
+            records=RECORDS.stats(),
+            **tun_io.stats(),
+        )
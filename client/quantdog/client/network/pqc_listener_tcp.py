@@ -1,36 +1,117 @@
 import logging
 import socket
+import threading
 
 from quantdog.client.common import logger, settings
-from quantdog.client.network.tcp_listener import TCPListener
+from quantdog.client.network.sessions import SessionKeyCache
+from quantdog.client.network.tcp_listener import Connection, TCPListener
+from quantdog.client.security.cipher import (
+    RECORD_HEADER,
+    Flow,
+    FlowCiphers,
+    RecordError,
+    parse_record_header,
+)
 
 
 class PQCListenerTCP(TCPListener):
     """Listener for handling PQC-encrypted data"""
 
     def __init__(
-        self, host: str = "0.0.0.0", pqc_port: int = settings.pqc_port
+        self,
+        host: str = "0.0.0.0",
+        pqc_port: int = settings.pqc_port,
+        sessions: SessionKeyCache | None = None,
+        forward_host: str = "127.0.0.1",
     ):
         super().__init__(host, pqc_port, listener_type="PQC TCP")
+        # Session keys by session id, as negotiated by the KEM listener
+        if sessions is None:
+            sessions = SessionKeyCache(
+                capacity=settings.session_cache_size,
+                ttl=settings.session_key_ttl,
+            )
+        self.sessions = sessions
+        # Decrypted payloads go to this host, on the flow's original port
+        self.forward_host = forward_host
+        # Flow state by session id. Losing a session's replay windows would
+        # let its records be replayed, so its session key goes with them
+        self.ciphers = FlowCiphers(
+            settings.data_cipher,
+            max_peers=settings.session_cache_size,
+            max_flows=settings.session_max_flows,
+            window=settings.replay_window,
+            on_evict=self.sessions.invalidate,
+        )
+        self._lock = threading.Lock()
+        self.records_opened = 0
+        self.records_dropped = 0
 
-    def handler(self, client_socket: socket.socket, client_address: tuple):
+    def open_record(self, peer: str, record: bytes) -> bytes | None:
+        """Decrypt a record from ``peer``; None if it was dropped.
+
+        The key is the one of the session the record names, whichever of
+        the peer's sessions (one per client worker) that is.
+        """
+        with self._lock:
+            try:
+                session = parse_record_header(record)[1]
+                session_key = self.sessions.get(session)
+                if session_key is None:
+                    raise RecordError("No session key for record")
+                payload = self.ciphers.open(session, session_key, record)
+            except RecordError as e:
+                self.records_dropped += 1
+                logger.debug("Record from %s dropped: %s", peer, e)
+                return None
+            self.records_opened += 1
+        return payload
+
+    def connection_made(self, connection: Connection):
+        # One connection to the local service per flow
+        upstreams: dict[Flow, socket.socket] = {}
+        # Bytes of an incomplete record, and the upstreams
+        connection.state = (bytearray(), upstreams)
+
+    def data_received(self, connection: Connection, data: bytes):
         """Handler for PQC encrypted data"""
-        try:
-            while True:
-                data = client_socket.recv(1024)
-                if not data:
-                    break
-
-                logger.debug("Data received: %s", data.hex())
-
-                # Echo the data back
-                client_socket.send(data)
-
-        except Exception as e:
-            logger.error(f"Error handling client {client_address}: {e}")
-        finally:
-            client_socket.close()
-            logger.info(f"Connection with {client_address} closed")
+        peer = connection.address[0]
+        buffer, upstreams = connection.state
+        buffer += data
+        offset = 0
+        while len(buffer) - offset >= RECORD_HEADER.size:
+            # A malformed length loses the framing: give up on the
+            # connection
+            length, _, flow, _ = parse_record_header(
+                buffer[offset : offset + RECORD_HEADER.size]
+            )
+            if len(buffer) - offset < length:
+                break
+            record = bytes(buffer[offset : offset + length])
+            offset += length
+
+            payload = self.open_record(peer, record)
+            if payload is None:
+                continue
+            upstream = upstreams.get(flow)
+            if upstream is None:
+                upstream = upstreams[flow] = socket.create_connection(
+                    (self.forward_host, flow.dst_port)
+                )
+            upstream.sendall(payload)
+        del buffer[:offset]
+
+    def connection_lost(self, connection: Connection):
+        for upstream in connection.state[1].values():
+            upstream.close()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                **super().stats(),
+                "records_opened": self.records_opened,
+                "records_dropped": self.records_dropped,
+            }
 
 
 # Example usage
@@ -0,0 +1,159 @@
+"""Streams of sealed records to the peers' PQC listeners.
+
+A record cannot travel in the segment it was sealed from: the PQC listener
+on ``pqc_port`` reads a stream it accepted, and a segment of some other
+connection rewritten to that port belongs to none, so the peer would only
+answer it with a reset. Each worker instead opens one TCP connection to each
+peer's ``pqc_port`` and writes its records to it back to back; records carry
+their length and name their session, so the listener reads them off the
+stream and opens each with its session's key, across rekeys.
+
+The connections are non-blocking and carry the uplink mark, so they leave
+through the uplink rather than the TUN. Whatever the socket does not take at
+once waits in the connection's outbox, up to ``max_buffer`` bytes, and the
+socket is watched for writing on the packet thread's selector until
+``flush`` has sent it all. A record that does not fit is refused, like a
+packet on a congested link, and the application's retransmission brings
+its bytes back. A connection that fails loses what it had queued and is
+opened again by the next record.
+"""
+
+import contextlib
+import errno
+import selectors
+import socket
+from collections import OrderedDict
+
+from quantdog.client.common import logger, settings
+
+
+class _Stream:
+    __slots__ = ("sock", "outbox", "watched")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.outbox = bytearray()
+        self.watched = False
+
+
+class RecordUplink:
+    """One stream of records per peer, written without blocking."""
+
+    def __init__(
+        self,
+        port: int = settings.pqc_port,
+        mark: int = settings.uplink_mark,
+        max_peers: int = settings.session_cache_size,
+        max_buffer: int = settings.record_buffer,
+        selector: selectors.BaseSelector | None = None,
+    ):
+        self.port = port
+        self.mark = mark
+        self.max_peers = max_peers
+        self.max_buffer = max_buffer
+        # Sockets with a backlog are watched for writing on this selector
+        self.selector = selector
+        self._streams: OrderedDict[str, _Stream] = OrderedDict()
+        self._backlogged: set[str] = set()
+        self.records_queued = 0
+        self.records_refused = 0
+        self.connections_opened = 0
+        self.connections_failed = 0
+
+    def _open(self, peer: str) -> _Stream:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            if self.mark:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_MARK, self.mark)
+            sock.setblocking(False)
+            error = sock.connect_ex((peer, self.port))
+            if error not in (0, errno.EINPROGRESS):
+                raise OSError(error, errno.errorcode.get(error, "connect"))
+        except OSError:
+            sock.close()
+            raise
+        stream = self._streams[peer] = _Stream(sock)
+        self.connections_opened += 1
+        if len(self._streams) > self.max_peers:
+            self._close(next(iter(self._streams)))
+        return stream
+
+    def _close(self, peer: str):
+        stream = self._streams.pop(peer)
+        self._backlogged.discard(peer)
+        if stream.watched and self.selector is not None:
+            self.selector.unregister(stream.sock)
+        stream.sock.close()
+
+    def _write(self, peer: str, stream: _Stream) -> bool:
+        """Send what the socket takes of the outbox; False if it failed."""
+        outbox = stream.outbox
+        try:
+            # Still connecting, the socket takes nothing yet
+            with contextlib.suppress(BlockingIOError):
+                del outbox[: stream.sock.send(outbox)]
+        except OSError as e:
+            logger.info("Record stream failed.", peer=peer, error=str(e))
+            self.connections_failed += 1
+            self._close(peer)
+            return False
+
+        watch = bool(outbox)
+        if watch:
+            self._backlogged.add(peer)
+        else:
+            self._backlogged.discard(peer)
+        if watch != stream.watched and self.selector is not None:
+            if watch:
+                self.selector.register(stream.sock, selectors.EVENT_WRITE)
+            else:
+                self.selector.unregister(stream.sock)
+            stream.watched = watch
+        return True
+
+    def send(self, peer: str, record: bytes) -> bool:
+        """Queue ``record`` on the stream to ``peer``; False if refused."""
+        stream = self._streams.get(peer)
+        try:
+            if stream is None:
+                stream = self._open(peer)
+        except OSError as e:
+            logger.info("Record stream failed.", peer=peer, error=str(e))
+            self.connections_failed += 1
+            self.records_refused += 1
+            return False
+        self._streams.move_to_end(peer)
+
+        if len(stream.outbox) + len(record) > self.max_buffer:
+            self.records_refused += 1
+            return False
+        stream.outbox += record
+        # Behind a backlog, the record waits for its turn in flush
+        if peer not in self._backlogged and not self._write(peer, stream):
+            self.records_refused += 1
+            return False
+        self.records_queued += 1
+        return True
+
+    @property
+    def pending(self) -> int:
+        """Bytes waiting for the streams' sockets."""
+        return sum(len(self._streams[peer].outbox) for peer in self._backlogged)
+
+    def flush(self):
+        """Send on the backlogged streams as far as their sockets allow."""
+        for peer in list(self._backlogged):
+            self._write(peer, self._streams[peer])
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "record_streams": len(self._streams),
+            "records_queued": self.records_queued,
+            "records_refused": self.records_refused,
+            "connections_opened": self.connections_opened,
+            "connections_failed": self.connections_failed,
+        }
+
+    def close(self):
+        for peer in list(self._streams):
+            self._close(peer)
@@ -0,0 +1,136 @@
+"""Bounded cache of per-destination session keys.
+
+Keys expire ``ttl`` seconds after they were negotiated, which forces a new
+key exchange (key rotation). Destinations without a QuantDog server get a
+negative entry instead, so they are not probed on every packet; it expires
+after ``negative_ttl`` seconds, doubling with each consecutive failure up to
+``max_negative_ttl``. The least recently used entry is evicted once
+``capacity`` destinations are cached. Clients key the cache by destination
+address, servers by session id.
+
+The cache is guarded by a lock, so the threads of a worker can share it.
+Worker processes each have their own. ``generation`` changes whenever a
+key is stored, dropped or expires, so callers that keep what ``lookup``
+returned (per flow, say) can tell when to look again.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by ``get`` while a destination is known to have no server
+NO_SERVER = b"\x00"
+
+
+class _Entry:
+    __slots__ = ("key", "expires", "failures")
+
+    def __init__(self, key: bytes | None, expires: float, failures: int = 0):
+        # None for a negative entry
+        self.key = key
+        self.expires = expires
+        self.failures = failures
+
+
+class SessionKeyCache:
+    """LRU cache of session keys with TTLs and negative caching."""
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        ttl: float = 3600.0,
+        negative_ttl: float = 30.0,
+        max_negative_ttl: float = 3600.0,
+        clock=time.monotonic,
+    ):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_negative_ttl = max_negative_ttl
+        self.clock = clock
+        self._entries: OrderedDict[bytes | str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, peer: bytes | str) -> bytes | None:
+        """Get the key for ``peer``, ``NO_SERVER``, or None to negotiate."""
+        return self.lookup(peer)[0]
+
+    def lookup(self, peer: bytes | str) -> tuple[bytes | None, float]:
+        """Like ``get``, but also returns until when the answer holds.
+
+        Unless ``generation`` changes first; a None answer holds for no time.
+        """
+        with self._lock:
+            entry = self._entries.get(peer)
+            if entry is None:
+                self.misses += 1
+                return None, 0.0
+            if entry.expires <= self.clock():
+                self.misses += 1
+                if entry.key is not None:
+                    # Rotate: the next exchange starts from scratch
+                    del self._entries[peer]
+                    self.expirations += 1
+                    self.generation += 1
+                # An expired negative entry stays to remember the failures
+                return None, 0.0
+            self._entries.move_to_end(peer)
+            if entry.key is None:
+                self.negative_hits += 1
+                return NO_SERVER, entry.expires
+            self.hits += 1
+            return entry.key, entry.expires
+
+    def _store(self, peer: bytes | str, entry: _Entry):
+        entries = self._entries
+        entries[peer] = entry
+        entries.move_to_end(peer)
+        while len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+        self.generation += 1
+
+    def put(self, peer: bytes | str, key: bytes):
+        """Cache a freshly negotiated key."""
+        with self._lock:
+            self._store(peer, _Entry(key, self.clock() + self.ttl))
+
+    def put_negative(self, peer: bytes | str) -> float:
+        """Record a failed exchange; returns how long to back off."""
+        with self._lock:
+            previous = self._entries.get(peer)
+            failures = 1
+            if previous is not None and previous.key is None:
+                failures = previous.failures + 1
+            backoff = min(
+                self.negative_ttl * 2 ** min(failures - 1, 32),
+                self.max_negative_ttl,
+            )
+            self._store(peer, _Entry(None, self.clock() + backoff, failures))
+            return backoff
+
+    def invalidate(self, peer: bytes | str):
+        """Forget ``peer``, e.g. when its key stopped working."""
+        with self._lock:
+            if self._entries.pop(peer, None) is not None:
+                self.generation += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -1,26 +1,120 @@
+"""Event-driven TCP listener.
+
+One thread runs a selector (epoll on Linux) over the listening socket and
+every accepted connection, so an idle peer costs a socket and a small
+``Connection`` rather than a thread. Data read from a connection is handed
+to ``data_received`` on a bounded pool of worker threads, in order and
+never concurrently for the same connection, so handlers are straight-line
+code and may block (on an upstream socket, say) without stalling the
+selector. A connection whose handler falls behind is not read again until
+it catches up, and at ``max_connections`` the listener stops accepting and
+leaves new peers in the kernel backlog.
+
+Subclasses override ``connection_made``, ``data_received`` and
+``connection_lost``, and reply through ``Connection.send``.
+"""
+
+import contextlib
 import logging
+import selectors
 import socket
 import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from quantdog.client.common import logger, settings
+
+_READ_SIZE = 65536
+# Chunks waiting for a handler before the connection stops being read
+_MAX_INBOX = 64
+
+# Inbox markers besides received data
+_MADE = object()
+_EOF = object()
+_LOST = object()
+
+
+class Connection:
+    """An accepted client connection."""
+
+    def __init__(
+        self, listener: "TCPListener", sock: socket.socket, address: tuple
+    ):
+        self.listener = listener
+        self.socket = sock
+        self.address = address
+        # Whatever the handlers keep for this connection
+        self.state = None
+        self.last_active = time.monotonic()
+        self._lock = threading.Lock()
+        self._inbox: deque = deque()
+        self._scheduled = False
+        self._paused = False
+        self._eof = False
+        self._closing = False
+        self._closed = False
+        self._outbox = bytearray()
+        self._events = 0
+
+    def send(self, data: bytes):
+        """Send ``data`` to the client; safe from any thread.
 
-from quantdog.client.common import logger
+        Whatever the socket does not take at once is sent by the listener.
+        """
+        if not data:
+            return
+        with self._lock:
+            if self._closing or self._closed:
+                return
+            if not self._outbox:
+                with contextlib.suppress(BlockingIOError):
+                    data = data[self.socket.send(data) :]
+                if not data:
+                    return
+            self._outbox += data
+        self.listener._request(self)
+
+    def close(self):
+        """Close the connection once what was sent has been flushed."""
+        with self._lock:
+            self._closing = True
+        self.listener._request(self)
 
 
 class TCPListener:
     """Base TCP listener"""
 
-    # TODO: Add thread locking to avoid memory shenanigans
-
     def __init__(
         self,
         host: str = "0.0.0.0",
         port: int = 8888,
         listener_type: str = "TCP",
+        backlog: int = settings.listener_backlog,
+        max_connections: int = settings.listener_max_connections,
+        workers: int = settings.listener_workers,
+        recv_buffer: int = settings.listener_recv_buffer,
+        idle_timeout: float | None = None,
     ):
         self.host = host
         self.port = port
         self.listener_type = listener_type
+        self.backlog = backlog
+        self.max_connections = max_connections
+        self.workers = workers
+        self.recv_buffer = recv_buffer
+        # Connections quiet for longer than this are closed
+        self.idle_timeout = idle_timeout
         self.socket: socket.socket | None = None
         self.is_running = False
+        self._selector: selectors.BaseSelector | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._connections: set[Connection] = set()
+        self._accepting = False
+        # Connections whose selector registration needs another look
+        self._requests: deque[Connection] = deque()
+        self._wakeup_r: socket.socket | None = None
+        self._wakeup_w: socket.socket | None = None
 
     def start(self):
         """Start the TCP listener."""
@@ -28,13 +122,29 @@ class TCPListener:
             # Create socket
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # Inherited by accepted sockets
+            self.socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer
+            )
 
             # Bind to address
             self.socket.bind((self.host, self.port))
+            self.port = self.socket.getsockname()[1]
 
             # Start listening
-            self.socket.listen(5)
-            self.socket.settimeout(5)
+            self.socket.listen(self.backlog)
+            self.socket.setblocking(False)
+
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix=self.listener_type
+            )
+            self._wakeup_r, self._wakeup_w = socket.socketpair()
+            self._wakeup_r.setblocking(False)
+            self._wakeup_w.setblocking(False)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+            self._selector.register(self.socket, selectors.EVENT_READ)
+            self._accepting = True
             self.is_running = True
 
             logger.info(
@@ -43,61 +153,241 @@ class TCPListener:
                 self.host,
                 self.port,
             )
-
-            while self.is_running:
-                try:
-                    # Accept connection
-                    client_socket, client_address = self.socket.accept()
-                    logger.debug(f"New connection from {client_address}")
-
-                    # Handle connection in separate thread
-                    client_thread = threading.Thread(
-                        target=self.handler,
-                        args=(client_socket, client_address),
-                    )
-                    client_thread.daemon = True
-                    client_thread.start()
-
-                except TimeoutError:
-                    if self.is_running:
-                        continue
-                    break
-                except OSError as e:
-                    if self.is_running:
-                        logger.error(f"Socket error: {e}")
-                    break
+            self._serve()
 
         except Exception as e:
             logger.exception(
                 "Failed to start %s listener: %s", self.listener_type, e
             )
             raise
+        finally:
+            self._shutdown()
 
     def stop(self):
         """Stop the TCP listener."""
         self.is_running = False
-        if self.socket:
-            self.socket.close()
+        self._wakeup()
         logger.info("%s Listener stopped", self.listener_type)
 
-    def handler(self, client_socket: socket.socket, client_address: tuple):
+    def stats(self) -> dict[str, int]:
+        return {"connections": len(self._connections)}
+
+    def connection_made(self, connection: Connection):
+        """Called first for every connection."""
+
+    def data_received(self, connection: Connection, data: bytes):
         """Basic TCP handler"""
+        logger.debug("Data received: %s", data.hex())
+
+        # Echo the data back
+        connection.send(data)
+
+    def connection_lost(self, connection: Connection):
+        """Called last for every connection, once it is closed."""
+
+    def _serve(self):
+        next_expiry = time.monotonic() + 1.0
+        while self.is_running:
+            for key, mask in self._selector.select(1.0):
+                if key.fileobj is self.socket:
+                    self._accept()
+                elif key.fileobj is self._wakeup_r:
+                    self._handle_requests()
+                else:
+                    connection = key.data
+                    if mask & selectors.EVENT_WRITE:
+                        self._flush(connection)
+                    if mask & selectors.EVENT_READ and not connection._closed:
+                        self._read(connection)
+            # Once a second, not once per wakeup
+            if self.idle_timeout is not None and time.monotonic() > next_expiry:
+                self._expire_idle()
+                next_expiry = time.monotonic() + 1.0
+
+    def _accept(self):
+        while len(self._connections) < self.max_connections:
+            try:
+                client_socket, client_address = self.socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                # Out of file descriptors, most likely; retried next wakeup
+                logger.error(f"Socket error: {e}")
+                return
+            logger.debug(f"New connection from {client_address}")
+            client_socket.setblocking(False)
+            connection = Connection(self, client_socket, client_address)
+            self._connections.add(connection)
+            self._dispatch(connection, _MADE)
+            self._update(connection)
+
+        # Full: later peers wait in the backlog until a connection closes
+        logger.warning(
+            "%s listener at %s connections, not accepting.",
+            self.listener_type,
+            self.max_connections,
+        )
+        self._selector.unregister(self.socket)
+        self._accepting = False
+
+    def _read(self, connection: Connection):
         try:
-            while True:
-                data = client_socket.recv(1024)
-                if not data:
-                    break
+            data = connection.socket.recv(_READ_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        connection.last_active = time.monotonic()
+        with connection._lock:
+            if not data:
+                # Handle what already arrived, then close
+                connection._eof = True
+            elif len(connection._inbox) >= _MAX_INBOX:
+                connection._paused = True
+        self._dispatch(connection, data or _EOF)
+        if connection._eof or connection._paused:
+            self._update(connection)
 
-                logger.debug("Data received: %s", data.hex())
+    def _flush(self, connection: Connection):
+        with connection._lock:
+            try:
+                sent = connection.socket.send(connection._outbox)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # The peer is gone; nothing left worth sending
+                connection._outbox.clear()
+                connection._closing = True
+            else:
+                del connection._outbox[:sent]
+        self._update(connection)
 
-                # Echo the data back
-                client_socket.send(data)
+    def _update(self, connection: Connection):
+        """Match the selector registration to the connection's state."""
+        if connection._closed:
+            return
+        with connection._lock:
+            if connection._closing and not connection._outbox:
+                close = True
+            else:
+                close = False
+                events = 0
+                if not (
+                    connection._paused or connection._eof or connection._closing
+                ):
+                    events |= selectors.EVENT_READ
+                if connection._outbox:
+                    events |= selectors.EVENT_WRITE
+        if close:
+            self._close(connection)
+            return
+        if events == connection._events:
+            return
+        if connection._events == 0:
+            self._selector.register(connection.socket, events, connection)
+        elif events == 0:
+            self._selector.unregister(connection.socket)
+        else:
+            self._selector.modify(connection.socket, events, connection)
+        connection._events = events
 
-        except Exception as e:
-            logger.error(f"Error handling client {client_address}: {e}")
-        finally:
-            client_socket.close()
-            logger.info(f"Connection with {client_address} closed")
+    def _close(self, connection: Connection):
+        if connection._events:
+            self._selector.unregister(connection.socket)
+            connection._events = 0
+        with connection._lock:
+            connection._closed = True
+            connection._outbox.clear()
+            connection.socket.close()
+        self._connections.discard(connection)
+        self._dispatch(connection, _LOST)
+        if not self._accepting and self.is_running:
+            self._selector.register(self.socket, selectors.EVENT_READ)
+            self._accepting = True
+
+    def _expire_idle(self):
+        deadline = time.monotonic() - self.idle_timeout
+        for connection in [
+            c for c in self._connections if c.last_active < deadline
+        ]:
+            logger.debug(f"Connection with {connection.address} timed out")
+            self._close(connection)
+
+    def _dispatch(self, connection: Connection, item):
+        with connection._lock:
+            connection._inbox.append(item)
+            if connection._scheduled:
+                return
+            connection._scheduled = True
+        self._executor.submit(self._run_handlers, connection)
+
+    def _run_handlers(self, connection: Connection):
+        """Feed a connection's inbox to its handlers, in order."""
+        while True:
+            with connection._lock:
+                if not connection._inbox:
+                    connection._scheduled = False
+                    return
+                item = connection._inbox.popleft()
+                resume = (
+                    connection._paused
+                    and len(connection._inbox) <= _MAX_INBOX // 2
+                )
+                if resume:
+                    connection._paused = False
+                skip = connection._closing or connection._closed
+            if resume:
+                self._request(connection)
+
+            try:
+                if item is _MADE:
+                    self.connection_made(connection)
+                elif item is _LOST:
+                    self.connection_lost(connection)
+                    logger.info(f"Connection with {connection.address} closed")
+                elif item is _EOF:
+                    connection.close()
+                elif not skip:
+                    self.data_received(connection, item)
+            except Exception as e:
+                logger.error(f"Error handling client {connection.address}: {e}")
+                connection.close()
+
+    def _request(self, connection: Connection):
+        """Have the selector thread call ``_update`` on ``connection``."""
+        self._requests.append(connection)
+        self._wakeup()
+
+    def _wakeup(self):
+        wakeup = self._wakeup_w
+        if wakeup is None:
+            return
+        # A full pipe already means a pending wakeup
+        with contextlib.suppress(OSError):
+            wakeup.send(b"\x00")
+
+    def _handle_requests(self):
+        with contextlib.suppress(BlockingIOError):
+            while self._wakeup_r.recv(4096):
+                pass
+        while self._requests:
+            self._update(self._requests.popleft())
+
+    def _shutdown(self):
+        self.is_running = False
+        if self._selector is not None:
+            for connection in list(self._connections):
+                self._close(connection)
+            self._selector.close()
+            self._selector = None
+        if self._executor is not None:
+            # Let the handlers see their connections closed
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for sock in (self.socket, self._wakeup_r, self._wakeup_w):
+            if sock is not None:
+                sock.close()
+        self._wakeup_r = self._wakeup_w = None
 
 
 # Example usage
@@ -0,0 +1,75 @@
+"""One worker process per TUN queue.
+
+With IFF_MULTI_QUEUE the kernel picks the queue for each packet from its
+flow hash (or from the queue the flow's replies were last written to), so
+every packet of a 5-tuple is read from the same queue fd. Serving each fd
+from exactly one worker therefore keeps each flow on one worker and in
+order, without any dispatching in Python. Workers are processes rather
+than threads so packet processing is not serialized by the GIL; per-process
+state such as the secret cache is not shared between them.
+"""
+
+import multiprocessing
+import os
+import signal
+from collections.abc import Callable
+
+from quantdog.client.common import logger
+from quantdog.client.network.packets import packet_listener
+
+
+class TunWorkerPool:
+    """Runs ``target(tun_fd, tun_name)`` for each queue of a TUN device."""
+
+    def __init__(
+        self,
+        tun_fds: list[int],
+        tun_name: str,
+        target: Callable[[int, str], object] = packet_listener,
+    ):
+        self.tun_fds = tun_fds
+        self.tun_name = tun_name
+        self.target = target
+        self.workers: list[multiprocessing.Process] = []
+
+    def start(self):
+        """Fork one worker per queue; the fds are inherited.
+
+        Call this before starting other threads, which a forked worker would
+        not get a consistent copy of.
+        """
+        if self.workers:
+            return
+        context = multiprocessing.get_context("fork")
+        for queue, tun_fd in enumerate(self.tun_fds):
+            worker = context.Process(
+                target=self.target,
+                args=(tun_fd, self.tun_name),
+                name=f"{self.tun_name}-q{queue}",
+                daemon=True,
+            )
+            worker.start()
+            self.workers.append(worker)
+        logger.info("Started %s TUN workers.", len(self.workers))
+
+    def stop(self):
+        """Interrupt the workers so they shut down like on CTRL+C."""
+        for worker in self.workers:
+            if worker.is_alive() and worker.pid is not None:
+                os.kill(worker.pid, signal.SIGINT)
+
+    def join(self, timeout: float | None = None):
+        for worker in self.workers:
+            worker.join(timeout)
+
+    def run(self):
+        """Serve the queues until interrupted, starting workers if needed."""
+        self.start()
+        try:
+            self.join()
+        except KeyboardInterrupt:
+            # The terminal already sent SIGINT to the workers too
+            pass
+        finally:
+            self.stop()
+            self.join(timeout=5)
@@ -0,0 +1,289 @@
+"""Per-flow AEAD sealing of packet payloads.
+
+Each flow (protocol and original ports) gets its own key, derived with HKDF
+from the session key negotiated with the peer and a random salt picked by
+the sender, so sequence numbers can be used directly as nonces: a sealer
+counts up from zero and refuses to go past ``SEQUENCE_LIMIT``, after which
+the session must be renegotiated. Because the salt is new for every sealer,
+a flow whose state was evicted and rebuilt never reuses a nonce under the
+same key. A sealed record is a header (length, session id, protocol, ports,
+salt, sequence number) that is authenticated as associated data, followed
+by the ciphertext and tag. Records carry their length, so they can be read
+back from a stream.
+
+The session id is a hash of the session key, so the receiver finds the key
+for a record by id rather than by the sender's address: each worker of a
+multi-queue client negotiates a session of its own with the same server,
+and their records must not be opened with each other's keys.
+
+Openers keep an anti-replay window like IPsec's: records older than the
+window, or already seen inside it, are rejected before decryption, and the
+window only moves once a record authenticates. Opener state lives as long
+as the session key, so replay protection is never silently reset.
+"""
+
+import hashlib
+import os
+import struct
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import (
+    AESGCM,
+    ChaCha20Poly1305,
+)
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+CIPHERS = {
+    "aes-256-gcm": AESGCM,
+    "chacha20-poly1305": ChaCha20Poly1305,
+}
+
+# Length of the rest of the record, session id, protocol, source and
+# destination port, key salt, sequence number
+RECORD_HEADER = struct.Struct("!H8sBHH8sQ")
+SESSION_ID_LENGTH = 8
+SALT_LENGTH = 8
+TAG_LENGTH = 16
+# Largest payload that fits in one record
+MAX_PAYLOAD = 0xFFFF - (RECORD_HEADER.size - 2) - TAG_LENGTH
+# Sealers stop well before nonces could repeat or the AEAD bounds bite
+SEQUENCE_LIMIT = 1 << 32
+
+_NONCE_PREFIX = bytes(4)
+
+
+class RecordError(ValueError):
+    """A record was malformed, replayed or failed authentication."""
+
+
+class SequenceExhausted(Exception):
+    """A flow sealed ``SEQUENCE_LIMIT`` records; renegotiate the session."""
+
+
+class FlowsExhausted(Exception):
+    """A session sealed ``max_flows`` flows; renegotiate it."""
+
+
+class Flow(NamedTuple):
+    protocol: int
+    src_port: int
+    dst_port: int
+
+
+def session_id(session_key: bytes) -> bytes:
+    """Public id of a session, carried in its records."""
+    digest = hashlib.sha256(b"quantdog session id" + session_key).digest()
+    return digest[:SESSION_ID_LENGTH]
+
+
+def derive_flow_key(
+    session_key: bytes, flow: Flow, salt: bytes, direction: bytes
+) -> bytes:
+    """Key for one direction of one flow."""
+    info = b"quantdog flow " + direction + struct.pack("!BHH", *flow)
+    return HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=salt, info=info
+    ).derive(session_key)
+
+
+class ReplayWindow:
+    """Sliding window over the last ``size`` sequence numbers."""
+
+    __slots__ = ("size", "highest", "bitmap")
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self.highest = -1
+        # Bit i set: highest - i was seen
+        self.bitmap = 0
+
+    def check(self, seq: int) -> bool:
+        """Whether ``seq`` is new and inside the window."""
+        if seq > self.highest:
+            return True
+        offset = self.highest - seq
+        return offset < self.size and not (self.bitmap >> offset) & 1
+
+    def update(self, seq: int):
+        if seq > self.highest:
+            shift = seq - self.highest
+            self.bitmap = (
+                (self.bitmap << shift) | 1 if shift < self.size else 1
+            ) & ((1 << self.size) - 1)
+            self.highest = seq
+        else:
+            self.bitmap |= 1 << (self.highest - seq)
+
+
+class FlowSealer:
+    """Seals one direction of a flow, numbering records from zero."""
+
+    __slots__ = ("aead", "session_id", "flow", "salt", "seq")
+
+    def __init__(self, aead, session_id: bytes, flow: Flow, salt: bytes):
+        self.aead = aead
+        self.session_id = session_id
+        self.flow = flow
+        self.salt = salt
+        self.seq = 0
+
+    def seal(self, payload: bytes) -> bytes:
+        if len(payload) > MAX_PAYLOAD:
+            raise ValueError("Payload too large for one record")
+        seq = self.seq
+        if seq >= SEQUENCE_LIMIT:
+            raise SequenceExhausted(self.flow)
+        self.seq = seq + 1
+        header = RECORD_HEADER.pack(
+            RECORD_HEADER.size - 2 + len(payload) + TAG_LENGTH,
+            self.session_id,
+            *self.flow,
+            self.salt,
+            seq,
+        )
+        nonce = _NONCE_PREFIX + header[-8:]
+        return header + self.aead.encrypt(nonce, payload, header)
+
+
+class FlowOpener:
+    """Opens one direction of a flow, rejecting replays."""
+
+    __slots__ = ("aead", "window")
+
+    def __init__(self, aead, window: int = 1024):
+        self.aead = aead
+        self.window = ReplayWindow(window)
+
+    def open(self, record: bytes) -> bytes:
+        header = record[: RECORD_HEADER.size]
+        seq = RECORD_HEADER.unpack(header)[6]
+        if not self.window.check(seq):
+            raise RecordError(f"Replayed or stale record {seq}")
+        try:
+            payload = self.aead.decrypt(
+                _NONCE_PREFIX + header[-8:],
+                record[RECORD_HEADER.size :],
+                header,
+            )
+        except InvalidTag:
+            raise RecordError(f"Record {seq} failed authentication") from None
+        self.window.update(seq)
+        return payload
+
+
+def parse_record_header(record: bytes) -> tuple[int, bytes, Flow, bytes]:
+    """Total length, session id, flow and salt of the record in ``record``."""
+    if len(record) < RECORD_HEADER.size:
+        raise RecordError("Truncated record header")
+    length, session, protocol, src_port, dst_port, salt, _ = (
+        RECORD_HEADER.unpack_from(record)
+    )
+    if length < RECORD_HEADER.size - 2 + TAG_LENGTH:
+        raise RecordError("Malformed record length")
+    return length + 2, session, Flow(protocol, src_port, dst_port), salt
+
+
+class _Peer:
+    __slots__ = ("session_key", "session_id", "flows")
+
+    def __init__(self, session_key: bytes):
+        self.session_key = session_key
+        self.session_id = session_id(session_key)
+        self.flows: OrderedDict = OrderedDict()
+
+
+class FlowCiphers:
+    """Sealers or openers for the flows of each peer's current session.
+
+    The sender keys its peers by address, the receiver by session id. A
+    peer's flow state is dropped when its session key changes. A session
+    seals at most ``max_flows`` flows: the next one raises
+    ``FlowsExhausted``, and the sender must renegotiate. Openers are never
+    evicted while their session lasts, so the receiver keeps every flow the
+    sender may still use, and rejects flows beyond ``max_flows``. Evicting
+    a whole peer past ``max_peers`` calls ``on_evict(peer)``, which on the
+    receiving side should retire the peer's session key.
+    """
+
+    def __init__(
+        self,
+        cipher: str = "aes-256-gcm",
+        direction: bytes = b"c2s",
+        max_peers: int = 1024,
+        max_flows: int = 4096,
+        window: int = 1024,
+        on_evict: Callable[[str], object] | None = None,
+    ):
+        if cipher not in CIPHERS:
+            raise ValueError(f"Unknown cipher {cipher}")
+        self.aead_class = CIPHERS[cipher]
+        self.direction = direction
+        self.max_peers = max_peers
+        self.max_flows = max_flows
+        self.window = window
+        self.on_evict = on_evict
+        self._peers: OrderedDict[bytes | str, _Peer] = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(peer.flows) for peer in self._peers.values())
+
+    def _peer(self, peer: bytes | str, session_key: bytes) -> _Peer:
+        state = self._peers.get(peer)
+        if state is None or state.session_key != session_key:
+            # New or rotated key: the old flow state is of no use
+            state = self._peers[peer] = _Peer(session_key)
+            if len(self._peers) > self.max_peers:
+                evicted, _ = self._peers.popitem(last=False)
+                if self.on_evict is not None:
+                    self.on_evict(evicted)
+        self._peers.move_to_end(peer)
+        return state
+
+    def _aead(self, session_key: bytes, flow: Flow, salt: bytes):
+        return self.aead_class(
+            derive_flow_key(session_key, flow, salt, self.direction)
+        )
+
+    def sealer(self, peer: str, session_key: bytes, flow: Flow) -> FlowSealer:
+        """The sealer for ``flow``; callers may keep it while the key holds.
+
+        Raises ``FlowsExhausted`` once the session has ``max_flows`` flows.
+        """
+        state = self._peer(peer, session_key)
+        sealer = state.flows.get(flow)
+        if sealer is None:
+            if len(state.flows) >= self.max_flows:
+                raise FlowsExhausted(peer)
+            salt = os.urandom(SALT_LENGTH)
+            sealer = state.flows[flow] = FlowSealer(
+                self._aead(session_key, flow, salt),
+                state.session_id,
+                flow,
+                salt,
+            )
+        return sealer
+
+    def seal(
+        self, peer: str, session_key: bytes, flow: Flow, payload: bytes
+    ) -> bytes:
+        return self.sealer(peer, session_key, flow).seal(payload)
+
+    def open(
+        self, peer: bytes | str, session_key: bytes, record: bytes
+    ) -> bytes:
+        _, _, flow, salt = parse_record_header(record)
+        flows = self._peer(peer, session_key).flows
+        opener = flows.get((flow, salt))
+        if opener is not None:
+            return opener.open(record)
+        if len(flows) >= self.max_flows:
+            raise RecordError("Too many flows in this session")
+        opener = FlowOpener(self._aead(session_key, flow, salt), self.window)
+        # Only a record that authenticates may claim a slot
+        payload = opener.open(record)
+        flows[(flow, salt)] = opener
+        return payload
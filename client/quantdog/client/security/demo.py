@@ -0,0 +1,40 @@
+"""Encapsulation round trip against ourselves, showing the KEM details.
+
+Run with ``python -m quantdog.client.security.demo``.
+"""
+
+from pprint import pformat
+
+import oqs
+
+from quantdog.client.common import logger, settings
+from quantdog.client.security import decapsulate_secret, encapsulate_secret
+
+
+def main():
+    logger.info("liboqs version: %s", oqs.oqs_version())
+    with (
+        oqs.KeyEncapsulation(settings.kemalg) as client,
+        oqs.KeyEncapsulation(settings.kemalg) as server,
+    ):
+        logger.info("Key encapsulation details:\n%s", pformat(client.details))
+
+        # Client generates its keypair
+        public_key_client = client.generate_keypair()
+
+        # The server encapsulates its secret using the client's public key
+        ciphertext, shared_secret_server = encapsulate_secret(
+            server, public_key_client
+        )
+
+        # The client decapsulates the ciphertext to obtain the shared secret
+        shared_secret_client = decapsulate_secret(client, ciphertext)
+
+        logger.info(
+            "Shared secrets match: %s",
+            shared_secret_client == shared_secret_server,
+        )
+
+
+if __name__ == "__main__":
+    main()
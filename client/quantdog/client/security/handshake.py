@@ -0,0 +1,382 @@
+"""Framed ML-KEM handshake between agents, with session tickets.
+
+The protocol objects are sans-IO: feed them received bytes and send back
+whatever they return. Every frame is ``version, type, length`` followed by
+the payload. A full handshake takes one round trip plus a final flight:
+
+    client                                  server
+    HELLO (kem, random, public key)   ->
+                                      <-    CIPHERTEXT (random, ticket id,
+                                            lifetime, ciphertext)
+                                      <-    FINISHED (server MAC)
+    FINISHED (client MAC)             ->
+
+Keys come from HKDF-SHA256 over the shared secret, salted with both
+randoms; each FINISHED is an HMAC over the transcript so far, confirming
+that both sides hold the same keys. The server remembers a resumption
+secret under the ticket id (once the client's FINISHED checks out), and a
+reconnecting client can send RESUME (random, ticket id) instead of HELLO:
+the server answers RESUMED (random, new ticket id, lifetime) and the keys
+are derived from the resumption secret, skipping the KEM. Tickets are
+single use. An unknown or expired ticket gets RETRY, and the client falls
+back to a full handshake on the same connection.
+
+Peers are not authenticated; this protects against passive (harvest now,
+decrypt later) attackers only.
+"""
+
+import hashlib
+import hmac
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple
+
+import oqs
+
+from quantdog.client.security.keypool import KeypairPool
+
+VERSION = 1
+
+HELLO = 1
+CIPHERTEXT = 2
+RESUME = 3
+RESUMED = 4
+RETRY = 5
+FINISHED = 6
+
+_HEADER = struct.Struct("!BBH")
+_LIFETIME = struct.Struct("!I")
+RANDOM_LENGTH = 32
+TICKET_ID_LENGTH = 16
+KEY_LENGTH = 32
+
+
+class HandshakeError(Exception):
+    """The peer broke the protocol or the keys did not match."""
+
+
+class Ticket(NamedTuple):
+    ticket_id: bytes
+    secret: bytes
+
+
+def _extract(salt: bytes, ikm: bytes) -> bytes:
+    return hmac.digest(salt, ikm, "sha256")
+
+
+def _expand(prk: bytes, info: bytes, length: int = KEY_LENGTH) -> bytes:
+    output = block = b""
+    counter = 1
+    while len(output) < length:
+        block = hmac.digest(prk, block + info + bytes([counter]), "sha256")
+        output += block
+        counter += 1
+    return output[:length]
+
+
+def encode_frame(frame_type: int, payload: bytes = b"") -> bytes:
+    return _HEADER.pack(VERSION, frame_type, len(payload)) + payload
+
+
+class FrameBuffer:
+    """Splits a byte stream into ``(type, payload, raw frame)`` tuples."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[tuple[int, bytes, bytes]]:
+        self._buffer += data
+        frames = []
+        while len(self._buffer) >= _HEADER.size:
+            version, frame_type, length = _HEADER.unpack_from(self._buffer)
+            if version != VERSION:
+                raise HandshakeError(f"Unsupported version {version}")
+            end = _HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            raw = bytes(self._buffer[:end])
+            del self._buffer[:end]
+            frames.append((frame_type, raw[_HEADER.size :], raw))
+        return frames
+
+
+class TicketStore:
+    """Bounded store of tickets that expire after their lifetime.
+
+    The server keys tickets by id, the client by peer address.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        lifetime: float = 86400.0,
+        clock=time.time,
+    ):
+        self.capacity = capacity
+        self.lifetime = lifetime
+        self.clock = clock
+        self._tickets: OrderedDict[bytes | str, tuple[Ticket, float]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def put(self, key: bytes | str, ticket: Ticket, lifetime: float):
+        with self._lock:
+            self._tickets[key] = (ticket, self.clock() + lifetime)
+            self._tickets.move_to_end(key)
+            while len(self._tickets) > self.capacity:
+                self._tickets.popitem(last=False)
+
+    def pop(self, key: bytes | str) -> Ticket | None:
+        """Take a ticket out; tickets are single use."""
+        with self._lock:
+            entry = self._tickets.pop(key, None)
+        if entry is None or entry[1] <= self.clock():
+            return None
+        return entry[0]
+
+
+class _Handshake:
+    def __init__(self):
+        self.frames = FrameBuffer()
+        self.transcript = hashlib.sha256()
+        self.complete = False
+        self.resumed = False
+        self.session_key: bytes | None = None
+        self._prk = b""
+        self._expected_finished = b""
+
+    def _send(self, frame_type: int, payload: bytes = b"") -> bytes:
+        frame = encode_frame(frame_type, payload)
+        self.transcript.update(frame)
+        return frame
+
+    def _derive(self, client_random: bytes, server_random: bytes, ikm: bytes):
+        self._prk = _extract(client_random + server_random, ikm)
+
+    def _finished(self, label: bytes) -> bytes:
+        return hmac.digest(
+            _expand(self._prk, label), self.transcript.digest(), "sha256"
+        )
+
+    def _check_finished(self, payload: bytes):
+        if not hmac.compare_digest(payload, self._expected_finished):
+            raise HandshakeError("Finished MAC mismatch")
+
+    def _keys(self) -> tuple[bytes, bytes]:
+        """Session key and resumption secret, bound to the transcript."""
+        context = self.transcript.digest()
+        return (
+            _expand(self._prk, b"quantdog session key" + context),
+            _expand(self._prk, b"quantdog resumption" + context),
+        )
+
+    def receive_data(self, data: bytes) -> bytes:
+        """Process received bytes; returns the bytes to send back."""
+        output = b""
+        for frame_type, payload, raw in self.frames.feed(data):
+            if self.complete:
+                raise HandshakeError("Data after the handshake completed")
+            output += self._receive(frame_type, payload, raw)
+        return output
+
+    def _receive(self, frame_type: int, payload: bytes, raw: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class ClientHandshake(_Handshake):
+    """Client side: starts with HELLO, or RESUME when given a ticket.
+
+    Takes its keypair from ``keypairs`` if given, instead of generating it.
+    """
+
+    def __init__(
+        self,
+        kemalg: str,
+        ticket: Ticket | None = None,
+        kem_factory: Callable = oqs.KeyEncapsulation,
+        keypairs: KeypairPool | None = None,
+    ):
+        super().__init__()
+        if keypairs is not None and keypairs.kemalg != kemalg:
+            raise ValueError(f"Keypair pool is for {keypairs.kemalg}")
+        self.kemalg = kemalg
+        self.ticket = ticket
+        self.kem_factory = kem_factory
+        self.keypairs = keypairs
+        self.new_ticket: Ticket | None = None
+        self.lifetime = 0
+        self._random = os.urandom(RANDOM_LENGTH)
+        self._kem = None
+        self._new_ticket_id = b""
+        self._state = "start"
+
+    def initiate(self) -> bytes:
+        if self.ticket is not None:
+            self._state = "resume"
+            return self._send(RESUME, self._random + self.ticket.ticket_id)
+        return self._hello()
+
+    def _hello(self) -> bytes:
+        self._state = "hello"
+        if self.keypairs is not None:
+            self._kem, public_key = self.keypairs.take()
+        else:
+            self._kem = self.kem_factory(self.kemalg)
+            public_key = self._kem.generate_keypair()
+        alg = self.kemalg.encode()
+        return self._send(
+            HELLO, bytes([len(alg)]) + alg + self._random + public_key
+        )
+
+    def _receive(self, frame_type: int, payload: bytes, raw: bytes) -> bytes:
+        if frame_type == RETRY and self._state == "resume":
+            self.transcript.update(raw)
+            self.ticket = None
+            return self._hello()
+
+        if frame_type == CIPHERTEXT and self._state == "hello":
+            self.transcript.update(raw)
+            server_random, ticket_id, lifetime, ciphertext = _split_keyed(
+                payload
+            )
+            if not ciphertext:
+                raise HandshakeError("Malformed CIPHERTEXT frame")
+            try:
+                shared_secret = self._kem.decap_secret(ciphertext)
+            finally:
+                self._kem.free()
+                self._kem = None
+            self._keyed(server_random, shared_secret, ticket_id, lifetime)
+            return b""
+
+        if frame_type == RESUMED and self._state == "resume":
+            self.transcript.update(raw)
+            server_random, ticket_id, lifetime, rest = _split_keyed(payload)
+            if rest:
+                raise HandshakeError("Malformed RESUMED frame")
+            self.resumed = True
+            self._keyed(server_random, self.ticket.secret, ticket_id, lifetime)
+            return b""
+
+        if frame_type == FINISHED and self._state == "keyed":
+            self._check_finished(payload)
+            self.transcript.update(raw)
+            output = self._send(FINISHED, self._finished(b"client finished"))
+            self.session_key, secret = self._keys()
+            self.new_ticket = Ticket(self._new_ticket_id, secret)
+            self.complete = True
+            return output
+
+        raise HandshakeError(f"Unexpected frame {frame_type} in {self._state}")
+
+    def _keyed(
+        self, server_random: bytes, ikm: bytes, ticket_id: bytes, lifetime: int
+    ):
+        self._derive(self._random, server_random, ikm)
+        self._expected_finished = self._finished(b"server finished")
+        self._new_ticket_id = ticket_id
+        self.lifetime = lifetime
+        self._state = "keyed"
+
+
+class ServerHandshake(_Handshake):
+    """Server side: answers HELLO with a ciphertext, RESUME from a ticket."""
+
+    def __init__(
+        self,
+        kemalgs: set[str],
+        tickets: TicketStore,
+        kem_factory: Callable = oqs.KeyEncapsulation,
+    ):
+        super().__init__()
+        self.kemalgs = kemalgs
+        self.tickets = tickets
+        self.kem_factory = kem_factory
+        self._ticket_id = os.urandom(TICKET_ID_LENGTH)
+        self._kemalg = ""
+        self._state = "start"
+
+    def _keyed_payload(self, client_random: bytes, ikm: bytes) -> bytes:
+        server_random = os.urandom(RANDOM_LENGTH)
+        self._derive(client_random, server_random, ikm)
+        lifetime = int(self.tickets.lifetime)
+        return server_random + self._ticket_id + _LIFETIME.pack(lifetime)
+
+    def _receive(self, frame_type: int, payload: bytes, raw: bytes) -> bytes:
+        self.transcript.update(raw)
+
+        if frame_type == RESUME and self._state == "start":
+            client_random = payload[:RANDOM_LENGTH]
+            ticket = self.tickets.pop(payload[RANDOM_LENGTH:])
+            if len(client_random) != RANDOM_LENGTH or ticket is None:
+                self._state = "retry"
+                return self._send(RETRY)
+            self.resumed = True
+            output = self._send(
+                RESUMED, self._keyed_payload(client_random, ticket.secret)
+            )
+            return output + self._server_finished()
+
+        if frame_type == HELLO and self._state in ("start", "retry"):
+            client_random, public_key = self._parse_hello(payload)
+            with self.kem_factory(self._kemalg) as kem:
+                ciphertext, shared_secret = kem.encap_secret(public_key)
+            output = self._send(
+                CIPHERTEXT,
+                self._keyed_payload(client_random, shared_secret) + ciphertext,
+            )
+            return output + self._server_finished()
+
+        if frame_type == FINISHED and self._state == "keyed":
+            self._check_finished(payload)
+            self.session_key, secret = self._keys()
+            # Only a client that proved it holds the keys gets a ticket
+            self.tickets.put(
+                self._ticket_id,
+                Ticket(self._ticket_id, secret),
+                self.tickets.lifetime,
+            )
+            self.complete = True
+            return b""
+
+        raise HandshakeError(f"Unexpected frame {frame_type} in {self._state}")
+
+    def _parse_hello(self, payload: bytes) -> tuple[bytes, bytes]:
+        if not payload:
+            raise HandshakeError("Malformed HELLO frame")
+        alg_end = 1 + payload[0]
+        self._kemalg = payload[1:alg_end].decode(errors="replace")
+        if self._kemalg not in self.kemalgs:
+            raise HandshakeError(f"Unsupported KEM {self._kemalg}")
+        client_random = payload[alg_end : alg_end + RANDOM_LENGTH]
+        public_key = payload[alg_end + RANDOM_LENGTH :]
+        if len(client_random) != RANDOM_LENGTH or not public_key:
+            raise HandshakeError("Malformed HELLO frame")
+        return client_random, public_key
+
+    def _server_finished(self) -> bytes:
+        output = self._send(FINISHED, self._finished(b"server finished"))
+        self._expected_finished = self._finished(b"client finished")
+        self._state = "keyed"
+        return output
+
+
+def _split_keyed(payload: bytes) -> tuple[bytes, bytes, int, bytes]:
+    """Split a CIPHERTEXT or RESUMED payload."""
+    header = RANDOM_LENGTH + TICKET_ID_LENGTH + _LIFETIME.size
+    if len(payload) < header:
+        raise HandshakeError("Malformed key frame")
+    server_random = payload[:RANDOM_LENGTH]
+    ticket_id = payload[RANDOM_LENGTH : RANDOM_LENGTH + TICKET_ID_LENGTH]
+    (lifetime,) = _LIFETIME.unpack_from(
+        payload, RANDOM_LENGTH + TICKET_ID_LENGTH
+    )
+    return server_random, ticket_id, lifetime, payload[header:]
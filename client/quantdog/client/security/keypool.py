@@ -0,0 +1,113 @@
+"""Pregenerated ML-KEM keypairs for client handshakes.
+
+Key generation is the client's most expensive KEM operation. A worker
+thread keeps a pool topped up to ``depth`` keypairs, so a handshake takes
+one in O(1) and a burst of new destinations only drains the pool. The
+worker spends its time inside liboqs (through ctypes, which drops the
+GIL), so refilling runs alongside packet processing. Each keypair is
+handed out once: every handshake still gets a fresh ephemeral key.
+
+When a burst outruns the pool, ``take`` generates a keypair inline rather
+than blocking on the worker, and counts a miss; a pool that keeps missing
+needs a larger depth.
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+import oqs
+
+
+class KeypairPool:
+    """Keeps up to ``depth`` fresh keypairs for ``kemalg`` ready."""
+
+    def __init__(
+        self,
+        kemalg: str,
+        depth: int = 32,
+        kem_factory: Callable = oqs.KeyEncapsulation,
+    ):
+        self.kemalg = kemalg
+        self.depth = depth
+        self.kem_factory = kem_factory
+        # (KEM holding the secret key, public key)
+        self._keypairs: deque = deque()
+        self._refill = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self.taken = 0
+        self.misses = 0
+        self.generated = 0
+        self.generating_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keypairs)
+
+    def _generate(self) -> tuple:
+        kem = self.kem_factory(self.kemalg)
+        return kem, kem.generate_keypair()
+
+    def start(self):
+        """Start the refill thread (in the process that will use it)."""
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="kem-keypairs", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._refill:
+            self._running = False
+            self._refill.notify()
+        self._thread.join(timeout=5)
+        self._thread = None
+        while self._keypairs:
+            kem, _ = self._keypairs.popleft()
+            kem.free()
+
+    def _run(self):
+        while True:
+            with self._refill:
+                while self._running and len(self._keypairs) >= self.depth:
+                    self._refill.wait()
+                if not self._running:
+                    return
+            start = time.perf_counter()
+            keypair = self._generate()
+            elapsed = time.perf_counter() - start
+            with self._refill:
+                self._keypairs.append(keypair)
+                self.generated += 1
+                self.generating_time += elapsed
+
+    def take(self) -> tuple:
+        """A fresh (KEM, public key) pair; the caller frees the KEM."""
+        with self._refill:
+            self.taken += 1
+            if self._keypairs:
+                keypair = self._keypairs.popleft()
+                self._refill.notify()
+                return keypair
+            self.misses += 1
+            self._refill.notify()
+        return self._generate()
+
+    def stats(self) -> dict[str, int | float]:
+        with self._refill:
+            return {
+                "depth": len(self._keypairs),
+                "target_depth": self.depth,
+                "taken": self.taken,
+                "misses": self.misses,
+                "generated": self.generated,
+                # Keypairs per second the worker sustains while refilling
+                "refill_rate": round(self.generated / self.generating_time, 1)
+                if self.generating_time
+                else 0.0,
+            }
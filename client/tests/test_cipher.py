@@ -0,0 +1,119 @@
+import os
+
+import pytest
+
+from quantdog.client.network.pqc_listener_tcp import PQCListenerTCP
+from quantdog.client.network.sessions import SessionKeyCache
+from quantdog.client.security.cipher import (
+    RECORD_HEADER,
+    Flow,
+    FlowCiphers,
+    FlowsExhausted,
+    RecordError,
+    ReplayWindow,
+    parse_record_header,
+    session_id,
+)
+
+SESSION_KEY = os.urandom(32)
+FLOW = Flow(6, 40000, 443)
+
+
+def test_replay_window():
+    window = ReplayWindow(size=8)
+    for seq in (0, 2, 1, 10):
+        assert window.check(seq)
+        window.update(seq)
+    # Seen, or fallen out of the window
+    assert not window.check(10)
+    assert not window.check(2)
+    assert window.check(9)
+    assert window.check(3)
+    window.update(3)
+    assert not window.check(3)
+    # A jump past the whole window forgets everything before it
+    window.update(100)
+    assert window.bitmap == 1
+    assert not window.check(92)
+    assert window.check(93)
+
+
+@pytest.mark.parametrize("cipher", ["aes-256-gcm", "chacha20-poly1305"])
+def test_records_round_trip_once(cipher):
+    sealers = FlowCiphers(cipher, direction=b"c2s")
+    openers = FlowCiphers(cipher, direction=b"c2s")
+    records = [
+        sealers.seal("server", SESSION_KEY, FLOW, f"payload {n}".encode())
+        for n in range(3)
+    ]
+    length, session, flow, _ = parse_record_header(records[0])
+    assert (length, session, flow) == (
+        len(records[0]),
+        session_id(SESSION_KEY),
+        FLOW,
+    )
+
+    # Out of order is fine, twice is not
+    for n in (2, 0, 1):
+        payload = openers.open("client", SESSION_KEY, records[n])
+        assert payload == f"payload {n}".encode()
+    with pytest.raises(RecordError, match="Replayed"):
+        openers.open("client", SESSION_KEY, records[1])
+
+
+def test_tampered_records_are_rejected():
+    sealers, openers = FlowCiphers(), FlowCiphers()
+    record = bytearray(sealers.seal("server", SESSION_KEY, FLOW, b"payload"))
+    # The header is authenticated too
+    for offset in (RECORD_HEADER.size - 9, len(record) - 1):
+        tampered = bytearray(record)
+        tampered[offset] ^= 1
+        with pytest.raises(RecordError, match="authentication"):
+            openers.open("client", SESSION_KEY, bytes(tampered))
+    # Failed records do not move the window
+    assert openers.open("client", SESSION_KEY, bytes(record)) == b"payload"
+    with pytest.raises(RecordError):
+        FlowCiphers(direction=b"s2c").open("client", SESSION_KEY, record)
+
+
+def test_new_session_key_drops_flow_state():
+    sealers, openers = FlowCiphers(), FlowCiphers()
+    first = sealers.sealer("server", SESSION_KEY, FLOW)
+    assert sealers.sealer("server", SESSION_KEY, FLOW) is first
+    assert sealers.sealer("server", os.urandom(32), FLOW) is not first
+
+    record = first.seal(b"payload")
+    with pytest.raises(RecordError):
+        openers.open("client", os.urandom(32), record)
+
+
+def test_sessions_are_capped_at_max_flows():
+    sealers = FlowCiphers(max_flows=2)
+    for port in (1, 2):
+        sealers.sealer("server", SESSION_KEY, Flow(6, port, 443))
+    # Known flows keep sealing
+    sealers.seal("server", SESSION_KEY, Flow(6, 1, 443), b"payload")
+    with pytest.raises(FlowsExhausted):
+        sealers.sealer("server", SESSION_KEY, Flow(6, 3, 443))
+    # A renegotiated session starts over
+    sealers.sealer("server", os.urandom(32), Flow(6, 3, 443))
+
+
+def test_listener_opens_each_workers_session():
+    sessions = SessionKeyCache()
+    listener = PQCListenerTCP(sessions=sessions)
+    # Two workers of one client, each with a session of its own
+    workers = [(FlowCiphers(), os.urandom(32)) for _ in range(2)]
+    for _, key in workers:
+        sessions.put(session_id(key), key)
+
+    for n in range(3):
+        for worker, (sealers, key) in enumerate(workers):
+            flow = Flow(6, 40000 + worker, 443)
+            record = sealers.seal("server", key, flow, bytes([n]))
+            assert listener.open_record("10.0.0.1", record) == bytes([n])
+    assert listener.stats()["records_dropped"] == 0
+
+    sessions.invalidate(session_id(workers[0][1]))
+    record = workers[0][0].seal("server", workers[0][1], FLOW, b"payload")
+    assert listener.open_record("10.0.0.1", record) is None
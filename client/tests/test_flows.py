@@ -0,0 +1,76 @@
+import struct
+
+from quantdog.client.network.flows import (
+    CLOSING,
+    ESTABLISHED,
+    NEW,
+    FlowTable,
+)
+from quantdog.client.network.headers import (
+    IPPROTO_TCP,
+    TCP_ACK,
+    TCP_FIN,
+    TCP_RST,
+    TCP_SYN,
+    parse_packet,
+)
+
+
+def _segment(src_port: int, flags: int):
+    ip = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0,
+        40,
+        0,
+        0,
+        64,
+        IPPROTO_TCP,
+        0,
+        bytes((10, 117, 0, 2)),
+        bytes((192, 0, 2, 1)),
+    )
+    tcp = struct.pack("!HHIIBBHHH", src_port, 443, 0, 0, 5 << 4, flags, 0, 0, 0)
+    return parse_packet(bytearray(ip + tcp))
+
+
+def test_tcp_lifecycle():
+    table = FlowTable()
+    flow = table.track(_segment(1000, TCP_SYN), now=0.0)
+    assert flow.state == NEW
+    assert table.track(_segment(1000, TCP_ACK), now=1.0) is flow
+    assert flow.state == ESTABLISHED
+    table.track(_segment(1000, TCP_FIN | TCP_ACK), now=2.0)
+    assert flow.state == CLOSING
+    assert flow.packets == 3
+
+    # Mid-stream segments start out established
+    other = table.track(_segment(2000, TCP_ACK), now=2.0)
+    assert other.state == ESTABLISHED
+    # An RST ends the flow at once
+    assert table.track(_segment(2000, TCP_RST), now=3.0) is other
+    assert table.get(other.key) is None
+    assert table.stats()["closed"] == 1
+
+
+def test_sweep_uses_each_states_timeout():
+    table = FlowTable(syn_timeout=5.0, idle_timeout=50.0, closing_timeout=1.0)
+    table.track(_segment(1000, TCP_SYN), now=0.0)
+    table.track(_segment(2000, TCP_ACK), now=0.0)
+    table.track(_segment(3000, TCP_SYN), now=0.0)
+    table.track(_segment(3000, TCP_FIN | TCP_ACK), now=0.0)
+    assert table.sweep(now=2.0) == 1
+    assert table.sweep(now=10.0) == 1
+    assert len(table) == 1
+    assert table.sweep(now=60.0) == 1
+    assert table.stats()["expired"] == 3
+
+
+def test_half_open_flows_are_evicted_first():
+    table = FlowTable(capacity=3)
+    established = table.track(_segment(1000, TCP_ACK), now=0.0)
+    for port in range(2000, 2005):
+        table.track(_segment(port, TCP_SYN), now=1.0)
+    assert len(table) == 3
+    assert table.get(established.key) is established
+    assert table.stats()["evicted"] == 3
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import os
+import select
+import socket
+import time
+
+import pytest
+
+from quantdog.client.common import settings
+from quantdog.client.network import handshakes
+from quantdog.client.network.handshakes import HandshakeManager, kem_handshake
+from quantdog.client.network.sessions import NO_SERVER, SessionKeyCache
+from quantdog.client.security.handshake import (
+    ClientHandshake,
+    HandshakeError,
+    ServerHandshake,
+    Ticket,
+    TicketStore,
+)
+from quantdog.client.security.keypool import KeypairPool
+
+KEMALG = "ML-KEM-512"
+HOST = "127.0.0.1"
+
+
+class FakeKEM:
+    """Stands in for liboqs: the shared secret hashes both keys."""
+
+    def __init__(self, kemalg: str):
+        self.kemalg = kemalg
+        self.public_key = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.free()
+
+    def generate_keypair(self) -> bytes:
+        self.public_key = os.urandom(32)
+        return self.public_key
+
+    def encap_secret(self, public_key: bytes) -> tuple[bytes, bytes]:
+        ciphertext = os.urandom(32)
+        return ciphertext, hashlib.sha256(public_key + ciphertext).digest()
+
+    def decap_secret(self, ciphertext: bytes) -> bytes:
+        return hashlib.sha256(self.public_key + ciphertext).digest()
+
+    def free(self):
+        pass
+
+
+def _agents(server_tickets: TicketStore, ticket: Ticket | None = None):
+    client = ClientHandshake(KEMALG, ticket=ticket, kem_factory=FakeKEM)
+    server = ServerHandshake({KEMALG}, server_tickets, kem_factory=FakeKEM)
+    return client, server
+
+
+def _run(client: ClientHandshake, server: ServerHandshake):
+    data = client.initiate()
+    while not (client.complete and server.complete):
+        data = client.receive_data(server.receive_data(data))
+
+
+async def _loopback(handshakes: int, client_tickets: TicketStore):
+    """Handshakes against a server agent on a local port.
+
+    Returns (client key, server key, resumed) for each.
+    """
+    server_tickets = TicketStore()
+    results = []
+
+    async def serve(reader, writer):
+        handshake = ServerHandshake(
+            {KEMALG}, server_tickets, kem_factory=FakeKEM
+        )
+        try:
+            while not handshake.complete:
+                data = await reader.read(4096)
+                if not data:
+                    return
+                writer.write(handshake.receive_data(data))
+            results.append((handshake.session_key, handshake.resumed))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(serve, HOST, 0)
+    port = server.sockets[0].getsockname()[1]
+    keypairs = KeypairPool(KEMALG, depth=1, kem_factory=FakeKEM)
+    keys = []
+    async with server:
+        for _ in range(handshakes):
+            keys.append(
+                await kem_handshake(HOST, port, client_tickets, keypairs)
+            )
+            # The server reads the client's FINISHED after it was sent
+            while len(results) < len(keys):
+                await asyncio.sleep(0.001)
+    return [(key, *result) for key, result in zip(keys, results, strict=True)]
+
+
+def test_agents_agree_over_loopback_and_resume():
+    client_tickets = TicketStore()
+    results = asyncio.run(_loopback(3, client_tickets))
+    for client_key, server_key, _ in results:
+        assert client_key == server_key
+    assert [resumed for _, _, resumed in results] == [False, True, True]
+    assert len({client_key for client_key, _, _ in results}) == 3
+    assert len(client_tickets) == 1
+
+
+def test_handshake_connection_carries_the_uplink_mark(monkeypatch):
+    marks = []
+    open_connection = asyncio.open_connection
+
+    async def recording(*args, sock, **kwargs):
+        marks.append(sock.getsockopt(socket.SOL_SOCKET, socket.SO_MARK))
+        return await open_connection(*args, sock=sock, **kwargs)
+
+    monkeypatch.setattr(handshakes.asyncio, "open_connection", recording)
+    asyncio.run(_loopback(1, TicketStore()))
+    assert marks == [settings.uplink_mark]
+
+
+def test_tampered_finished_is_rejected():
+    client, server = _agents(TicketStore())
+    flight = bytearray(server.receive_data(client.initiate()))
+    # The server's FINISHED MAC ends its flight
+    flight[-1] ^= 1
+    with pytest.raises(HandshakeError, match="MAC"):
+        client.receive_data(bytes(flight))
+
+    server_tickets = TicketStore()
+    client, server = _agents(server_tickets)
+    finished = bytearray(
+        client.receive_data(server.receive_data(client.initiate()))
+    )
+    finished[-1] ^= 1
+    with pytest.raises(HandshakeError, match="MAC"):
+        server.receive_data(bytes(finished))
+    # Only a client that proved its keys gets a ticket
+    assert len(server_tickets) == 0
+
+
+def test_unknown_ticket_falls_back_to_a_full_handshake():
+    stale = Ticket(os.urandom(16), os.urandom(32))
+    client, server = _agents(TicketStore(), ticket=stale)
+    _run(client, server)
+    assert not client.resumed
+    assert not server.resumed
+    assert client.session_key == server.session_key
+
+
+def test_tickets_are_single_use():
+    server_tickets = TicketStore()
+    client, server = _agents(server_tickets)
+    _run(client, server)
+    ticket = client.new_ticket
+
+    resumed_client, resumed_server = _agents(server_tickets, ticket=ticket)
+    _run(resumed_client, resumed_server)
+    assert resumed_client.resumed
+    assert resumed_client.session_key == resumed_server.session_key
+
+    # Replaying the ticket gets RETRY and a full handshake
+    replay_client, replay_server = _agents(server_tickets, ticket=ticket)
+    _run(replay_client, replay_server)
+    assert not replay_client.resumed
+    assert replay_client.session_key == replay_server.session_key
+
+
+def test_ticket_store_expires_tickets():
+    now = [0.0]
+    store = TicketStore(capacity=2, clock=lambda: now[0])
+    ticket = Ticket(b"id", b"secret")
+    store.put("a", ticket, 10.0)
+    store.put("b", ticket, 10.0)
+    store.put("c", ticket, 10.0)
+    assert store.pop("a") is None
+    now[0] = 10.0
+    assert store.pop("b") is None
+    assert len(store) == 1
+
+
+def test_keys_are_published_with_the_parked_packets():
+    cache = SessionKeyCache()
+    finished = {}
+
+    async def handshake(peer: str) -> bytes:
+        await asyncio.sleep(0.01)
+        finished[peer] = True
+        if peer == "10.0.0.2":
+            raise OSError("Connection refused")
+        return b"key"
+
+    manager = HandshakeManager(cache, handshake=handshake)
+    manager.start()
+    try:
+        assert manager.park("10.0.0.1", memoryview(b"first"))
+        assert manager.park("10.0.0.2", memoryview(b"other"))
+        while len(finished) < 2:
+            time.sleep(0.01)
+        # Until the packet thread takes the result, packets keep queueing
+        # behind the parked ones
+        assert cache.get("10.0.0.1") is None
+        assert manager.park("10.0.0.1", memoryview(b"second"))
+
+        done = []
+        while len(done) < 2:
+            select.select([manager.wakeup_fd], [], [], 1.0)
+            done += manager.completed()
+    finally:
+        manager.stop()
+
+    assert sorted(done) == [
+        ("10.0.0.1", True, [bytearray(b"first"), bytearray(b"second")]),
+        ("10.0.0.2", False, [bytearray(b"other")]),
+    ]
+    assert cache.get("10.0.0.1") == b"key"
+    assert cache.get("10.0.0.2") == NO_SERVER
+    assert manager.stats()["merged"] == 1
@@ -0,0 +1,85 @@
+import struct
+
+from quantdog.client.network.headers import (
+    IPPROTO_UDP,
+    checksum_adjust,
+    internet_checksum,
+    parse_packet,
+)
+
+
+def _udp_packet(payload: bytes = b"hello") -> bytearray:
+    header = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0,
+        20 + 8 + len(payload),
+        1,
+        0,
+        64,
+        IPPROTO_UDP,
+        0,
+        bytes((10, 117, 0, 2)),
+        bytes((192, 0, 2, 1)),
+    )
+    data = bytearray(header + struct.pack("!HHHH", 40000, 53, 8, 0))
+    data += payload
+    packet = parse_packet(data)
+    return packet.with_payload(payload).data.obj
+
+
+def _valid(data) -> bool:
+    """Both checksums of a UDP packet verify."""
+    data = bytes(data)
+    segment = data[20:]
+    pseudo = (
+        data[12:20] + bytes((0, IPPROTO_UDP)) + struct.pack("!H", len(segment))
+    )
+    return (
+        internet_checksum(data[:20]) == 0
+        and internet_checksum(pseudo + segment) == 0
+    )
+
+
+def test_internet_checksum():
+    # RFC 1071, section 3
+    assert internet_checksum(bytes.fromhex("0001f203f4f5f6f7")) == 0x220D
+    # Odd lengths are padded with a zero byte
+    assert internet_checksum(b"\x01") == internet_checksum(b"\x01\x00")
+    assert internet_checksum(b"\x00\x00") == 0xFFFF
+    assert internet_checksum(b"\xff\xff") == 0
+
+
+def test_checksum_adjust_matches_recomputing():
+    data = bytearray(bytes.fromhex("4500003c1c4640004006") + bytes(10))
+    data[12:20] = bytes((10, 0, 0, 1, 10, 0, 0, 2))
+    struct.pack_into("!H", data, 10, internet_checksum(data))
+    old = struct.unpack_from("!I", data, 16)[0]
+    new = 0xC0000201
+    struct.pack_into("!I", data, 16, new)
+    adjusted = checksum_adjust(struct.unpack_from("!H", data, 10)[0], old, new)
+    struct.pack_into("!H", data, 10, 0)
+    assert adjusted == internet_checksum(data)
+
+
+def test_rewrites_keep_checksums_valid():
+    data = _udp_packet()
+    assert _valid(data)
+    packet = parse_packet(data)
+    packet.set_dst("10.118.0.7")
+    packet.set_dst_port(11777)
+    assert packet.dst == "10.118.0.7"
+    assert packet.dst_port == 11777
+    assert _valid(data)
+
+    longer = packet.with_payload(b"a longer payload")
+    assert bytes(longer.payload) == b"a longer payload"
+    assert _valid(longer.data)
+
+
+def test_parse_rejects_garbage():
+    assert parse_packet(b"") is None
+    assert parse_packet(bytes(20)) is None
+    data = _udp_packet()
+    # Total length beyond the buffer
+    assert parse_packet(data[:-1]) is None
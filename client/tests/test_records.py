@@ -0,0 +1,114 @@
+import os
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from quantdog.client.network import packets
+from quantdog.client.network.headers import IPPROTO_TCP, TCP_ACK, parse_packet
+from quantdog.client.network.pqc_listener_tcp import PQCListenerTCP
+from quantdog.client.network.records import RecordUplink
+from quantdog.client.network.sessions import SessionKeyCache
+from quantdog.client.security.cipher import session_id
+
+HOST = "127.0.0.1"
+
+
+def _segment(dst_port: int, seq: int, payload: bytes):
+    ip = struct.pack(
+        "!BBHHHBBH4s4s",
+        0x45,
+        0,
+        40 + len(payload),
+        0,
+        0,
+        64,
+        IPPROTO_TCP,
+        0,
+        bytes((10, 117, 0, 2)),
+        socket.inet_aton(HOST),
+    )
+    tcp = struct.pack(
+        "!HHIIBBHHH", 40000, dst_port, seq, 0, 5 << 4, TCP_ACK, 0, 0, 0
+    )
+    return parse_packet(bytearray(ip + tcp + payload))
+
+
+def _wait(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def service():
+    """A local service on the flow's port, collecting what it receives."""
+    server = socket.create_server((HOST, 0))
+    received = bytearray()
+
+    def serve():
+        connection, _ = server.accept()
+        with connection:
+            while data := connection.recv(65536):
+                received.extend(data)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield server.getsockname()[1], received
+    server.close()
+
+
+@pytest.fixture
+def listener():
+    listener = PQCListenerTCP(HOST, 0, sessions=SessionKeyCache())
+    thread = threading.Thread(target=listener.start, daemon=True)
+    thread.start()
+    _wait(lambda: listener.is_running)
+    yield listener
+    listener.stop()
+    thread.join()
+
+
+def test_sealed_payloads_reach_the_service_once(monkeypatch, service, listener):
+    port, received = service
+    key = os.urandom(32)
+    listener.sessions.put(session_id(key), key)
+    secrets = SessionKeyCache()
+    secrets.put(HOST, key)
+    uplink = RecordUplink(listener.port, mark=0)
+    monkeypatch.setattr(packets, "SECRET_CACHE", secrets)
+    monkeypatch.setattr(packets, "RECORDS", uplink)
+
+    for seq, payload in [
+        (1000, b"hello "),
+        # A retransmission, one overlapping what was sent, and one past a
+        # gap that waits for the missing bytes
+        (1000, b"hello "),
+        (1003, b"lo wor"),
+        (1012, b"!"),
+        (1009, b"ld!"),
+    ]:
+        assert packets.process_packet(_segment(port, seq, payload)) is None
+    _wait(lambda: not uplink.pending)
+
+    _wait(lambda: len(received) >= len(b"hello world!"))
+    assert bytes(received) == b"hello world!"
+    assert listener.stats()["records_opened"] == 3
+    assert uplink.stats()["connections_opened"] == 1
+    uplink.close()
+
+
+def test_unreachable_listener_refuses_records():
+    closed = socket.create_server((HOST, 0))
+    port = closed.getsockname()[1]
+    closed.close()
+
+    uplink = RecordUplink(port, mark=0)
+    uplink.send(HOST, b"record")
+    _wait(lambda: (uplink.flush(), not uplink.pending)[1])
+    assert uplink.stats()["record_streams"] == 0
+    assert uplink.stats()["connections_failed"] == 1
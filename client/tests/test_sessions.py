@@ -0,0 +1,58 @@
+from quantdog.client.network.sessions import NO_SERVER, SessionKeyCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_keys_expire_and_bump_the_generation():
+    clock = Clock()
+    cache = SessionKeyCache(ttl=10.0, clock=clock)
+    cache.put("10.0.0.1", b"key")
+    generation = cache.generation
+    assert cache.lookup("10.0.0.1") == (b"key", 10.0)
+
+    clock.now = 10.0
+    assert cache.get("10.0.0.1") is None
+    assert cache.generation == generation + 1
+    assert len(cache) == 0
+    assert cache.stats()["expirations"] == 1
+
+
+def test_negative_entries_back_off_exponentially():
+    clock = Clock()
+    cache = SessionKeyCache(
+        negative_ttl=30.0, max_negative_ttl=100.0, clock=clock
+    )
+    backoffs = []
+    for _ in range(4):
+        backoffs.append(cache.put_negative("10.0.0.1"))
+        assert cache.get("10.0.0.1") == NO_SERVER
+        clock.now += backoffs[-1]
+        # The expired entry still remembers the failures
+        assert cache.get("10.0.0.1") is None
+    assert backoffs == [30.0, 60.0, 100.0, 100.0]
+
+    # A key resets the count
+    cache.put("10.0.0.1", b"key")
+    assert cache.put_negative("10.0.0.1") == 30.0
+
+
+def test_least_recently_used_is_evicted():
+    cache = SessionKeyCache(capacity=2, clock=Clock())
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.stats()["evictions"] == 1
+
+    generation = cache.generation
+    cache.invalidate("a")
+    cache.invalidate("a")
+    assert cache.generation == generation + 1
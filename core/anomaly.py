@@ -0,0 +1,223 @@
+"""Streaming rate anomaly detection for honeypot interactions.
+
+Interactions are counted in fixed buckets (one second by default). For each
+honeypot, each source, and the fleet as a whole, the detector keeps an
+exponentially weighted mean and variance of the per-bucket count; a bucket
+whose count climbs past ``mean + zscore * std`` is flagged as a burst as soon
+as it does. Separately, a source that touches ``scan_threshold`` distinct
+honeypots within ``scan_window`` seconds is flagged as a scan. Scans are
+counted over two half-window buckets, the current one and the one before, so
+the count slides with time: any scan that completes within half a window is
+caught wherever it falls against the bucket edges, and nothing older than a
+full window is counted.
+
+Honeypot rates start from a learned rate of zero, since any traffic to a
+honeypot is unexpected; the fleet-wide rate is only judged after a short
+warm-up. Every event costs O(1): idle buckets are folded into the averages in closed
+form rather than one by one, and the per-key state is a small ``__slots__``
+object in an LRU map capped at ``max_keys``. State is per worker process.
+"""
+
+import math
+import time
+from collections import OrderedDict, deque
+
+
+class _Rate:
+    __slots__ = ("epoch", "count", "mean", "var", "weight", "buckets", "primed", "flagged")
+
+    def __init__(self, epoch: int, primed: bool = False):
+        self.epoch = epoch
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        # Share of the averages backed by observed buckets, to undo the
+        # bias toward the zero they start from. A primed rate trusts that
+        # zero: honeypots have no legitimate traffic to learn.
+        self.weight = 1.0 if primed else 0.0
+        self.buckets = 0
+        self.primed = primed
+        self.flagged = False
+
+    def roll(self, epoch: int, alpha: float) -> None:
+        """Fold the finished bucket (and any idle ones) into the averages."""
+        if epoch == self.epoch:
+            return
+        delta = self.count - self.mean
+        self.mean += alpha * delta
+        self.var = (1 - alpha) * (self.var + alpha * delta * delta)
+        self.weight += alpha * (1 - self.weight)
+        idle = epoch - self.epoch - 1
+        if idle > 0:
+            # k empty buckets: mean *= b and var = b * (var + mean^2 * (1 - b))
+            # with b = (1 - alpha) ** k
+            decay = (1 - alpha) ** idle
+            self.var = decay * (self.var + self.mean * self.mean * (1 - decay))
+            self.mean *= decay
+            self.weight = 1 - (1 - self.weight) * decay
+        self.buckets += idle + 1
+        self.epoch = epoch
+        self.count = 0
+        self.flagged = False
+
+
+class _Source:
+    __slots__ = ("rate", "window", "honeypots", "previous", "carried", "flagged")
+
+    def __init__(self, epoch: int, window: int):
+        self.rate = _Rate(epoch, primed=True)
+        self.window = window
+        self.honeypots: set[str] = set()
+        # Previous half-window bucket, and how many of its honeypots are not
+        # in the current one yet, so the sliding count is a sum
+        self.previous: set[str] = set()
+        self.carried = 0
+        self.flagged = False
+
+    def slide(self, window: int) -> None:
+        """Move the scan buckets forward to half-window ``window``."""
+        if window == self.window:
+            return
+        if window == self.window + 1:
+            self.previous = self.honeypots
+        else:
+            self.previous = set()
+        self.honeypots = set()
+        self.carried = len(self.previous)
+        self.window = window
+        self.flagged = False
+
+    def add(self, honeypot_id: str) -> int:
+        """Count a honeypot and return the distinct honeypots in the window."""
+        if honeypot_id not in self.honeypots:
+            self.honeypots.add(honeypot_id)
+            if honeypot_id in self.previous:
+                self.carried -= 1
+        return len(self.honeypots) + self.carried
+
+
+class RateAnomalyDetector:
+    """Flags interaction bursts per honeypot and fleet-wide, and source scans."""
+
+    def __init__(
+        self,
+        bucket_seconds: float = 1.0,
+        halflife_seconds: float = 60.0,
+        zscore: float = 4.0,
+        min_events: int = 10,
+        warmup_buckets: int = 10,
+        scan_threshold: int = 5,
+        scan_window: float = 10.0,
+        max_keys: int = 50000,
+        clock=time.monotonic,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = 1 - 0.5 ** (bucket_seconds / halflife_seconds)
+        self.zscore = zscore
+        self.min_events = min_events
+        self.warmup_buckets = warmup_buckets
+        self.scan_threshold = scan_threshold
+        self.scan_window = scan_window
+        self.max_keys = max_keys
+        self.clock = clock
+        self.fleet = _Rate(int(clock() // bucket_seconds))
+        self.honeypots: OrderedDict[str, _Rate] = OrderedDict()
+        self.sources: OrderedDict[str, _Source] = OrderedDict()
+        self.recent: deque[dict] = deque(maxlen=100)
+        self.detected: dict[str, int] = {
+            "rate_burst": 0,
+            "source_burst": 0,
+            "fleet_burst": 0,
+            "scan": 0,
+        }
+
+    def _lookup(self, table: OrderedDict, key: str, factory):
+        entry = table.get(key)
+        if entry is None:
+            if len(table) >= self.max_keys:
+                table.popitem(last=False)
+            entry = table[key] = factory()
+        else:
+            table.move_to_end(key)
+        return entry
+
+    def _burst(self, rate: _Rate, kind: str, key: str | None, now: float) -> dict | None:
+        rate.count += 1
+        if rate.flagged or rate.count < self.min_events:
+            return None
+        if not rate.primed and rate.buckets < self.warmup_buckets:
+            return None
+        mean = rate.mean / rate.weight
+        limit = mean + self.zscore * max(math.sqrt(rate.var / rate.weight), 1.0)
+        if rate.count <= limit:
+            return None
+        rate.flagged = True
+        return {
+            "type": kind,
+            "key": key,
+            "count": rate.count,
+            "expected": round(mean, 2),
+            "limit": round(limit, 2),
+            "bucket_seconds": self.bucket_seconds,
+            "timestamp": now,
+        }
+
+    def observe(self, honeypot_id: str, source: str | None = None) -> list[dict]:
+        """Count one interaction and return any anomalies it completes."""
+        now = self.clock()
+        epoch = int(now // self.bucket_seconds)
+        anomalies = []
+
+        self.fleet.roll(epoch, self.alpha)
+        anomaly = self._burst(self.fleet, "fleet_burst", None, now)
+        if anomaly:
+            anomalies.append(anomaly)
+
+        rate = self._lookup(self.honeypots, honeypot_id, lambda: _Rate(epoch, primed=True))
+        rate.roll(epoch, self.alpha)
+        anomaly = self._burst(rate, "rate_burst", honeypot_id, now)
+        if anomaly:
+            anomalies.append(anomaly)
+
+        if source:
+            window = int(now // (self.scan_window / 2))
+            entry = self._lookup(self.sources, source, lambda: _Source(epoch, window))
+            entry.rate.roll(epoch, self.alpha)
+            anomaly = self._burst(entry.rate, "source_burst", source, now)
+            if anomaly:
+                anomalies.append(anomaly)
+
+            entry.slide(window)
+            if not entry.flagged:
+                count = entry.add(honeypot_id)
+                if count >= self.scan_threshold:
+                    entry.flagged = True
+                    anomalies.append({
+                        "type": "scan",
+                        "key": source,
+                        "count": count,
+                        "honeypots": sorted(entry.honeypots | entry.previous),
+                        "window_seconds": self.scan_window,
+                        "timestamp": now,
+                    })
+                    # Only the threshold matters once flagged
+                    entry.honeypots.clear()
+                    entry.previous = set()
+                    entry.carried = 0
+
+        for anomaly in anomalies:
+            self.detected[anomaly["type"]] += 1
+            self.recent.append(anomaly)
+        return anomalies
+
+    def snapshot(self) -> dict:
+        """Get detector statistics and the most recent anomalies."""
+        return {
+            "tracked_honeypots": len(self.honeypots),
+            "tracked_sources": len(self.sources),
+            "fleet_rate_mean": round(
+                self.fleet.mean / (self.fleet.weight or 1) / self.bucket_seconds, 3
+            ),
+            "detected": dict(self.detected),
+            "recent": list(self.recent),
+        }
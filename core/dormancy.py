@@ -0,0 +1,88 @@
+"""Incremental scanner for long-dormant addresses that start spending again.
+
+A quantum attacker's easiest targets are old addresses whose public key is
+already on chain (because they spent before) and whose owners have not
+touched them in years. The scanner keeps one entry per address, the time and
+height of the block it last appeared in with a flag for an exposed public key,
+and each ``scan`` only walks blocks added since the previous one. The cost of
+a tick therefore depends on the new blocks, not on the size of the index, and
+blocks can be pruned from the chain once they have been scanned. Nothing is
+kept per block, so memory follows the number of addresses only.
+
+The scanner only sees the chain it is given. The local chain lives in memory,
+per worker, and starts empty at every boot, so no address in it can be idle
+for a multi-year ``dormancy_period``; activations only show up when that
+chain is seeded with historical blocks (as ``benchmarks/micro.py`` does).
+"""
+
+from datetime import datetime
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+
+class DormancyScanner:
+    """Flags spends from addresses idle for at least ``dormancy_period`` seconds."""
+
+    def __init__(self, blockchain, dormancy_period: float):
+        self.blockchain = blockchain
+        self.dormancy_period = dormancy_period
+        self.next_height = 0
+        # address -> (last seen block time, last seen height << 1 | public key exposed)
+        self._last_seen: dict[str, tuple[float, int]] = {}
+        self.activations_total = 0
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def last_seen(self, address: str) -> tuple[int, bool] | None:
+        """Get the height an address was last seen at and whether it has spent."""
+        entry = self._last_seen.get(address)
+        if entry is None:
+            return None
+        seen = entry[1]
+        return seen >> 1, bool(seen & 1)
+
+    def scan(self) -> list[dict]:
+        """Index blocks added since the last scan and return the activations."""
+        chain = self.blockchain
+        blocks, base_height = chain.blocks, chain.base_height
+        activations = []
+        last_seen = self._last_seen
+        for height in range(self.next_height, chain.height):
+            block = blocks[height - base_height]
+            block_time = datetime.fromisoformat(block["timestamp"]).timestamp()
+            for transaction in block["transactions"]:
+                sender = transaction["from"]
+                if sender is not None:
+                    previous = last_seen.get(sender)
+                    if previous is not None:
+                        idle = block_time - previous[0]
+                        if idle >= self.dormancy_period:
+                            activations.append(
+                                {
+                                    "address": sender,
+                                    "block_index": height,
+                                    "dormant_seconds": idle,
+                                    "pubkey_exposed": bool(previous[1] & 1),
+                                    "amount": transaction["amount"],
+                                }
+                            )
+                    # Spending reveals the public key
+                    last_seen[sender] = (block_time, height << 1 | 1)
+                recipient = transaction["to"]
+                if recipient is not None:
+                    previous = last_seen.get(recipient)
+                    exposed = previous[1] & 1 if previous is not None else 0
+                    last_seen[recipient] = (block_time, height << 1 | exposed)
+        self.next_height = chain.height
+        self.activations_total += len(activations)
+        return activations
+
+    def snapshot(self) -> dict:
+        """Get scanner statistics."""
+        return {
+            "indexed_addresses": len(self._last_seen),
+            "scanned_height": self.next_height,
+            "dormancy_period_years": self.dormancy_period / SECONDS_PER_YEAR,
+            "activations_total": self.activations_total,
+        }
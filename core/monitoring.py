@@ -5,6 +5,8 @@ import random
 import time
 from datetime import datetime
 
+from utils.profiling import profiler
+
 
 class HoneypotMonitor:
     """Monitors honeypot wallets for unauthorized access."""
@@ -85,9 +87,10 @@ class ThreatMonitor:
                 self.threat_history.pop(0)
 
             # Broadcast update
-            await connection_manager.broadcast_threat_update(
-                self.current_threat_level, status_update
-            )
+            with profiler.track("threat_broadcast"):
+                await connection_manager.broadcast_threat_update(
+                    self.current_threat_level, status_update
+                )
 
             # Wait before next update
             await asyncio.sleep(2)  # Update every 2 seconds
@@ -2,6 +2,8 @@
 
 from enum import Enum
 
+from utils.metrics import metrics
+
 
 class RoutingPath(Enum):
     """Available routing paths."""
@@ -13,18 +15,44 @@ class RoutingPath(Enum):
 class CryptoRouter:
     """Routes transactions based on threat level and transaction parameters."""
 
-    def __init__(self):
+    def __init__(self, state=None):
+        # Optional shared StateBackend so a forced path applies to every worker
+        self.state = state
         self.default_path = RoutingPath.CLASSICAL
         self.threat_threshold = 50
-        self.forced_path: RoutingPath | None = None
+        self._forced_path: RoutingPath | None = None
         self.current_path = RoutingPath.CLASSICAL
         self.switch_history = []
 
+    @property
+    def forced_path(self) -> RoutingPath | None:
+        """Forced routing path, read from shared state when configured."""
+        if self.state is None:
+            return self._forced_path
+        value = self.state.get_value("forced_path")
+        return RoutingPath(value) if value else None
+
+    @forced_path.setter
+    def forced_path(self, path: RoutingPath | None) -> None:
+        if self.state is None:
+            self._forced_path = path
+        else:
+            self.state.set_value("forced_path", path.value if path else None)
+
     def route_transaction(self, transaction: dict, threat_level: float) -> RoutingPath:
         """Determine optimal routing path for a transaction."""
+        with metrics.timer("routing_decision_duration_seconds") as labels:
+            path, forced = self._decide(transaction, threat_level)
+            labels.update(path=path.value, forced=forced)
+        metrics.counter("routing_decisions_total", path=path.value, forced=forced).inc()
+        return path
+
+    def _decide(self, transaction: dict, threat_level: float) -> tuple[RoutingPath, bool]:
+        """Pick the path for a transaction; the flag tells if it was forced."""
         # Check if path is forced (for testing)
-        if self.forced_path:
-            return self.forced_path
+        forced_path = self.forced_path
+        if forced_path:
+            return forced_path, True
 
         value = transaction.get("value", 0)
 
@@ -53,7 +81,7 @@ class CryptoRouter:
             )
             self.current_path = path
 
-        return path
+        return path, False
 
     def get_active_crypto_method(self, threat_level: float) -> str:
         """Get the active cryptographic method based on threat level."""
@@ -0,0 +1,315 @@
+"""Streaming sketches for attacker cardinality and heavy hitters.
+
+- ``HyperLogLog`` estimates how many distinct values were seen.
+- ``CountMinSketch`` estimates how often a value was seen (never under).
+- ``HeavyHitters`` pairs a Count-Min sketch with a small candidate set to
+  track the top values.
+
+``WindowedSketch`` keeps a ring of these per sub-window and merges the live
+ones on query, giving sliding-window answers. ``AttackerSketches`` maintains
+one per interaction field fleet-wide and per honeypot, keeping at most
+``max_honeypots`` per-honeypot trackers (least recently active evicted), so
+memory is bounded regardless of traffic. Sketches are per worker process.
+"""
+
+import hashlib
+import math
+import time
+from array import array
+from collections import OrderedDict
+
+_MASK64 = (1 << 64) - 1
+
+
+def hash64(value: str) -> int:
+    """Stable 64-bit hash of a string."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+class HyperLogLog:
+    """Distinct count estimator with ``2 ** precision`` one-byte registers."""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add_hash(self, hashed: int) -> None:
+        index = hashed & (self.size - 1)
+        rest = hashed >> self.precision
+        # Position of the lowest set bit in the remaining bits
+        rank = (rest & -rest).bit_length() if rest else 64 - self.precision + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value: str) -> None:
+        self.add_hash(hash64(value))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def clear(self) -> None:
+        self.registers = bytearray(self.size)
+
+
+class CountMinSketch:
+    """Frequency estimator with ``depth`` rows of ``width`` counters."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = array("I", bytes(4 * width * depth))
+        self.total = 0
+
+    def _indexes(self, hashed: int):
+        # Kirsch-Mitzenmacher: derive every row's index from two halves
+        h1 = hashed & 0xFFFFFFFF
+        h2 = (hashed >> 32) | 1
+        width = self.width
+        for row in range(self.depth):
+            yield row * width + (h1 + row * h2) % width
+
+    def add_hash(self, hashed: int, count: int = 1) -> int:
+        """Add ``count`` occurrences and return the new estimate."""
+        table = self.table
+        width = self.width
+        h1 = hashed & 0xFFFFFFFF
+        h2 = (hashed >> 32) | 1
+        estimate = _MASK64
+        offset = 0
+        for row in range(self.depth):
+            index = offset + (h1 + row * h2) % width
+            value = table[index] + count
+            if value > 0xFFFFFFFF:
+                value = 0xFFFFFFFF
+            table[index] = value
+            if value < estimate:
+                estimate = value
+            offset += width
+        self.total += count
+        return estimate
+
+    def estimate_hash(self, hashed: int) -> int:
+        table = self.table
+        return min(table[index] for index in self._indexes(hashed))
+
+    def estimate(self, value: str) -> int:
+        return self.estimate_hash(hash64(value))
+
+    def clear(self) -> None:
+        self.table = array("I", bytes(4 * self.width * self.depth))
+        self.total = 0
+
+
+class HeavyHitters:
+    """Top-``k`` values by Count-Min estimate."""
+
+    def __init__(self, k: int = 10, width: int = 2048, depth: int = 4):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        # value -> (hash, estimate); at most k entries
+        self.candidates: dict[str, tuple[int, int]] = {}
+        self._floor = 0
+
+    def add_hash(self, value: str, hashed: int) -> None:
+        estimate = self.sketch.add_hash(hashed)
+        candidates = self.candidates
+        if value in candidates or len(candidates) < self.k:
+            candidates[value] = (hashed, estimate)
+        elif estimate > self._floor:
+            weakest = min(candidates, key=lambda v: candidates[v][1])
+            del candidates[weakest]
+            candidates[value] = (hashed, estimate)
+        else:
+            return
+        if len(candidates) >= self.k:
+            self._floor = min(e for _, e in candidates.values())
+
+    def add(self, value: str) -> None:
+        self.add_hash(value, hash64(value))
+
+    def top(self, n: int | None = None) -> list[tuple[str, int]]:
+        ranked = sorted(
+            ((value, self.sketch.estimate_hash(hashed)) for value, (hashed, _) in self.candidates.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return ranked[: n or self.k]
+
+    def clear(self) -> None:
+        self.sketch.clear()
+        self.candidates.clear()
+        self._floor = 0
+
+
+class _Bucket:
+    __slots__ = ("epoch", "distinct", "heavy")
+
+    def __init__(self, epoch: int, precision: int, k: int, width: int, depth: int):
+        self.epoch = epoch
+        self.distinct = HyperLogLog(precision)
+        self.heavy = HeavyHitters(k, width, depth)
+
+
+class WindowedSketch:
+    """Distinct counts and heavy hitters over the last ``window`` seconds.
+
+    The window is split into ``buckets`` sub-windows; the oldest is reused as
+    time moves on, so answers cover between ``window - window / buckets``
+    and ``window`` seconds. Buckets are allocated on first use.
+    """
+
+    def __init__(
+        self,
+        window: float = 3600.0,
+        buckets: int = 12,
+        precision: int = 12,
+        k: int = 10,
+        width: int = 2048,
+        depth: int = 4,
+        clock=time.time,
+    ):
+        self.window = window
+        self.bucket_span = window / buckets
+        self.clock = clock
+        self.params = (precision, k, width, depth)
+        self.buckets: list[_Bucket | None] = [None] * buckets
+
+    def _current(self) -> _Bucket:
+        epoch = int(self.clock() // self.bucket_span)
+        slot = epoch % len(self.buckets)
+        bucket = self.buckets[slot]
+        if bucket is None:
+            bucket = self.buckets[slot] = _Bucket(epoch, *self.params)
+        elif bucket.epoch != epoch:
+            bucket.epoch = epoch
+            bucket.distinct.clear()
+            bucket.heavy.clear()
+        return bucket
+
+    def add(self, value: str) -> None:
+        self.add_hash(value, hash64(value))
+
+    def add_hash(self, value: str, hashed: int) -> None:
+        bucket = self._current()
+        bucket.distinct.add_hash(hashed)
+        bucket.heavy.add_hash(value, hashed)
+
+    def _live(self) -> list[_Bucket]:
+        epoch = int(self.clock() // self.bucket_span)
+        oldest = epoch - len(self.buckets) + 1
+        return [b for b in self.buckets if b is not None and oldest <= b.epoch <= epoch]
+
+    def summary(self, top: int = 10) -> dict:
+        """Merge the live sub-windows into one answer."""
+        live = self._live()
+        distinct = HyperLogLog(self.params[0])
+        candidates: dict[str, int] = {}
+        for bucket in live:
+            distinct.merge(bucket.distinct)
+            for value, (hashed, _) in bucket.heavy.candidates.items():
+                candidates[value] = hashed
+        # Summing each sub-window's estimate never undercounts and is at
+        # least as tight as estimating from the summed tables
+        ranked = sorted(
+            (
+                (value, sum(b.heavy.sketch.estimate_hash(hashed) for b in live))
+                for value, hashed in candidates.items()
+            ),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return {
+            "distinct": distinct.count(),
+            "total": sum(b.heavy.sketch.total for b in live),
+            "top": [{"value": value, "count": count} for value, count in ranked[:top]],
+        }
+
+    def memory_bytes(self) -> int:
+        """Upper bound on the memory used once every bucket is allocated."""
+        precision, k, width, depth = self.params
+        return len(self.buckets) * ((1 << precision) + 4 * width * depth)
+
+
+class AttackerSketches:
+    """Sliding-window sketches of interaction sources, fleet-wide and per honeypot."""
+
+    FIELDS = ("source_ip", "source_address")
+
+    def __init__(
+        self,
+        window: float = 3600.0,
+        buckets: int = 12,
+        top_k: int = 10,
+        max_honeypots: int = 256,
+    ):
+        self.window = window
+        self.buckets = buckets
+        self.top_k = top_k
+        self.max_honeypots = max_honeypots
+        self.fleet = self._new_sketches(precision=14, width=4096, depth=4)
+        self.honeypots: OrderedDict[str, dict[str, WindowedSketch]] = OrderedDict()
+        self.evicted = 0
+
+    def _new_sketches(self, precision: int, width: int, depth: int) -> dict[str, WindowedSketch]:
+        return {
+            field: WindowedSketch(
+                self.window, self.buckets, precision=precision, k=self.top_k, width=width, depth=depth
+            )
+            for field in self.FIELDS
+        }
+
+    def record(self, honeypot_id: str, interaction: dict) -> None:
+        """Add an interaction's sources to the fleet and honeypot sketches."""
+        sketches = self.honeypots.get(honeypot_id)
+        if sketches is None:
+            if len(self.honeypots) >= self.max_honeypots:
+                self.honeypots.popitem(last=False)
+                self.evicted += 1
+            # Per-honeypot sketches are smaller: there can be many of them
+            sketches = self.honeypots[honeypot_id] = self._new_sketches(precision=8, width=256, depth=3)
+        else:
+            self.honeypots.move_to_end(honeypot_id)
+
+        for field in self.FIELDS:
+            value = interaction.get(field)
+            if value:
+                hashed = hash64(value)
+                self.fleet[field].add_hash(value, hashed)
+                sketches[field].add_hash(value, hashed)
+
+    def summary(self, honeypot_id: str | None = None, top: int = 10) -> dict | None:
+        """Get distinct counts and heavy hitters, or None for an untracked honeypot."""
+        sketches = self.fleet if honeypot_id is None else self.honeypots.get(honeypot_id)
+        if sketches is None:
+            return None
+        result = {field: sketch.summary(top) for field, sketch in sketches.items()}
+        result["window_seconds"] = self.window
+        return result
+
+    def snapshot(self) -> dict:
+        """Get tracker statistics and memory use."""
+        per_honeypot = (
+            sum(s.memory_bytes() for s in next(iter(self.honeypots.values())).values())
+            if self.honeypots
+            else 0
+        )
+        return {
+            "tracked_honeypots": len(self.honeypots),
+            "max_honeypots": self.max_honeypots,
+            "evicted_honeypots": self.evicted,
+            "fleet_bytes": sum(s.memory_bytes() for s in self.fleet.values()),
+            "per_honeypot_bytes": per_honeypot,
+            "max_bytes": sum(s.memory_bytes() for s in self.fleet.values())
+            + per_honeypot * self.max_honeypots,
+        }
@@ -1,18 +1,66 @@
 """Quantum threat detection logic."""
 
 import random
+from collections import deque
 from datetime import datetime, timedelta
 
+# Threat level added per rate anomaly; coordinated activity weighs most
+ANOMALY_WEIGHTS = {
+    "rate_burst": 5,
+    "source_burst": 5,
+    "scan": 10,
+    "fleet_burst": 15,
+}
+
+# Most recent indicators kept; older ones only count towards the total
+MAX_INDICATORS = 1000
+# Threat history covers 24 hours, and at most this many entries
+MAX_HISTORY = 10000
+
 
 class ThreatDetector:
     """Detects quantum threats based on various indicators."""
 
-    def __init__(self):
-        self.threat_level = 20.0  # Start at baseline
-        self.indicators = []
-        self.threat_history = []
+    def __init__(self, state=None, scanner=None):
+        # Optional shared StateBackend so every API worker sees the same level
+        self.state = state
+        # Optional DormancyScanner over the local chain
+        self.scanner = scanner
+        self._threat_level = 20.0  # Start at baseline
+        self.indicators: deque[dict] = deque(maxlen=MAX_INDICATORS)
+        self.indicators_total = 0
+        self.threat_history: deque[dict] = deque(maxlen=MAX_HISTORY)
         self.last_update = datetime.utcnow()
 
+    @property
+    def threat_level(self) -> float:
+        """Base threat level, read from shared state when configured."""
+        if self.state is None:
+            return self._threat_level
+        return self.state.get_value("threat_level", self._threat_level)
+
+    @threat_level.setter
+    def threat_level(self, value: float) -> None:
+        if self.state is None:
+            self._threat_level = value
+        else:
+            self.state.set_value("threat_level", value)
+
+    def _update_threat_level(self, func) -> None:
+        """Atomically replace the threat level with ``func(level)``."""
+        if self.state is None:
+            self._threat_level = func(self._threat_level)
+        else:
+            self.state.update_value("threat_level", func, self._threat_level)
+
+    def _adjust_threat_level(self, delta: float) -> None:
+        """Atomically shift the threat level, clamped to 0-100."""
+        self._update_threat_level(lambda level: max(0, min(100, level + delta)))
+
+    def _add_indicator(self, indicator: dict) -> None:
+        self.indicators.append(indicator)
+        self.indicators_total += 1
+
     def get_current_threat_level(self) -> float:
         """Get the current threat level."""
         # Add slight random variation for realism
@@ -25,8 +73,8 @@ class ThreatDetector:
 
     def simulate_attack(self, intensity: float) -> None:
         """Simulate a quantum attack with given intensity."""
-        self.threat_level = min(100, self.threat_level + intensity)
-        self.indicators.append(
+        self._adjust_threat_level(intensity)
+        self._add_indicator(
             {
                 "type": "simulated_attack",
                 "intensity": intensity,
@@ -37,15 +85,21 @@ class ThreatDetector:
 
     def reduce_threat(self, amount: float) -> None:
         """Reduce threat level by specified amount."""
-        self.threat_level = max(0, self.threat_level - amount)
+        self._adjust_threat_level(-amount)
         self._update_history()
 
+    def decay(self, amount: float, baseline: float) -> None:
+        """Let an elevated threat level fall back toward ``baseline``."""
+        self._update_threat_level(
+            lambda level: max(baseline, level - amount) if level > baseline else level
+        )
+
     def check_honeypots(self, honeypots: list[dict]) -> bool:
         """Check if any honeypot wallets have been compromised."""
         for honeypot in honeypots:
             if honeypot.get("compromised", False):
-                self.threat_level = min(100, self.threat_level + 20)
-                self.indicators.append(
+                self._adjust_threat_level(20)
+                self._add_indicator(
                     {
                         "type": "honeypot_breach",
                         "address": honeypot["address"],
@@ -55,15 +109,35 @@ class ThreatDetector:
                 return True
         return False
 
+    def record_anomaly(self, anomaly: dict) -> None:
+        """Raise the threat level for a rate anomaly and keep it as an indicator."""
+        self._adjust_threat_level(ANOMALY_WEIGHTS.get(anomaly["type"], 5))
+        self._add_indicator(
+            {
+                "type": anomaly["type"],
+                "key": anomaly.get("key"),
+                "count": anomaly.get("count"),
+                "timestamp": datetime.utcnow(),
+            }
+        )
+        self._update_history()
+
     def analyze_blockchain_patterns(self) -> dict:
-        """Analyze blockchain for suspicious patterns."""
-        # Simulate pattern detection
-        suspicious_count = random.randint(0, 5)
-        dormant_count = random.randint(0, 3)
+        """Analyze new blocks for dormant addresses that start spending.
+
+        Activations of addresses whose public key was already exposed are
+        counted as suspicious, since those are the ones a quantum attacker
+        can spend from. Against the in-memory chain alone this never fires,
+        since no address there can have been idle for years (see
+        ``core.dormancy``).
+        """
+        activations = self.scanner.scan() if self.scanner is not None else []
+        dormant_count = len(activations)
+        suspicious_count = sum(1 for a in activations if a["pubkey_exposed"])
 
         if suspicious_count > 3:
-            self.threat_level = min(100, self.threat_level + 10)
-            self.indicators.append(
+            self._adjust_threat_level(10)
+            self._add_indicator(
                 {
                     "type": "suspicious_pattern",
                     "count": suspicious_count,
@@ -72,11 +146,12 @@ class ThreatDetector:
             )
 
         if dormant_count > 1:
-            self.threat_level = min(100, self.threat_level + 15)
-            self.indicators.append(
+            self._adjust_threat_level(15)
+            self._add_indicator(
                 {
                     "type": "dormant_activation",
                     "count": dormant_count,
+                    "addresses": [a["address"] for a in activations[:10]],
                     "timestamp": datetime.utcnow(),
                 }
             )
@@ -98,13 +173,13 @@ class ThreatDetector:
             {
                 "threat_level": self.threat_level,
                 "timestamp": datetime.utcnow(),
-                "indicators": len(self.indicators),
+                "indicators": self.indicators_total,
             }
         )
 
-        # Keep only last 24 hours
+        # Keep only last 24 hours; entries are in time order
         cutoff = datetime.utcnow() - timedelta(hours=24)
-        self.threat_history = [
-            h for h in self.threat_history if h["timestamp"] > cutoff
-        ]
+        history = self.threat_history
+        while history[0]["timestamp"] <= cutoff:
+            history.popleft()
 
@@ -2,37 +2,87 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import asyncio
-
-from api.routes import router, start_honeypot_monitoring, stop_honeypot_monitoring
+from typing import Optional
+
+from api.middleware import MetricsMiddleware, ProfilingMiddleware
+from api.routes import (
+    loop_monitor,
+    process_sampler,
+    profiler,
+    registry,
+    router,
+    scheduler,
+    start_chain_scanning,
+    start_honeypot_monitoring,
+    stop_honeypot_monitoring,
+)
 from api.websocket import ConnectionManager
 from core.monitoring import ThreatMonitor
+from services.bus import EventBus
+from utils.config import get_settings
+from utils.log import configure_logging, stop_logging
 
+settings = get_settings()
 
 manager = ConnectionManager()
 threat_monitor = ThreatMonitor()
 
+# With several workers, only the elected bus leader runs the producers and
+# every worker re-broadcasts bus messages to its own WebSocket clients
+bus = EventBus(
+    socket_path=settings.EVENT_BUS_SOCKET if settings.EVENT_BUS_ENABLED else None,
+    on_message=manager.broadcast_local,
+)
+manager.bus = bus
+
+threat_task: Optional[asyncio.Task] = None
+
+
+async def start_producers():
+    """Start the threat loop and honeypot monitor on the elected worker."""
+    global threat_task
+    threat_task = asyncio.create_task(threat_monitor.start_monitoring(manager))
+    await start_honeypot_monitoring()
+
+
+bus.on_elected = start_producers
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Log records are written by a background thread (see utils/log.py)
+    configure_logging(settings)
     print("🚀 Starting QuantDog API...")
-    threat_task = asyncio.create_task(threat_monitor.start_monitoring(manager))
-    honeypot_task = await start_honeypot_monitoring()
+    await registry.start()
+    await loop_monitor.start()
+    await scheduler.start()
+    # Every worker mines and scans its own chain
+    start_chain_scanning()
+    await process_sampler.start()
+    await bus.start()
     print("✅ All systems online!")
     
     yield
     
     # Shutdown
     print("🛑 Shutting down QuantDog API...")
-    threat_monitor.stop_monitoring()
-    await stop_honeypot_monitoring()
-    
-    threat_task.cancel()
-    try:
-        await threat_task
-    except asyncio.CancelledError:
-        pass
+    if threat_task:
+        threat_monitor.stop_monitoring()
+        await stop_honeypot_monitoring()
+
+        threat_task.cancel()
+        try:
+            await threat_task
+        except asyncio.CancelledError:
+            pass
+    await bus.stop()
+    await scheduler.stop()
+    await process_sampler.stop()
+    await loop_monitor.stop()
+    await registry.stop()
     print("✅ Shutdown complete!")
+    stop_logging()
 
 
 app = FastAPI(
@@ -51,6 +101,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request counts and latency for /api/v1/metrics/prometheus
+app.add_middleware(MetricsMiddleware)
+
+# Captures a stack sample or cProfile for requests over PROFILE_BUDGET_MS
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
 # Include API routes
 app.include_router(router, prefix="/api/v1")
 
@@ -0,0 +1,226 @@
+"""Columnar interaction table for vectorized analytics.
+
+Interactions are appended into growable NumPy columns: string fields are
+dictionary encoded (small integer codes plus a category list), timestamps
+are ``datetime64[ns]`` and amounts ``float64`` with NaN for missing. Appends
+are amortized O(1); aggregations wrap the columns in a pandas DataFrame with
+categorical columns (no per-row Python work) and group in C.
+
+Like the other in-process views, the table is per worker: it is seeded from
+the state backend at startup and then fed every interaction this worker
+records. Export (``export_frame``) to Parquet or Arrow needs ``pyarrow`` (the ``analytics``
+extra).
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+# Aggregation keys accepted by ``aggregate_frame``
+GROUP_KEYS = {
+    "honeypot": "honeypot_id",
+    "type": "interaction_type",
+    "severity": "threat_level",
+    "source": "source_ip",
+    "time": "time_bucket",
+}
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+
+
+def _naive_utc(value) -> pd.Timestamp:
+    """Timestamps are stored as naive UTC; convert aware bounds to match."""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp
+
+
+class _Categories:
+    """Dictionary encoding for one string column.
+
+    The initial ``values`` keep their codes for good; the others are
+    renumbered by ``compact`` once no row uses them.
+    """
+
+    __slots__ = ("codes", "values", "fixed")
+
+    def __init__(self, values: list[str] | None = None):
+        self.values: list[str] = list(values or [])
+        self.codes: dict[str, int] = {value: code for code, value in enumerate(self.values)}
+        self.fixed = len(self.values)
+
+    def compact(self, column: np.ndarray) -> None:
+        """Drop the values no code in ``column`` refers to, recoding it in place."""
+        used = np.bincount(column, minlength=len(self.values)) > 0
+        used[: self.fixed] = True
+        if used.all():
+            return
+        kept = np.flatnonzero(used)
+        recode = np.zeros(len(self.values), dtype=column.dtype)
+        recode[kept] = np.arange(len(kept), dtype=column.dtype)
+        column[:] = recode[column]
+        self.values = [self.values[code] for code in kept]
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class InteractionTable:
+    """Append-only columnar store of interactions, bounded at ``max_rows``."""
+
+    COLUMNS = {
+        "honeypot_id": np.int32,
+        "interaction_type": np.int16,
+        "threat_level": np.int8,
+        "source_ip": np.int32,
+        "timestamp": "datetime64[ns]",
+        "amount": np.float64,
+        "auto_responded": np.bool_,
+    }
+    CATEGORICAL = ("honeypot_id", "interaction_type", "threat_level", "source_ip")
+
+    def __init__(self, max_rows: int = 1_000_000, initial_capacity: int = 1024):
+        self.max_rows = max_rows
+        self.size = 0
+        self.dropped = 0
+        self.columns = {
+            name: np.empty(initial_capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()
+        }
+        self.categories = {name: _Categories() for name in self.CATEGORICAL}
+        self.categories["threat_level"] = _Categories(SEVERITIES)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self.columns["timestamp"])
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        if needed > self.max_rows:
+            # Keep the newest rows; dropping in halves keeps this amortized
+            keep = max(0, min(self.size, self.max_rows // 2, self.max_rows - extra))
+            drop = self.size - keep
+            for column in self.columns.values():
+                column[:keep] = column[drop:self.size]
+            self.size = keep
+            self.dropped += drop
+            # Forget the sources and honeypots only the dropped rows had
+            for name, categories in self.categories.items():
+                categories.compact(self.columns[name][:keep])
+            needed = self.size + extra
+        if needed > self.capacity:
+            capacity = min(max(needed, 2 * self.capacity), max(self.max_rows, needed))
+            for name, column in self.columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[: self.size] = column[: self.size]
+                self.columns[name] = grown
+
+    def append(self, interaction: dict) -> None:
+        """Add one interaction record (as stored by the state backend)."""
+        self._reserve(1)
+        row = self.size
+        columns, categories = self.columns, self.categories
+        for name in self.CATEGORICAL:
+            columns[name][row] = categories[name].encode(interaction.get(name) or "")
+        columns["timestamp"][row] = np.datetime64(interaction["timestamp"], "ns")
+        amount = interaction.get("amount")
+        columns["amount"][row] = np.nan if amount is None else amount
+        columns["auto_responded"][row] = bool(interaction.get("auto_responded"))
+        self.size = row + 1
+
+    def extend(self, interactions) -> None:
+        """Add many interactions, oldest first."""
+        interactions = list(interactions)
+        self._reserve(len(interactions))
+        for interaction in interactions:
+            self.append(interaction)
+
+    def frame(self, copy: bool = False) -> pd.DataFrame:
+        """Get the table as a DataFrame with categorical string columns.
+
+        Without ``copy`` the frame shares the table's buffers and is only
+        valid until the next append.
+        """
+        data = {}
+        for name, column in self.columns.items():
+            values = column[: self.size].copy() if copy else column[: self.size]
+            if name in self.categories:
+                data[name] = pd.Categorical.from_codes(
+                    values, categories=pd.Index(self.categories[name].values, dtype=object)
+                )
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def counts_by(self, name: str) -> dict[str, int]:
+        """Count rows per value of a categorical column."""
+        counts = np.bincount(
+            self.columns[name][: self.size], minlength=len(self.categories[name].values)
+        )
+        values = self.categories[name].values
+        return {values[code]: int(count) for code, count in enumerate(counts) if count}
+
+    def aggregate(self, by: list[str], bucket: str = "1h", since=None, until=None) -> pd.DataFrame:
+        """Group the current rows; see ``aggregate_frame``."""
+        return aggregate_frame(self.frame(), by, bucket=bucket, since=since, until=until)
+
+
+def aggregate_frame(
+    frame: pd.DataFrame,
+    by: list[str],
+    bucket: str = "1h",
+    since=None,
+    until=None,
+) -> pd.DataFrame:
+    """Group an interaction frame by ``by`` keys (see ``GROUP_KEYS``).
+
+    Returns one row per group with the interaction count, the amount
+    total and mean, and the number of auto-responded interactions,
+    ordered by count.
+    """
+    unknown = [key for key in by if key not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown group keys: {', '.join(unknown)}")
+
+    if since is not None:
+        frame = frame[frame["timestamp"] >= _naive_utc(since)]
+    if until is not None:
+        frame = frame[frame["timestamp"] < _naive_utc(until)]
+    if "time" in by:
+        frame = frame.assign(time_bucket=frame["timestamp"].dt.floor(bucket))
+
+    columns = [GROUP_KEYS[key] for key in by]
+    if not columns:
+        frame = frame.assign(_all=0)
+        columns = ["_all"]
+    result = frame.groupby(columns, observed=True, sort=True).agg(
+        count=("timestamp", "size"),
+        amount_total=("amount", "sum"),
+        amount_mean=("amount", "mean"),
+        auto_responded=("auto_responded", "sum"),
+    )
+    result = result.reset_index()
+    if "_all" in result:
+        result = result.drop(columns="_all")
+    return result.sort_values("count", ascending=False, kind="stable")
+
+
+def export_frame(frame: pd.DataFrame, format: str = "parquet") -> bytes:
+    """Serialize a frame to Parquet or Arrow IPC (Feather v2)."""
+    buffer = io.BytesIO()
+    if format == "parquet":
+        frame.to_parquet(buffer, index=False)
+    elif format == "arrow":
+        frame.to_feather(buffer)
+    else:
+        raise ValueError(f"Unknown export format: {format}")
+    return buffer.getvalue()
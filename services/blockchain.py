@@ -7,10 +7,30 @@ class BlockchainService:
     """Service for blockchain operations and transaction management."""
 
     def __init__(self):
+        # Retained blocks; blocks[0] is at height base_height
         self.blocks: list[dict] = []
+        self.base_height = 0
         self.pending_transactions: list[dict] = []
         self.mining_reward = 100
 
+    @property
+    def height(self) -> int:
+        """Height of the next block to be mined."""
+        return self.base_height + len(self.blocks)
+
+    def prune(self, keep: int, scanned_height: int) -> int:
+        """Drop old blocks, keeping the last ``keep`` and any not yet scanned.
+
+        Balances and history only cover the retained blocks afterwards.
+        Returns the number of blocks dropped.
+        """
+        drop = min(len(self.blocks) - max(keep, 1), scanned_height - self.base_height)
+        if drop <= 0:
+            return 0
+        del self.blocks[:drop]
+        self.base_height += drop
+        return drop
+
     def create_genesis_block(self):
         """Create the genesis block."""
         genesis_block = {
@@ -62,7 +82,7 @@ class BlockchainService:
 
         # Create new block
         new_block = {
-            "index": len(self.blocks),
+            "index": self.height,
             "timestamp": datetime.utcnow().isoformat(),
             "transactions": self.pending_transactions.copy(),
             "previous_hash": self.get_latest_block()["hash"],
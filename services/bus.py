@@ -0,0 +1,236 @@
+"""Cross-process pub/sub bus for fanning WebSocket events out across workers.
+
+Every API worker runs an ``EventBus``. Workers elect a single leader by
+taking an exclusive ``flock`` on a lock file; the leader listens on a Unix
+domain socket and the other workers connect to it as followers.
+
+- The leader runs the producers (threat loop, honeypot monitor).
+- ``publish`` on the leader delivers locally and relays to every follower.
+- ``publish`` on a follower is forwarded to the leader, which relays it to
+  all workers, so every message is delivered exactly once per worker.
+- If the leader exits, followers race for the lock and one takes over.
+
+Messages are JSON objects framed one per line. A message longer than
+``max_message_size`` is dropped with a warning, and the connection stays up.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[dict], Awaitable[None]]
+ElectionHandler = Callable[[], Awaitable[None]]
+
+
+class EventBus:
+    """Leader-elected pub/sub over a Unix domain socket.
+
+    With ``socket_path=None`` the bus is process-local: this worker is always
+    the leader and ``publish`` simply delivers to ``on_message``.
+    """
+
+    def __init__(
+        self,
+        socket_path: str | None,
+        on_message: MessageHandler,
+        on_elected: ElectionHandler | None = None,
+        reconnect_delay: float = 0.5,
+        send_timeout: float = 1.0,
+        max_message_size: int = 16 * 1024 * 1024,
+    ):
+        self.socket_path = socket_path
+        self.lock_path = f"{socket_path}.lock" if socket_path else None
+        self.on_message = on_message
+        self.on_elected = on_elected
+        self.reconnect_delay = reconnect_delay
+        self.send_timeout = send_timeout
+        self.max_message_size = max_message_size
+
+        self.is_leader = False
+        self._lock_fd: int | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._followers: set[asyncio.StreamWriter] = set()
+        self._handler_tasks: set[asyncio.Task] = set()
+        self._leader_writer: asyncio.StreamWriter | None = None
+        self._follower_task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        """Join the bus, becoming leader if no other worker holds the lock."""
+        if self.socket_path is None:
+            await self._become_leader()
+            return
+
+        if not await self._try_become_leader():
+            self._follower_task = asyncio.create_task(self._follow())
+
+    async def stop(self) -> None:
+        """Leave the bus and release leadership."""
+        self._stopping = True
+
+        if self._follower_task:
+            self._follower_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._follower_task
+
+        if self._leader_writer:
+            self._leader_writer.close()
+
+        if self._server:
+            self._server.close()
+            for writer in list(self._followers):
+                writer.close()
+            # Closing the writers makes each handler see EOF and return
+            await asyncio.gather(*self._handler_tasks, return_exceptions=True)
+            await self._server.wait_closed()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
+
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+        self.is_leader = False
+
+    async def publish(self, message: dict) -> None:
+        """Publish a message to every worker on the bus."""
+        if self.is_leader:
+            await self._relay(message)
+            return
+
+        writer = self._leader_writer
+        if writer is None or writer.is_closing():
+            logger.warning("Event bus has no leader, dropping %s message", message.get("type"))
+            return
+        writer.write(self._encode(message))
+        await writer.drain()
+
+    # Leader side
+
+    async def _try_become_leader(self) -> bool:
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        self._lock_fd = fd
+        # A previous leader may have died without removing its socket
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(
+            self._handle_follower,
+            path=self.socket_path,
+            limit=self.max_message_size,
+        )
+        await self._become_leader()
+        return True
+
+    async def _become_leader(self) -> None:
+        self.is_leader = True
+        logger.info("Event bus leader elected (pid %s)", os.getpid())
+        if self.on_elected:
+            await self.on_elected()
+
+    async def _handle_follower(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        self._handler_tasks.add(task)
+        self._followers.add(writer)
+        try:
+            async for message in self._read_messages(reader):
+                await self._relay(message)
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning("Event bus follower dropped: %s", e)
+        finally:
+            self._followers.discard(writer)
+            self._handler_tasks.discard(task)
+            writer.close()
+
+    async def _relay(self, message: dict) -> None:
+        """Deliver to this worker and every connected follower."""
+        followers = list(self._followers)
+        if followers:
+            data = self._encode(message)
+            for writer in followers:
+                writer.write(data)
+            results = await asyncio.gather(
+                *(self._drain(writer) for writer in followers),
+                return_exceptions=True,
+            )
+            for writer, result in zip(followers, results, strict=True):
+                if isinstance(result, Exception):
+                    logger.warning("Dropping slow event bus follower: %s", result)
+                    self._followers.discard(writer)
+                    writer.close()
+
+        await self.on_message(message)
+
+    async def _drain(self, writer: asyncio.StreamWriter) -> None:
+        await asyncio.wait_for(writer.drain(), timeout=self.send_timeout)
+
+    # Follower side
+
+    async def _follow(self) -> None:
+        """Stay connected to the leader, taking over if it goes away."""
+        while not self._stopping:
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    self.socket_path, limit=self.max_message_size
+                )
+            except (FileNotFoundError, ConnectionRefusedError):
+                if await self._try_become_leader():
+                    return
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            self._leader_writer = writer
+            logger.info("Event bus follower connected (pid %s)", os.getpid())
+            try:
+                async for message in self._read_messages(reader):
+                    await self.on_message(message)
+            except (ConnectionError, json.JSONDecodeError) as e:
+                logger.warning("Event bus connection to leader lost: %s", e)
+            finally:
+                self._leader_writer = None
+                writer.close()
+
+            if not self._stopping and await self._try_become_leader():
+                return
+
+    async def _read_messages(self, reader: asyncio.StreamReader):
+        """Yield the messages read from ``reader`` until EOF."""
+        skipping = False
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError:
+                return
+            except asyncio.LimitOverrunError as e:
+                # Discard the oversized message a buffer at a time
+                if not skipping:
+                    logger.warning(
+                        "Dropping event bus message over %s bytes",
+                        self.max_message_size,
+                    )
+                    skipping = True
+                await reader.readexactly(e.consumed)
+                continue
+            if skipping:
+                # The end of the oversized message
+                skipping = False
+                continue
+            yield json.loads(line)
+
+    @staticmethod
+    def _encode(message: dict) -> bytes:
+        return json.dumps(message, default=str).encode() + b"\n"
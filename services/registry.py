@@ -0,0 +1,226 @@
+"""Persistent honeypot registry with asynchronous write-behind.
+
+Honeypot configs are persisted to ``data/registry/honeypots.json`` so deployed
+honeypots survive restarts. Request handlers only record changes in memory;
+a background task writes them out:
+
+- Each flush appends the pending changes to an append-only journal
+  (``honeypots.json.journal``), one JSON line per change.
+- Periodically, or when the journal grows too large, the snapshot is
+  rewritten atomically (temp file, fsync, rename) and the journal truncated.
+
+All disk I/O runs in a worker thread. Journal appends and compaction hold an
+``flock`` on the journal, so several API workers can share one registry.
+Loading only reads: the directory and journal are created when the writer
+starts.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import logging
+import os
+import tempfile
+import time
+
+from services.state import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+class HoneypotRegistry:
+    """Write-behind persistence for honeypot configs and disabled flags."""
+
+    def __init__(
+        self,
+        path: str = "data/registry/honeypots.json",
+        flush_interval: float = 1.0,
+        snapshot_interval: float = 30.0,
+        journal_max_bytes: int = 1024 * 1024,
+    ):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.journal_max_bytes = journal_max_bytes
+
+        # Pending changes, coalesced per honeypot so the latest write wins
+        self._pending: dict[str, str] = {}
+        self._pending_disabled: dict[str, bool] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._last_snapshot = time.monotonic()
+
+    # Recording (called from request handlers, never touches disk)
+
+    def record_put(self, honeypot_id: str, config: dict) -> None:
+        """Queue a create or update of a honeypot config."""
+        self._pending[honeypot_id] = dumps(
+            {"op": "put", "id": honeypot_id, "config": config}
+        )
+        self._wake()
+
+    def record_delete(self, honeypot_id: str) -> None:
+        """Queue the deletion of a honeypot."""
+        self._pending[honeypot_id] = dumps({"op": "delete", "id": honeypot_id})
+        self._pending_disabled.pop(honeypot_id, None)
+        self._wake()
+
+    def record_disabled(self, honeypot_id: str, disabled: bool) -> None:
+        """Queue a change to a honeypot's disabled flag."""
+        self._pending_disabled[honeypot_id] = disabled
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # Loading
+
+    def load(self) -> tuple[dict[str, dict], set[str]]:
+        """Load the snapshot and replay the journal on top of it.
+
+        Returns the honeypot configs and the set of disabled honeypot ids.
+        """
+        try:
+            journal = open(self.journal_path, encoding="utf-8")
+        except FileNotFoundError:
+            # Nothing was ever written, or only a snapshot was copied in
+            return self._read_state()
+        with journal:
+            fcntl.flock(journal.fileno(), fcntl.LOCK_SH)
+            try:
+                return self._read_state()
+            finally:
+                fcntl.flock(journal.fileno(), fcntl.LOCK_UN)
+
+    def _read_state(self) -> tuple[dict[str, dict], set[str]]:
+        honeypots: dict[str, dict] = {}
+        disabled: set[str] = set()
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = loads(f.read() or "{}")
+            honeypots = snapshot.get("honeypots", {})
+            disabled = set(snapshot.get("disabled", []))
+        except FileNotFoundError:
+            pass
+
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except ValueError:
+                        # A crash mid-append can leave a torn final line
+                        logger.warning("Skipping corrupt registry journal entry")
+                        continue
+                    honeypot_id = entry["id"]
+                    if entry["op"] == "put":
+                        honeypots[honeypot_id] = entry["config"]
+                    elif entry["op"] == "delete":
+                        honeypots.pop(honeypot_id, None)
+                        disabled.discard(honeypot_id)
+                    elif entry["op"] == "disabled":
+                        if entry["value"]:
+                            disabled.add(honeypot_id)
+                        else:
+                            disabled.discard(honeypot_id)
+        except FileNotFoundError:
+            pass
+
+        return honeypots, disabled
+
+    # Background writer
+
+    async def start(self) -> None:
+        """Create the registry directory and journal, and start the writer."""
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8"):
+            pass
+        # Created here so the registry can be started again on a new event loop
+        self._wakeup = asyncio.Event()
+        if self._pending or self._pending_disabled:
+            self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the writer, flushing pending changes and writing a snapshot."""
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush(force_snapshot=True)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            # Let a burst of changes accumulate into one batch
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError as e:
+                logger.error(f"❌ Failed to persist honeypot registry: {e}")
+
+    async def flush(self, force_snapshot: bool = False) -> None:
+        """Write pending changes to the journal, compacting when due."""
+        if self._wakeup is not None:
+            self._wakeup.clear()
+        lines = list(self._pending.values())
+        lines.extend(
+            dumps({"op": "disabled", "id": honeypot_id, "value": value})
+            for honeypot_id, value in self._pending_disabled.items()
+        )
+        self._pending.clear()
+        self._pending_disabled.clear()
+
+        snapshot_due = (
+            force_snapshot
+            or time.monotonic() - self._last_snapshot >= self.snapshot_interval
+        )
+        if not lines and not snapshot_due:
+            return
+
+        await asyncio.to_thread(self._write_batch, lines, snapshot_due)
+        if snapshot_due:
+            self._last_snapshot = time.monotonic()
+
+    def _write_batch(self, lines: list[str], snapshot_due: bool) -> None:
+        with self._journal_lock() as journal:
+            if lines:
+                journal.write("".join(line + "\n" for line in lines))
+                journal.flush()
+                os.fsync(journal.fileno())
+
+            if snapshot_due or journal.tell() >= self.journal_max_bytes:
+                self._compact(journal)
+
+    def _compact(self, journal) -> None:
+        """Fold the journal into a new snapshot. Caller holds the journal lock."""
+        honeypots, disabled = self._read_state()
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".honeypots.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(dumps({"honeypots": honeypots, "disabled": sorted(disabled)}))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+        journal.truncate(0)
+        journal.seek(0)
+
+    @contextlib.contextmanager
+    def _journal_lock(self):
+        with open(self.journal_path, "a+", encoding="utf-8") as journal:
+            fcntl.flock(journal.fileno(), fcntl.LOCK_EX)
+            try:
+                yield journal
+            finally:
+                fcntl.flock(journal.fileno(), fcntl.LOCK_UN)
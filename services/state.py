@@ -0,0 +1,950 @@
+"""Pluggable state backends shared across API worker processes.
+
+The API keeps honeypot, interaction and threat state behind a ``StateBackend``
+so that several uvicorn workers can serve the same view of the system:
+
+- ``MemoryStateBackend``: plain dicts, single process only (default).
+- ``SQLiteStateBackend``: embedded SQLite database in WAL mode.
+- ``SharedMemoryStateBackend``: snapshot and interaction ring in a POSIX
+  shared memory segment, guarded by an ``flock`` on a sidecar lock file.
+"""
+
+import copy
+import fcntl
+import json
+import os
+import pickle
+import secrets
+import sqlite3
+import struct
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any
+
+
+def _json_default(value: Any) -> Any:
+    """Encode values the stdlib JSON encoder does not understand."""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj: dict) -> Any:
+    """Decode values tagged by ``_json_default``."""
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def dumps(value: Any) -> str:
+    """Serialize a state value to JSON, preserving datetimes."""
+    return json.dumps(value, default=_json_default)
+
+
+def loads(data: str) -> Any:
+    """Deserialize a state value produced by ``dumps``."""
+    return json.loads(data, object_hook=_json_object_hook)
+
+
+# Number of honeypot mutations remembered for incremental change tracking
+CHANGE_LOG_SIZE = 1000
+
+
+def _changes_since(
+    changes: Iterable[tuple[int, list[str]]], current: int, version: int
+) -> tuple[int, set[str] | None]:
+    """Collect honeypot ids changed after ``version`` from a change log.
+
+    ``changes`` holds ``(version, honeypot_ids)`` entries in ascending order.
+    Returns None for the ids if the log no longer reaches back to ``version``.
+    """
+    if version == current:
+        return current, set()
+    changed: set[str] = set()
+    oldest = current + 1
+    for change_version, honeypot_ids in changes:
+        oldest = min(oldest, change_version)
+        if change_version > version:
+            changed.update(honeypot_ids)
+    if version < oldest - 1 or version > current:
+        return current, None
+    return current, changed
+
+
+class StateBackend:
+    """Interface for honeypot, interaction and threat state storage."""
+
+    # Honeypots
+
+    def get_honeypot(self, honeypot_id: str) -> dict | None:
+        """Get a honeypot config, or None if it does not exist."""
+        raise NotImplementedError
+
+    def list_honeypots(self) -> dict[str, dict]:
+        """Get all honeypot configs keyed by honeypot id."""
+        raise NotImplementedError
+
+    def put_honeypot(self, honeypot_id: str, config: dict) -> None:
+        """Create or replace a honeypot config."""
+        raise NotImplementedError
+
+    def update_honeypot(
+        self, honeypot_id: str, func: Callable[[dict], dict | None]
+    ) -> dict | None:
+        """Atomically replace a honeypot config with ``func(config)``.
+
+        ``func`` may mutate the config it is given. Returns the stored config,
+        or None if the honeypot does not exist or ``func`` returned None, in
+        which case nothing is written.
+        """
+        raise NotImplementedError
+
+    def delete_honeypot(self, honeypot_id: str) -> bool:
+        """Delete a honeypot. Returns False if it did not exist."""
+        raise NotImplementedError
+
+    def seed_honeypots(self, configs: dict[str, dict]) -> bool:
+        """Insert ``configs`` only if no honeypots exist yet.
+
+        Every worker calls this at import time; only the first one wins.
+        """
+        raise NotImplementedError
+
+    def has_honeypot(self, honeypot_id: str) -> bool:
+        """Check whether a honeypot exists."""
+        return self.get_honeypot(honeypot_id) is not None
+
+    def honeypots_version(self) -> int:
+        """Get a counter bumped by every honeypot or disabled-flag mutation."""
+        return self.honeypot_changes_since(-1)[0]
+
+    def honeypot_changes_since(self, version: int) -> tuple[int, set[str] | None]:
+        """Get the current version and the honeypot ids changed after ``version``.
+
+        The ids are None when the change log no longer covers ``version`` and
+        the caller has to reload every honeypot.
+        """
+        raise NotImplementedError
+
+    def put_honeypots(self, configs: dict[str, dict]) -> None:
+        """Create or replace many honeypot configs at once."""
+        for honeypot_id, config in configs.items():
+            self.put_honeypot(honeypot_id, config)
+
+    def delete_honeypots(self, honeypot_ids: list[str]) -> list[str]:
+        """Delete many honeypots. Returns the ids that existed."""
+        return [
+            honeypot_id
+            for honeypot_id in honeypot_ids
+            if self.delete_honeypot(honeypot_id)
+        ]
+
+    # Disabled honeypots
+
+    def disabled_honeypots(self) -> set[str]:
+        """Get the ids of all disabled honeypots."""
+        raise NotImplementedError
+
+    def set_disabled(self, honeypot_id: str, disabled: bool) -> None:
+        """Mark a honeypot as disabled or enabled."""
+        raise NotImplementedError
+
+    def set_disabled_many(self, honeypot_ids: list[str], disabled: bool) -> list[str]:
+        """Disable or enable many honeypots. Returns the ids that exist."""
+        existing = [i for i in honeypot_ids if self.has_honeypot(i)]
+        for honeypot_id in existing:
+            self.set_disabled(honeypot_id, disabled)
+        return existing
+
+    # Interactions
+
+    def append_interaction(self, interaction: dict) -> dict:
+        """Append an interaction, assigning its id from the sequence number.
+
+        The id follows the ``int_<seq>_<honeypot_id>`` format used by the API.
+        Returns the stored interaction.
+        """
+        raise NotImplementedError
+
+    def list_interactions(
+        self, honeypot_id: str | None = None, limit: int = 100, offset: int = 0
+    ) -> list[dict]:
+        """Get interactions, newest first."""
+        raise NotImplementedError
+
+    def count_interactions(self) -> int:
+        """Get the total number of recorded interactions."""
+        raise NotImplementedError
+
+    # Scalar values (threat level, forced routing path, ...)
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        """Get a scalar value."""
+        raise NotImplementedError
+
+    def set_value(self, key: str, value: Any) -> None:
+        """Set a scalar value."""
+        raise NotImplementedError
+
+    def update_value(
+        self, key: str, func: Callable[[Any], Any], default: Any = None
+    ) -> Any:
+        """Atomically replace a value with ``func(current)`` and return it.
+
+        ``func`` runs under the backend's write lock and must not call back
+        into the backend.
+        """
+        raise NotImplementedError
+
+    def epoch(self) -> str:
+        """Get the id of this state's lifetime, creating it on first use.
+
+        Versions only compare within one epoch. The memory backend starts a
+        new one with every process, the others with a new database or segment.
+        """
+        return self.update_value("epoch", lambda epoch: epoch or secrets.token_hex(4))
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class MemoryStateBackend(StateBackend):
+    """In-process state. Only consistent with a single worker."""
+
+    def __init__(self):
+        self.honeypots: dict[str, dict] = {}
+        self.disabled: set[str] = set()
+        self.interactions: list[dict] = []
+        self.values: dict[str, Any] = {}
+        self.version = 0
+        self.changes: deque[tuple[int, list[str]]] = deque(maxlen=CHANGE_LOG_SIZE)
+
+    def _touch(self, honeypot_ids: list[str]) -> None:
+        self.version += 1
+        self.changes.append((self.version, honeypot_ids))
+
+    def get_honeypot(self, honeypot_id: str) -> dict | None:
+        return self.honeypots.get(honeypot_id)
+
+    def list_honeypots(self) -> dict[str, dict]:
+        return dict(self.honeypots)
+
+    def put_honeypot(self, honeypot_id: str, config: dict) -> None:
+        self.honeypots[honeypot_id] = config
+        self._touch([honeypot_id])
+
+    def update_honeypot(
+        self, honeypot_id: str, func: Callable[[dict], dict | None]
+    ) -> dict | None:
+        config = self.honeypots.get(honeypot_id)
+        # A copy, like the other backends hand out: declining leaves no trace
+        if config is None or (config := func(copy.deepcopy(config))) is None:
+            return None
+        self.put_honeypot(honeypot_id, config)
+        return config
+
+    def delete_honeypot(self, honeypot_id: str) -> bool:
+        self.disabled.discard(honeypot_id)
+        if self.honeypots.pop(honeypot_id, None) is None:
+            return False
+        self._touch([honeypot_id])
+        return True
+
+    def seed_honeypots(self, configs: dict[str, dict]) -> bool:
+        if self.honeypots:
+            return False
+        self.honeypots.update(configs)
+        self._touch(list(configs))
+        return True
+
+    def has_honeypot(self, honeypot_id: str) -> bool:
+        return honeypot_id in self.honeypots
+
+    def put_honeypots(self, configs: dict[str, dict]) -> None:
+        self.honeypots.update(configs)
+        self._touch(list(configs))
+
+    def delete_honeypots(self, honeypot_ids: list[str]) -> list[str]:
+        deleted = [i for i in honeypot_ids if self.honeypots.pop(i, None) is not None]
+        self.disabled.difference_update(deleted)
+        self._touch(deleted)
+        return deleted
+
+    def honeypots_version(self) -> int:
+        return self.version
+
+    def honeypot_changes_since(self, version: int) -> tuple[int, set[str] | None]:
+        return _changes_since(self.changes, self.version, version)
+
+    def disabled_honeypots(self) -> set[str]:
+        return set(self.disabled)
+
+    def set_disabled(self, honeypot_id: str, disabled: bool) -> None:
+        if disabled:
+            self.disabled.add(honeypot_id)
+        else:
+            self.disabled.discard(honeypot_id)
+        self._touch([honeypot_id])
+
+    def set_disabled_many(self, honeypot_ids: list[str], disabled: bool) -> list[str]:
+        existing = [i for i in honeypot_ids if i in self.honeypots]
+        if disabled:
+            self.disabled.update(existing)
+        else:
+            self.disabled.difference_update(existing)
+        self._touch(existing)
+        return existing
+
+    def append_interaction(self, interaction: dict) -> dict:
+        interaction["id"] = f"int_{len(self.interactions)}_{interaction['honeypot_id']}"
+        self.interactions.append(interaction)
+        return interaction
+
+    def list_interactions(
+        self, honeypot_id: str | None = None, limit: int = 100, offset: int = 0
+    ) -> list[dict]:
+        newest_first = reversed(self.interactions)
+        if honeypot_id is not None:
+            newest_first = (i for i in newest_first if i["honeypot_id"] == honeypot_id)
+        result = []
+        for index, interaction in enumerate(newest_first):
+            if index >= offset + limit:
+                break
+            if index >= offset:
+                result.append(interaction)
+        return result
+
+    def count_interactions(self) -> int:
+        return len(self.interactions)
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+    def set_value(self, key: str, value: Any) -> None:
+        self.values[key] = value
+
+    def update_value(
+        self, key: str, func: Callable[[Any], Any], default: Any = None
+    ) -> Any:
+        value = func(self.values.get(key, default))
+        self.values[key] = value
+        return value
+
+
+class SQLiteStateBackend(StateBackend):
+    """State stored in an embedded SQLite database in WAL mode.
+
+    WAL lets every worker read concurrently while a single writer commits,
+    which matches the read-heavy polling pattern of the dashboard.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS honeypots (
+            id TEXT PRIMARY KEY,
+            config TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS disabled_honeypots (
+            id TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS interactions (
+            seq INTEGER PRIMARY KEY,
+            honeypot_id TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS interactions_by_honeypot
+            ON interactions (honeypot_id, seq);
+        CREATE TABLE IF NOT EXISTS kv (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS honeypot_changes (
+            version INTEGER PRIMARY KEY,
+            honeypot_ids TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            path,
+            timeout=busy_timeout,
+            isolation_level=None,  # explicit transactions only
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a write transaction that locks out other workers."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def _touch(conn: sqlite3.Connection, honeypot_ids: list[str]) -> None:
+        """Log a honeypot mutation inside the current write transaction."""
+        version = conn.execute(
+            "INSERT INTO honeypot_changes (honeypot_ids) VALUES (?)",
+            (json.dumps(honeypot_ids),),
+        ).lastrowid
+        conn.execute(
+            "DELETE FROM honeypot_changes WHERE version <= ?",
+            (version - CHANGE_LOG_SIZE,),
+        )
+
+    def get_honeypot(self, honeypot_id: str) -> dict | None:
+        rows = self._query("SELECT config FROM honeypots WHERE id = ?", (honeypot_id,))
+        return loads(rows[0][0]) if rows else None
+
+    def list_honeypots(self) -> dict[str, dict]:
+        rows = self._query("SELECT id, config FROM honeypots")
+        return {honeypot_id: loads(config) for honeypot_id, config in rows}
+
+    def put_honeypot(self, honeypot_id: str, config: dict) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO honeypots (id, config) VALUES (?, ?)",
+                (honeypot_id, dumps(config)),
+            )
+            self._touch(conn, [honeypot_id])
+
+    def update_honeypot(
+        self, honeypot_id: str, func: Callable[[dict], dict | None]
+    ) -> dict | None:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT config FROM honeypots WHERE id = ?", (honeypot_id,)
+            ).fetchone()
+            if row is None or (config := func(loads(row[0]))) is None:
+                return None
+            conn.execute(
+                "UPDATE honeypots SET config = ? WHERE id = ?",
+                (dumps(config), honeypot_id),
+            )
+            self._touch(conn, [honeypot_id])
+        return config
+
+    def delete_honeypot(self, honeypot_id: str) -> bool:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM disabled_honeypots WHERE id = ?", (honeypot_id,))
+            cursor = conn.execute("DELETE FROM honeypots WHERE id = ?", (honeypot_id,))
+            if cursor.rowcount == 0:
+                return False
+            self._touch(conn, [honeypot_id])
+            return True
+
+    def seed_honeypots(self, configs: dict[str, dict]) -> bool:
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM honeypots LIMIT 1").fetchone():
+                return False
+            conn.executemany(
+                "INSERT INTO honeypots (id, config) VALUES (?, ?)",
+                [(honeypot_id, dumps(config)) for honeypot_id, config in configs.items()],
+            )
+            self._touch(conn, list(configs))
+            return True
+
+    def has_honeypot(self, honeypot_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM honeypots WHERE id = ?", (honeypot_id,)))
+
+    def put_honeypots(self, configs: dict[str, dict]) -> None:
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO honeypots (id, config) VALUES (?, ?)",
+                [(honeypot_id, dumps(config)) for honeypot_id, config in configs.items()],
+            )
+            self._touch(conn, list(configs))
+
+    def delete_honeypots(self, honeypot_ids: list[str]) -> list[str]:
+        with self._transaction() as conn:
+            existing = self._existing_ids(conn, honeypot_ids)
+            params = [(honeypot_id,) for honeypot_id in existing]
+            conn.executemany("DELETE FROM disabled_honeypots WHERE id = ?", params)
+            conn.executemany("DELETE FROM honeypots WHERE id = ?", params)
+            self._touch(conn, existing)
+        return existing
+
+    def _existing_ids(self, conn: sqlite3.Connection, honeypot_ids: list[str]) -> list[str]:
+        """Filter ``honeypot_ids`` down to the ones present, preserving order."""
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS requested_ids (id TEXT)")
+        conn.execute("DELETE FROM requested_ids")
+        conn.executemany(
+            "INSERT INTO requested_ids (id) VALUES (?)",
+            [(honeypot_id,) for honeypot_id in honeypot_ids],
+        )
+        found = {
+            row[0]
+            for row in conn.execute(
+                "SELECT h.id FROM honeypots h JOIN requested_ids r ON h.id = r.id"
+            )
+        }
+        return [honeypot_id for honeypot_id in honeypot_ids if honeypot_id in found]
+
+    def honeypots_version(self) -> int:
+        return self._query("SELECT COALESCE(MAX(version), 0) FROM honeypot_changes")[0][0]
+
+    def honeypot_changes_since(self, version: int) -> tuple[int, set[str] | None]:
+        with self._lock:
+            # Read the range and the entries in one snapshot
+            self._conn.execute("BEGIN")
+            try:
+                oldest, current = self._conn.execute(
+                    "SELECT COALESCE(MIN(version), 1), COALESCE(MAX(version), 0) "
+                    "FROM honeypot_changes"
+                ).fetchone()
+                if version == current:
+                    return current, set()
+                if version < oldest - 1 or version > current:
+                    return current, None
+                changed: set[str] = set()
+                for (honeypot_ids,) in self._conn.execute(
+                    "SELECT honeypot_ids FROM honeypot_changes WHERE version > ?",
+                    (version,),
+                ):
+                    changed.update(json.loads(honeypot_ids))
+                return current, changed
+            finally:
+                self._conn.execute("COMMIT")
+
+    def disabled_honeypots(self) -> set[str]:
+        return {row[0] for row in self._query("SELECT id FROM disabled_honeypots")}
+
+    def set_disabled(self, honeypot_id: str, disabled: bool) -> None:
+        with self._transaction() as conn:
+            if disabled:
+                conn.execute(
+                    "INSERT OR IGNORE INTO disabled_honeypots (id) VALUES (?)",
+                    (honeypot_id,),
+                )
+            else:
+                conn.execute(
+                    "DELETE FROM disabled_honeypots WHERE id = ?", (honeypot_id,)
+                )
+            self._touch(conn, [honeypot_id])
+
+    def set_disabled_many(self, honeypot_ids: list[str], disabled: bool) -> list[str]:
+        with self._transaction() as conn:
+            existing = self._existing_ids(conn, honeypot_ids)
+            params = [(honeypot_id,) for honeypot_id in existing]
+            if disabled:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO disabled_honeypots (id) VALUES (?)", params
+                )
+            else:
+                conn.executemany("DELETE FROM disabled_honeypots WHERE id = ?", params)
+            self._touch(conn, existing)
+        return existing
+
+    def append_interaction(self, interaction: dict) -> dict:
+        with self._transaction() as conn:
+            seq = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM interactions"
+            ).fetchone()[0]
+            interaction["id"] = f"int_{seq}_{interaction['honeypot_id']}"
+            conn.execute(
+                "INSERT INTO interactions (seq, honeypot_id, data) VALUES (?, ?, ?)",
+                (seq, interaction["honeypot_id"], dumps(interaction)),
+            )
+        return interaction
+
+    def list_interactions(
+        self, honeypot_id: str | None = None, limit: int = 100, offset: int = 0
+    ) -> list[dict]:
+        if honeypot_id is None:
+            rows = self._query(
+                "SELECT data FROM interactions ORDER BY seq DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            )
+        else:
+            rows = self._query(
+                "SELECT data FROM interactions WHERE honeypot_id = ? "
+                "ORDER BY seq DESC LIMIT ? OFFSET ?",
+                (honeypot_id, limit, offset),
+            )
+        return [loads(row[0]) for row in rows]
+
+    def count_interactions(self) -> int:
+        return self._query("SELECT COUNT(*) FROM interactions")[0][0]
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        rows = self._query("SELECT value FROM kv WHERE key = ?", (key,))
+        return loads(rows[0][0]) if rows else default
+
+    def set_value(self, key: str, value: Any) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)",
+                (key, dumps(value)),
+            )
+
+    def update_value(
+        self, key: str, func: Callable[[Any], Any], default: Any = None
+    ) -> Any:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = func(loads(row[0]) if row else default)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)",
+                (key, dumps(value)),
+            )
+        return value
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SharedMemoryStateBackend(StateBackend):
+    """State stored in a POSIX shared memory segment.
+
+    Layout: an 8-byte version counter and an 8-byte payload length, the
+    pickled snapshot, then the interaction ring at the end of the segment.
+    Readers only unpickle the snapshot when its version changes, so
+    steady-state reads are a header check. Honeypot configs are pickled one
+    by one inside the snapshot: writing it, or reading it after a change,
+    copies bytes per honeypot instead of rebuilding every config, and a
+    config is only decoded when it is asked for. Writers hold an exclusive
+    ``flock`` on a sidecar lock file for the whole read-modify-write cycle,
+    and skip the write if nothing changed.
+
+    Interactions live in a ring of ``max_interactions`` fixed-size slots
+    after the snapshot, numbered by a sequence counter at the start of the
+    ring. Appending one writes a single slot and leaves the snapshot and its
+    version alone.
+    """
+
+    HEADER = struct.Struct("QQ")
+    SEQUENCE = struct.Struct("Q")
+    SLOT_LENGTH = struct.Struct("I")
+
+    def __init__(
+        self,
+        name: str = "quantdog_state",
+        size: int = 64 * 1024 * 1024,
+        max_interactions: int = 10000,
+        lock_dir: str = "/tmp",
+        interaction_size: int = 2048,
+    ):
+        self.name = name
+        self.max_interactions = max_interactions
+        self.interaction_size = interaction_size
+        self._thread_lock = threading.RLock()
+        self._lock_file = open(os.path.join(lock_dir, f"{name}.lock"), "a+b")
+        self._cached_version = -1
+        self._cached_state: dict | None = None
+
+        with self._file_lock(fcntl.LOCK_EX):
+            try:
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+                created = True
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(name=name)
+                created = False
+            # Don't let the resource tracker unlink the segment when this
+            # worker exits; the other workers still need it.
+            resource_tracker.unregister(self._shm._name, "shared_memory")
+            self._ring = self._shm.size - self.SEQUENCE.size - max_interactions * interaction_size
+            if self._ring <= self.HEADER.size:
+                self.close()
+                raise ValueError(
+                    f"Shared memory segment '{name}' ({self._shm.size} bytes) is too "
+                    f"small for {max_interactions} interactions of {interaction_size} bytes"
+                )
+            if created:
+                self._write(self._empty_state(), version=0)
+                self.SEQUENCE.pack_into(self._shm.buf, self._ring, 0)
+
+    @staticmethod
+    def _empty_state() -> dict:
+        return {
+            # honeypot id -> pickled config
+            "honeypots": {},
+            "disabled": set(),
+            "values": {},
+            "version": 0,
+            "changes": [],
+        }
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        with self._thread_lock:
+            fcntl.flock(self._lock_file.fileno(), operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self) -> dict:
+        """Read the current snapshot. Caller must hold the file lock."""
+        version, length = self.HEADER.unpack_from(self._shm.buf, 0)
+        if version != self._cached_version or self._cached_state is None:
+            start = self.HEADER.size
+            self._cached_state = pickle.loads(self._shm.buf[start : start + length])
+            self._cached_version = version
+        return self._cached_state
+
+    def _write(self, state: dict, version: int | None = None) -> None:
+        """Write a new snapshot. Caller must hold the exclusive file lock."""
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.HEADER.size + len(payload) > self._ring:
+            raise MemoryError(
+                f"State snapshot ({len(payload)} bytes) exceeds shared memory "
+                f"segment '{self.name}' ({self._ring} bytes before the interactions)"
+            )
+        if version is None:
+            version = self.HEADER.unpack_from(self._shm.buf, 0)[0] + 1
+        start = self.HEADER.size
+        self._shm.buf[start : start + len(payload)] = payload
+        self.HEADER.pack_into(self._shm.buf, 0, version, len(payload))
+        self._cached_state = state
+        self._cached_version = version
+
+    def _snapshot(self) -> dict:
+        with self._file_lock(fcntl.LOCK_SH):
+            return self._read()
+
+    @contextmanager
+    def _mutate(self):
+        """Yield a copy of the snapshot to change; written back if changed.
+
+        Mutations mark the copy with ``_touch`` or ``_changed``. The copy is
+        shallow: honeypot configs are pickled bytes, and values are replaced
+        rather than changed in place, so the cache stays intact if the
+        mutation fails.
+        """
+        with self._file_lock(fcntl.LOCK_EX):
+            current = self._read()
+            state = {
+                "honeypots": dict(current["honeypots"]),
+                "disabled": set(current["disabled"]),
+                "values": dict(current["values"]),
+                "version": current["version"],
+                "changes": list(current["changes"]),
+            }
+            yield state
+            if state.pop("changed", False):
+                self._write(state)
+
+    @staticmethod
+    def _changed(state: dict) -> None:
+        state["changed"] = True
+
+    def _touch(self, state: dict, honeypot_ids: list[str]) -> None:
+        state["version"] += 1
+        state["changes"].append((state["version"], honeypot_ids))
+        if len(state["changes"]) > CHANGE_LOG_SIZE:
+            del state["changes"][0]
+        self._changed(state)
+
+    @staticmethod
+    def _encode(config: dict) -> bytes:
+        return pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get_honeypot(self, honeypot_id: str) -> dict | None:
+        config = self._snapshot()["honeypots"].get(honeypot_id)
+        return pickle.loads(config) if config is not None else None
+
+    def list_honeypots(self) -> dict[str, dict]:
+        return {
+            honeypot_id: pickle.loads(config)
+            for honeypot_id, config in self._snapshot()["honeypots"].items()
+        }
+
+    def put_honeypot(self, honeypot_id: str, config: dict) -> None:
+        with self._mutate() as state:
+            state["honeypots"][honeypot_id] = self._encode(config)
+            self._touch(state, [honeypot_id])
+
+    def update_honeypot(
+        self, honeypot_id: str, func: Callable[[dict], dict | None]
+    ) -> dict | None:
+        with self._mutate() as state:
+            encoded = state["honeypots"].get(honeypot_id)
+            # func gets its own decoded copy: declining leaves nothing behind
+            if encoded is None or (config := func(pickle.loads(encoded))) is None:
+                return None
+            state["honeypots"][honeypot_id] = self._encode(config)
+            self._touch(state, [honeypot_id])
+        return config
+
+    def delete_honeypot(self, honeypot_id: str) -> bool:
+        with self._mutate() as state:
+            if state["honeypots"].pop(honeypot_id, None) is None:
+                return False
+            state["disabled"].discard(honeypot_id)
+            self._touch(state, [honeypot_id])
+            return True
+
+    def seed_honeypots(self, configs: dict[str, dict]) -> bool:
+        with self._mutate() as state:
+            if state["honeypots"]:
+                return False
+            state["honeypots"].update(
+                (honeypot_id, self._encode(config)) for honeypot_id, config in configs.items()
+            )
+            self._touch(state, list(configs))
+            return True
+
+    def has_honeypot(self, honeypot_id: str) -> bool:
+        return honeypot_id in self._snapshot()["honeypots"]
+
+    def put_honeypots(self, configs: dict[str, dict]) -> None:
+        with self._mutate() as state:
+            state["honeypots"].update(
+                (honeypot_id, self._encode(config)) for honeypot_id, config in configs.items()
+            )
+            self._touch(state, list(configs))
+
+    def delete_honeypots(self, honeypot_ids: list[str]) -> list[str]:
+        with self._mutate() as state:
+            deleted = []
+            for honeypot_id in honeypot_ids:
+                if state["honeypots"].pop(honeypot_id, None) is not None:
+                    state["disabled"].discard(honeypot_id)
+                    deleted.append(honeypot_id)
+            if deleted:
+                self._touch(state, deleted)
+            return deleted
+
+    def honeypots_version(self) -> int:
+        return self._snapshot()["version"]
+
+    def honeypot_changes_since(self, version: int) -> tuple[int, set[str] | None]:
+        snapshot = self._snapshot()
+        return _changes_since(snapshot["changes"], snapshot["version"], version)
+
+    def disabled_honeypots(self) -> set[str]:
+        return set(self._snapshot()["disabled"])
+
+    def set_disabled(self, honeypot_id: str, disabled: bool) -> None:
+        with self._mutate() as state:
+            if disabled:
+                state["disabled"].add(honeypot_id)
+            else:
+                state["disabled"].discard(honeypot_id)
+            self._touch(state, [honeypot_id])
+
+    def set_disabled_many(self, honeypot_ids: list[str], disabled: bool) -> list[str]:
+        with self._mutate() as state:
+            existing = [i for i in honeypot_ids if i in state["honeypots"]]
+            if disabled:
+                state["disabled"].update(existing)
+            else:
+                state["disabled"].difference_update(existing)
+            if existing:
+                self._touch(state, existing)
+            return existing
+
+    def _slot(self, seq: int) -> int:
+        return self._ring + self.SEQUENCE.size + seq % self.max_interactions * self.interaction_size
+
+    def _next_seq(self) -> int:
+        return self.SEQUENCE.unpack_from(self._shm.buf, self._ring)[0]
+
+    def append_interaction(self, interaction: dict) -> dict:
+        with self._file_lock(fcntl.LOCK_EX):
+            seq = self._next_seq()
+            interaction["id"] = f"int_{seq}_{interaction['honeypot_id']}"
+            payload = pickle.dumps(interaction, protocol=pickle.HIGHEST_PROTOCOL)
+            if self.SLOT_LENGTH.size + len(payload) > self.interaction_size:
+                raise MemoryError(
+                    f"Interaction ({len(payload)} bytes) exceeds the "
+                    f"{self.interaction_size}-byte slots of segment '{self.name}'"
+                )
+            offset = self._slot(seq)
+            self.SLOT_LENGTH.pack_into(self._shm.buf, offset, len(payload))
+            start = offset + self.SLOT_LENGTH.size
+            self._shm.buf[start : start + len(payload)] = payload
+            self.SEQUENCE.pack_into(self._shm.buf, self._ring, seq + 1)
+        return interaction
+
+    def _interactions(self) -> Iterator[dict]:
+        """Interactions in the ring, newest first. Caller must hold the file lock."""
+        buf = self._shm.buf
+        next_seq = self._next_seq()
+        for seq in range(next_seq - 1, max(0, next_seq - self.max_interactions) - 1, -1):
+            offset = self._slot(seq)
+            (length,) = self.SLOT_LENGTH.unpack_from(buf, offset)
+            start = offset + self.SLOT_LENGTH.size
+            yield pickle.loads(buf[start : start + length])
+
+    def list_interactions(
+        self, honeypot_id: str | None = None, limit: int = 100, offset: int = 0
+    ) -> list[dict]:
+        with self._file_lock(fcntl.LOCK_SH):
+            newest_first = self._interactions()
+            if honeypot_id is not None:
+                newest_first = (i for i in newest_first if i["honeypot_id"] == honeypot_id)
+            result = []
+            for index, interaction in enumerate(newest_first):
+                if index >= offset + limit:
+                    break
+                if index >= offset:
+                    result.append(interaction)
+            return result
+
+    def count_interactions(self) -> int:
+        with self._file_lock(fcntl.LOCK_SH):
+            return self._next_seq()
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        return self._snapshot()["values"].get(key, default)
+
+    def set_value(self, key: str, value: Any) -> None:
+        with self._mutate() as state:
+            state["values"][key] = value
+            self._changed(state)
+
+    def update_value(
+        self, key: str, func: Callable[[Any], Any], default: Any = None
+    ) -> Any:
+        with self._mutate() as state:
+            previous = state["values"].get(key, default)
+            value = func(previous)
+            if value is not previous or key not in state["values"]:
+                state["values"][key] = value
+                self._changed(state)
+        return value
+
+    def close(self) -> None:
+        self._shm.close()
+        self._lock_file.close()
+
+
+def create_state_backend(settings) -> StateBackend:
+    """Create the state backend selected by ``STATE_BACKEND``."""
+    backend = settings.STATE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryStateBackend()
+    if backend == "sqlite":
+        return SQLiteStateBackend(settings.STATE_SQLITE_PATH)
+    if backend in ("shm", "shared_memory"):
+        return SharedMemoryStateBackend(
+            name=settings.STATE_SHM_NAME,
+            size=settings.STATE_SHM_SIZE,
+            max_interactions=settings.STATE_SHM_MAX_INTERACTIONS,
+            interaction_size=settings.STATE_SHM_INTERACTION_SIZE,
+        )
+    raise ValueError(f"Unknown state backend: {settings.STATE_BACKEND}")
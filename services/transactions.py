@@ -0,0 +1,108 @@
+"""Feed of routed transactions for the API.
+
+Transactions are submitted through ``TransactionFeed.submit``, which reads
+the threat level and asks the router for a path exactly once, records the
+transaction in the ``BlockchainService`` and keeps a compact copy for paging.
+Reading the feed never touches the detector or the router.
+
+Records live in a fixed-size ring of typed arrays indexed by sequence number,
+so a page costs one slice no matter how many records are stored, and cursors
+stay valid until the record they point at is overwritten. Like the
+``BlockchainService`` it wraps, the feed is per process.
+"""
+
+import time
+from array import array
+from datetime import datetime
+
+from core.router import RoutingPath
+
+# Routing paths stored as one byte per record
+_PATHS = (RoutingPath.CLASSICAL, RoutingPath.POST_QUANTUM)
+_PATH_CODES = {path: code for code, path in enumerate(_PATHS)}
+
+
+class TransactionFeed:
+    """Bounded, newest-first feed of transactions routed at ingest time."""
+
+    def __init__(self, blockchain, detector, router, capacity: int = 10000):
+        self.blockchain = blockchain
+        self.detector = detector
+        self.router = router
+        self.capacity = capacity
+        self.next_seq = 0
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._amounts = array("d", bytes(8 * capacity))
+        self._threats = array("f", bytes(4 * capacity))
+        self._paths = array("b", bytes(capacity))
+        # Addresses repeat heavily, so each slot holds an interned string
+        self._from: list[str | None] = [None] * capacity
+        self._to: list[str | None] = [None] * capacity
+        self._addresses: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return min(self.next_seq, self.capacity)
+
+    @property
+    def oldest_seq(self) -> int:
+        return max(0, self.next_seq - self.capacity)
+
+    def _intern(self, address: str) -> str:
+        interned = self._addresses.setdefault(address, address)
+        if len(self._addresses) > 4 * self.capacity:
+            # Drop addresses that are no longer referenced by any record
+            live = set(self._from) | set(self._to)
+            self._addresses = {a: a for a in self._addresses if a in live}
+        return interned
+
+    def submit(self, from_address: str, to_address: str, amount: float) -> dict:
+        """Route a transaction, record it on the chain and add it to the feed."""
+        threat_level = self.detector.get_current_threat_level()
+        path = self.router.route_transaction({"value": amount}, threat_level)
+        self.blockchain.create_transaction(from_address, to_address, amount, path.value)
+        return self.ingest(from_address, to_address, amount, path, threat_level)
+
+    def ingest(
+        self,
+        from_address: str,
+        to_address: str,
+        amount: float,
+        path: RoutingPath,
+        threat_level: float,
+        timestamp: float | None = None,
+    ) -> dict:
+        """Store a transaction whose routing has already been decided."""
+        seq = self.next_seq
+        slot = seq % self.capacity
+        self._timestamps[slot] = time.time() if timestamp is None else timestamp
+        self._amounts[slot] = amount
+        self._threats[slot] = threat_level
+        self._paths[slot] = _PATH_CODES[path]
+        self._from[slot] = self._intern(from_address)
+        self._to[slot] = self._intern(to_address)
+        self.next_seq = seq + 1
+        return self._record(seq)
+
+    def _record(self, seq: int) -> dict:
+        slot = seq % self.capacity
+        return {
+            "id": f"tx_{seq}",
+            "amount": self._amounts[slot],
+            "from_address": self._from[slot],
+            "to_address": self._to[slot],
+            "timestamp": datetime.utcfromtimestamp(self._timestamps[slot]),
+            "crypto_method": _PATHS[self._paths[slot]].value,
+            "threat_level_at_time": round(self._threats[slot], 2),
+        }
+
+    def page(self, limit: int = 10, cursor: int | None = None) -> tuple[list[dict], int | None]:
+        """Get up to ``limit`` records, newest first, older than ``cursor``.
+
+        ``cursor`` is the value returned by the previous page (None starts at
+        the newest record). Returns the records and the cursor for the next
+        page, or None when there are no older records.
+        """
+        start = self.next_seq if cursor is None else min(cursor, self.next_seq)
+        stop = max(self.oldest_seq, start - limit)
+        records = [self._record(seq) for seq in range(start - 1, stop - 1, -1)]
+        return records, stop if stop > self.oldest_seq else None
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from services.analytics import InteractionTable, aggregate_frame
+
+START = datetime(2026, 1, 1)
+
+
+def _interaction(n, source=None, threat="low", amount=None):
+    return {
+        "honeypot_id": f"honeypot_{n % 3}",
+        "interaction_type": "probe",
+        "threat_level": threat,
+        "source_ip": source or f"10.0.0.{n}",
+        "timestamp": START + timedelta(minutes=n),
+        "amount": amount,
+        "auto_responded": threat == "high",
+    }
+
+
+def test_counts_and_aggregation():
+    table = InteractionTable()
+    table.extend(
+        _interaction(n, threat="high" if n % 2 else "low", amount=1.0) for n in range(6)
+    )
+    assert table.counts_by("honeypot_id") == {
+        "honeypot_0": 2,
+        "honeypot_1": 2,
+        "honeypot_2": 2,
+    }
+    result = aggregate_frame(table.frame(), ["severity"])
+    rows = {row.threat_level: row for row in result.itertuples()}
+    assert rows["high"].count == 3
+    assert rows["high"].auto_responded == 3
+    assert rows["low"].amount_total == 3.0
+
+
+def test_dropping_rows_forgets_their_categories():
+    table = InteractionTable(max_rows=8, initial_capacity=2)
+    for n in range(8):
+        table.append(_interaction(n))
+    assert len(table.categories["source_ip"].values) == 8
+
+    table.append(_interaction(8))
+    assert len(table) == 5
+    assert table.dropped == 4
+    assert table.categories["source_ip"].values == [f"10.0.0.{n}" for n in range(4, 9)]
+    assert list(table.frame()["source_ip"]) == [f"10.0.0.{n}" for n in range(4, 9)]
+    # Severities keep their codes even when unused
+    assert table.categories["threat_level"].values[:4] == [
+        "low",
+        "medium",
+        "high",
+        "critical",
+    ]
+
+
+def test_categories_stay_bounded_under_churn():
+    table = InteractionTable(max_rows=100)
+    for n in range(10_000):
+        table.append(_interaction(n, source=f"10.{n // 256 % 256}.{n % 256}.1"))
+    assert len(table) <= 100
+    assert len(table.categories["source_ip"].values) <= 100
+    assert table.counts_by("source_ip") == {
+        f"10.{n // 256 % 256}.{n % 256}.1": 1
+        for n in range(10_000 - len(table), 10_000)
+    }
@@ -0,0 +1,45 @@
+from core.anomaly import RateAnomalyDetector
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _scans(detector, clock, hits):
+    found = []
+    for at, honeypot_id in hits:
+        clock.now = at
+        found += [a for a in detector.observe(honeypot_id, "10.0.0.9") if a["type"] == "scan"]
+    return found
+
+
+def test_scan_straddling_a_bucket_edge_is_caught():
+    clock = Clock()
+    detector = RateAnomalyDetector(scan_threshold=5, scan_window=10.0, clock=clock)
+    # Under the old tumbling windows this split 3/2 across t=10 and went unseen
+    scans = _scans(detector, clock, [(8.5, "a"), (9.0, "b"), (9.5, "c"), (10.0, "d"), (10.5, "e")])
+    assert len(scans) == 1
+    assert scans[0]["honeypots"] == ["a", "b", "c", "d", "e"]
+
+
+def test_scan_count_forgets_old_buckets_and_repeats():
+    clock = Clock()
+    detector = RateAnomalyDetector(scan_threshold=3, scan_window=10.0, clock=clock)
+    assert _scans(detector, clock, [(0.0, "a"), (1.0, "b"), (11.0, "c")]) == []
+    # Revisiting a honeypot from the previous bucket does not count twice
+    assert _scans(detector, clock, [(12.0, "b"), (13.0, "c")]) == []
+    assert len(_scans(detector, clock, [(14.0, "d")])) == 1
+
+
+def test_source_rate_flags_a_burst_from_one_source():
+    clock = Clock()
+    detector = RateAnomalyDetector(min_events=10, scan_threshold=100, clock=clock)
+    anomalies = []
+    for n in range(12):
+        anomalies += detector.observe(f"honeypot_{n % 2}", "10.0.0.9")
+    assert [a["type"] for a in anomalies].count("source_burst") == 1
+    assert detector.detected["source_burst"] == 1
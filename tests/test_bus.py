@@ -0,0 +1,72 @@
+import asyncio
+
+from services.bus import EventBus
+
+
+async def _leader_and_follower(tmp_path, max_message_size):
+    received = {"leader": [], "follower": []}
+
+    def collect(name):
+        async def on_message(message):
+            received[name].append(message)
+
+        return on_message
+
+    socket_path = str(tmp_path / "bus.sock")
+    leader = EventBus(socket_path, collect("leader"), max_message_size=max_message_size)
+    follower = EventBus(
+        socket_path, collect("follower"), max_message_size=max_message_size
+    )
+    await leader.start()
+    await follower.start()
+    while follower._leader_writer is None:
+        await asyncio.sleep(0.01)
+    return leader, follower, received
+
+
+def _types(messages):
+    return [message["type"] for message in messages]
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_publish_reaches_every_worker(tmp_path):
+    async def run():
+        leader, follower, received = await _leader_and_follower(tmp_path, 1024)
+        await follower.publish({"type": "a"})
+        await _wait_for(lambda: received["leader"])
+        await leader.publish({"type": "b"})
+        await _wait_for(lambda: len(received["follower"]) == 2)
+        await follower.stop()
+        await leader.stop()
+        return received
+
+    received = asyncio.run(run())
+    assert _types(received["leader"]) == ["a", "b"]
+    assert _types(received["follower"]) == ["a", "b"]
+
+
+def test_oversized_message_is_dropped_not_fatal(tmp_path):
+    async def run():
+        leader, follower, received = await _leader_and_follower(tmp_path, 1024)
+        # Both directions: follower -> leader, then leader -> follower
+        await follower.publish({"type": "big", "data": "x" * 5000})
+        await follower.publish({"type": "after"})
+        await _wait_for(lambda: received["follower"])
+        await leader.publish({"type": "big", "data": "x" * 5000})
+        await leader.publish({"type": "last"})
+        await _wait_for(lambda: len(received["follower"]) == 2)
+        assert follower._follower_task is not None
+        assert not follower._follower_task.done()
+        await follower.stop()
+        await leader.stop()
+        return received
+
+    received = asyncio.run(run())
+    assert _types(received["leader"]) == ["after", "big", "last"]
+    assert _types(received["follower"]) == ["after", "last"]
@@ -0,0 +1,49 @@
+import json
+from types import SimpleNamespace
+
+from api.cache import HoneypotListCache, etag_matches
+from services.state import MemoryStateBackend
+
+
+def _item(honeypot_id, config, disabled):
+    data = {"id": honeypot_id, "starred": config.get("starred", False)}
+    return SimpleNamespace(
+        status="inactive" if disabled else "active",
+        blockchain="ethereum",
+        starred=data["starred"],
+        model_dump_json=lambda: json.dumps(data),
+    )
+
+
+def _fleet():
+    state = MemoryStateBackend()
+    state.seed_honeypots({f"honeypot_{n}": {} for n in range(3)})
+    return state, HoneypotListCache(state, _item)
+
+
+def test_page_follows_changes():
+    state, cache = _fleet()
+    etag, body, total = cache.get_page()
+    assert total == 3
+    assert cache.get_page()[0] == etag
+
+    state.put_honeypot("honeypot_1", {"starred": True})
+    new_etag, body, _ = cache.get_page()
+    assert new_etag != etag
+    assert json.loads(body)[1] == {"id": "honeypot_1", "starred": True}
+    assert cache.get_page(starred=True)[2] == 1
+
+
+def test_etag_does_not_survive_a_restart():
+    # A restarted memory backend counts the same versions again
+    state, cache = _fleet()
+    etag = cache.get_page()[0]
+    state, cache = _fleet()
+    assert not etag_matches(etag, cache.get_page()[0])
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', 'W/"b"')
+    assert etag_matches("*", 'W/"b"')
+    assert not etag_matches(None, 'W/"b"')
+    assert not etag_matches('W/"c"', 'W/"b"')
@@ -0,0 +1,82 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from core.dormancy import DormancyScanner
+from core.router import RoutingPath
+from services.blockchain import BlockchainService
+from services.transactions import TransactionFeed
+
+
+def _mine(chain, *transfers):
+    for sender, recipient in transfers:
+        chain.create_transaction(sender, recipient, 1.0, "classical")
+    return chain.mine_pending_transactions("miner")
+
+
+def test_prune_keeps_unscanned_and_recent_blocks():
+    chain = BlockchainService()
+    for n in range(10):
+        _mine(chain, (f"a{n}", f"b{n}"))
+    assert chain.height == 11  # and the genesis block
+
+    assert chain.prune(keep=3, scanned_height=5) == 5
+    assert chain.base_height == 5
+    assert chain.prune(keep=3, scanned_height=11) == 3
+    assert [block["index"] for block in chain.blocks] == [8, 9, 10]
+    assert chain.prune(keep=3, scanned_height=11) == 0
+
+    assert _mine(chain, ("a", "b"))["index"] == 11
+    assert chain.blocks[-1]["previous_hash"] == chain.blocks[-2]["hash"]
+
+
+def test_scanner_follows_a_pruned_chain():
+    chain = BlockchainService()
+    scanner = DormancyScanner(chain, dormancy_period=0.0)
+    _mine(chain, ("old", "x"))
+    assert scanner.scan() == []
+    chain.prune(keep=1, scanned_height=scanner.next_height)
+
+    _mine(chain, ("old", "y"))
+    activations = scanner.scan()
+    assert [a["address"] for a in activations] == ["old"]
+    assert activations[0]["pubkey_exposed"]
+    assert scanner.next_height == chain.height
+
+
+def test_feed_pages_newest_first_and_wraps():
+    feed = TransactionFeed(
+        BlockchainService(),
+        SimpleNamespace(get_current_threat_level=lambda: 10.0),
+        SimpleNamespace(route_transaction=lambda tx, level: RoutingPath.CLASSICAL),
+        capacity=4,
+    )
+    for n in range(6):
+        feed.submit(f"a{n}", "b", float(n))
+    assert len(feed) == 4
+
+    page, cursor = feed.page(limit=3)
+    assert [record["amount"] for record in page] == [5.0, 4.0, 3.0]
+    page, cursor = feed.page(limit=3, cursor=cursor)
+    assert [record["amount"] for record in page] == [2.0]
+    assert cursor is None
+    assert len(feed.blockchain.pending_transactions) == 6
+
+
+def test_scanner_measures_idle_time_without_per_block_state():
+    chain = BlockchainService()
+    scanner = DormancyScanner(chain, dormancy_period=3600.0)
+    for height, (sender, recipient, hour) in enumerate(
+        [(None, "old", 0), ("old", "x", 1), (None, "y", 2), ("old", "z", 5)]
+    ):
+        chain.blocks.append(
+            {
+                "index": height,
+                "timestamp": datetime(2020, 1, 1, hour).isoformat(),
+                "transactions": [{"from": sender, "to": recipient, "amount": 1.0}],
+            }
+        )
+    activations = scanner.scan()
+    assert [a["dormant_seconds"] for a in activations] == [3600.0, 4 * 3600.0]
+    assert [a["pubkey_exposed"] for a in activations] == [False, True]
+    assert scanner.last_seen("old") == (3, True)
+    assert scanner.last_seen("y") == (2, False)
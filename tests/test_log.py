@@ -0,0 +1,113 @@
+import io
+import json
+import logging
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from utils import log
+from utils.log import AlertSink, configure_logging, raise_alert, stop_logging
+
+
+class _Collect(AlertSink):
+    def __init__(self):
+        self.alerts = []
+
+    def emit(self, alert):
+        self.alerts.append(alert)
+
+
+@pytest.fixture
+def logging_settings(tmp_path):
+    root = logging.getLogger()
+    saved = list(root.handlers), root.level
+    yield SimpleNamespace(
+        LOG_ASYNC=False,
+        LOG_FORMAT="text",
+        LOG_FILE=str(tmp_path / "quantdog.log"),
+        ALERT_SINKS="none",
+        LOG_RATE_LIMIT=2,
+        LOG_RATE_WINDOW=60.0,
+        LOG_LEVEL="INFO",
+        LOG_QUEUE_SIZE=100,
+    )
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    for handler in saved[0]:
+        root.addHandler(handler)
+    root.setLevel(saved[1])
+    logging.getLogger(log.ALERT_LOGGER).removeFilter(log._rate_limit)
+
+
+@pytest.mark.parametrize("log_async", [False, True])
+def test_alerts_are_rate_limited_once(logging_settings, log_async):
+    logging_settings.LOG_ASYNC = log_async
+    # Configuring again must not stack filters either
+    configure_logging(logging_settings)
+    configure_logging(logging_settings)
+    sink = _Collect()
+    log.add_alert_sink(sink)
+    for _ in range(5):
+        raise_alert("probe_burst", "Probe burst", severity="high")
+    stop_logging()
+    raise_alert("probe_burst", "Probe burst", severity="high")
+
+    assert len(sink.alerts) == 2
+    with open(logging_settings.LOG_FILE, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["event"] for line in lines] == ["probe_burst", "probe_burst"]
+
+
+def test_suppressed_count_reaches_next_alert():
+    limiter = log.RateLimitFilter(limit=1, window=60.0)
+    records = [
+        logging.makeLogRecord({"alert": "high", "event": "scan", "fields": {}})
+        for _ in range(4)
+    ]
+    assert [limiter.filter(record) for record in records] == [
+        True,
+        False,
+        False,
+        False,
+    ]
+    # The window is over
+    limiter.window = 0.0
+    record = logging.makeLogRecord({"alert": "high", "event": "scan"})
+    assert limiter.filter(record)
+    assert record.suppressed == 3
+
+
+def test_import_leaves_root_logger_alone():
+    # In a fresh interpreter: other tests may already have imported the app
+    code = "import logging, api.routes; print(len(logging.getLogger().handlers))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split()[-1] == "0"
+
+
+def test_structured_formatter_json():
+    formatter = log.StructuredFormatter(json_output=True)
+    record = logging.makeLogRecord(
+        {"msg": "hello", "levelname": "INFO", "name": "x", "event": "greet"}
+    )
+    record.fields = {"who": "world"}
+    entry = json.loads(formatter.format(record))
+    assert entry["message"] == "hello"
+    assert entry["event"] == "greet"
+    assert entry["who"] == "world"
+
+
+def test_banner_sink_lists_fields():
+    stream = io.StringIO()
+    log.BannerAlertSink(stream, width=10).emit(
+        log.Alert("e", "Title", "high", {"source_ip": "1.2.3.4"}, 0.0, suppressed=2)
+    )
+    text = stream.getvalue()
+    assert "Title" in text
+    assert "Source ip: 1.2.3.4" in text
+    assert "(2 similar alerts suppressed)" in text
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from services.registry import HoneypotRegistry
+
+
+def test_loading_creates_nothing(tmp_path):
+    registry = HoneypotRegistry(str(tmp_path / "registry" / "honeypots.json"))
+    assert registry.load() == ({}, set())
+    assert not (tmp_path / "registry").exists()
+
+
+def test_changes_survive_a_restart(tmp_path):
+    path = str(tmp_path / "registry" / "honeypots.json")
+
+    async def write():
+        registry = HoneypotRegistry(path, flush_interval=0.0)
+        await registry.start()
+        registry.record_put("honeypot_0", {"starred": True})
+        registry.record_put("honeypot_1", {})
+        registry.record_disabled("honeypot_1", True)
+        await registry.flush()
+        # Journal only, then compacted on stop
+        assert HoneypotRegistry(path).load()[1] == {"honeypot_1"}
+        registry.record_delete("honeypot_0")
+        await registry.stop()
+
+    asyncio.run(write())
+    assert HoneypotRegistry(path).load() == ({"honeypot_1": {}}, {"honeypot_1"})
+    assert (tmp_path / "registry" / "honeypots.json.journal").read_text() == ""
+
+
+def test_importing_the_api_writes_nothing(tmp_path):
+    # The registry path is relative to the working directory
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root}
+    subprocess.run(
+        [sys.executable, "-c", "import api.routes"], cwd=tmp_path, env=env, check=True
+    )
+    assert list(tmp_path.iterdir()) == []
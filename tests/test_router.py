@@ -0,0 +1,15 @@
+from core.router import CryptoRouter, RoutingPath
+from utils.metrics import metrics
+
+
+def test_decisions_are_timed_per_path():
+    router = CryptoRouter()
+    classical = metrics.histogram("routing_decision_duration_seconds", path="classical", forced=False)
+    forced = metrics.histogram("routing_decision_duration_seconds", path="post_quantum", forced=True)
+    before = classical.count, forced.count
+
+    assert router.route_transaction({"value": 10}, threat_level=10) is RoutingPath.CLASSICAL
+    router.force_post_quantum()
+    assert router.route_transaction({"value": 10}, threat_level=10) is RoutingPath.POST_QUANTUM
+
+    assert (classical.count, forced.count) == (before[0] + 1, before[1] + 1)
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from api import routes
+from api.models import HoneypotConfig
+from services.state import MemoryStateBackend
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = MemoryStateBackend()
+    state.set_value("next_honeypot_id", 0)
+    monkeypatch.setattr(routes, "state", state)
+    return state
+
+
+def test_allocator_skips_existing_ids(state):
+    state.put_honeypots({"honeypot_1": {}, "honeypot_3": {}})
+    assert routes.allocate_honeypot_ids(3) == ["honeypot_0", "honeypot_2", "honeypot_4"]
+    assert routes.allocate_honeypot_ids(1) == ["honeypot_5"]
+
+
+def test_config_update_keeps_the_rest_and_needs_the_honeypot(state):
+    state.put_honeypot("honeypot_0", {"name": "Vault", "auto_response": False})
+    config = HoneypotConfig(
+        monitoring_sensitivity="high",
+        protection_type="ecdsa",
+        auto_response=True,
+        routing_method="classical",
+    )
+    asyncio.run(routes.update_honeypot_config("honeypot_0", config))
+    stored = state.get_honeypot("honeypot_0")
+    assert stored["name"] == "Vault"
+    assert stored["auto_response"] is True
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(routes.update_honeypot_config("honeypot_7", config))
+    assert excinfo.value.status_code == 404
+    assert not state.has_honeypot("honeypot_7")
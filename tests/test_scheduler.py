@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils import scheduler
+from utils.scheduler import ROOT_BITS, TimerWheel
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # Ticks only move when a test says so
+    monkeypatch.setattr(scheduler, "time", SimpleNamespace(monotonic=lambda: 0.0))
+
+
+def _wheel():
+    return TimerWheel(resolution=1.0)
+
+
+def test_timers_fire_in_order_across_cascades():
+    wheel = _wheel()
+    fired = []
+    delays = [1, 5, (1 << ROOT_BITS) - 1, 1 << ROOT_BITS, 1000, 70_000]
+    for delay in delays:
+        wheel.call_later(delay, fired.append, delay)
+    assert len(wheel) == len(delays)
+
+    # Fire a tick at a time, so each timer must land on its exact tick
+    for now in range(1, 70_001):
+        wheel.advance(float(now))
+        assert fired == [delay for delay in delays if delay <= now]
+    assert len(wheel) == 0
+    assert wheel.fired == len(delays)
+
+
+def test_keyed_timers_replace_and_cancel():
+    wheel = _wheel()
+    fired = []
+    wheel.call_later(5, fired.append, "first", key="rearm")
+    wheel.call_later(10, fired.append, "second", key="rearm")
+    assert len(wheel) == 1
+    assert wheel.advance(20.0) == 1
+    assert fired == ["second"]
+
+    timer = wheel.call_later(5, fired.append, "cancelled", key="rearm")
+    assert wheel.cancel_key("rearm")
+    assert not timer.active
+    assert not timer.cancel()
+    assert wheel.advance(40.0) == 0
+    assert wheel.keyed == {}
+
+
+def test_failing_callback_does_not_stop_the_wheel():
+    wheel = _wheel()
+    fired = []
+    wheel.call_later(1, lambda: 1 / 0)
+    wheel.call_later(1, fired.append, "ok")
+    assert wheel.advance(2.0) == 2
+    assert fired == ["ok"]
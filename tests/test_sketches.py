@@ -0,0 +1,66 @@
+from core.sketches import (
+    AttackerSketches,
+    CountMinSketch,
+    HeavyHitters,
+    HyperLogLog,
+    WindowedSketch,
+    hash64,
+)
+
+
+def test_hyperloglog_estimates_and_merges():
+    first, second = HyperLogLog(), HyperLogLog()
+    for n in range(20_000):
+        first.add(f"10.0.{n // 256}.{n % 256}")
+        second.add(f"10.1.{n // 256}.{n % 256}")
+    assert abs(first.count() - 20_000) < 20_000 * 0.05
+    first.merge(second)
+    assert abs(first.count() - 40_000) < 40_000 * 0.05
+
+
+def test_count_min_never_undercounts():
+    # Narrow enough that many values share counters
+    sketch = CountMinSketch(width=64, depth=3)
+    counts = {f"value{n}": n % 7 + 1 for n in range(500)}
+    for value, count in counts.items():
+        sketch.add_hash(hash64(value), count)
+    for value, count in counts.items():
+        assert sketch.estimate(value) >= count
+    assert sketch.total == sum(counts.values())
+
+
+def test_heavy_hitters_find_the_top_values():
+    hh = HeavyHitters(k=3)
+    for n in range(2000):
+        hh.add(f"noise{n}")
+    for value, count in (("a", 300), ("b", 200), ("c", 100)):
+        for _ in range(count):
+            hh.add(value)
+    assert [value for value, _ in hh.top()] == ["a", "b", "c"]
+
+
+def test_window_forgets_old_buckets():
+    now = [0.0]
+    sketch = WindowedSketch(window=60.0, buckets=6, clock=lambda: now[0])
+    for n in range(50):
+        sketch.add(f"old{n}")
+    now[0] = 30.0
+    sketch.add("new")
+    assert sketch.summary()["total"] == 51
+
+    now[0] = 65.0
+    summary = sketch.summary()
+    assert summary["total"] == 1
+    assert summary["distinct"] == 1
+    assert summary["top"] == [{"value": "new", "count": 1}]
+
+
+def test_attacker_sketches_evict_the_least_recent_honeypot():
+    sketches = AttackerSketches(max_honeypots=2)
+    for honeypot_id in ("h1", "h2", "h1", "h3"):
+        sketches.record(honeypot_id, {"source_ip": "1.2.3.4", "source_address": ""})
+    assert list(sketches.honeypots) == ["h1", "h3"]
+    assert sketches.evicted == 1
+    assert sketches.summary("h2") is None
+    assert sketches.summary()["source_ip"]["total"] == 4
+    assert sketches.summary("h1")["source_ip"]["top"][0]["count"] == 2
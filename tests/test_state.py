@@ -0,0 +1,105 @@
+import os
+import threading
+from multiprocessing import resource_tracker
+
+import pytest
+
+from services.state import (
+    MemoryStateBackend,
+    SharedMemoryStateBackend,
+    SQLiteStateBackend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "shm"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        state = MemoryStateBackend()
+    elif request.param == "sqlite":
+        state = SQLiteStateBackend(str(tmp_path / "state.db"))
+    else:
+        state = SharedMemoryStateBackend(
+            name=f"quantdog_test_{os.getpid()}_{id(tmp_path)}",
+            size=1024 * 1024,
+            max_interactions=50,
+            lock_dir=str(tmp_path),
+        )
+    yield state
+    state.close()
+    if request.param == "shm":
+        # The backend keeps the segment from the resource tracker; unlink()
+        # expects it registered
+        resource_tracker.register(state._shm._name, "shared_memory")
+        state._shm.unlink()
+
+
+def test_update_honeypot_applies_func(backend):
+    backend.put_honeypot("honeypot_0", {"starred": False, "interaction_count": 3})
+    version = backend.honeypots_version()
+
+    def bump(config):
+        config["interaction_count"] += 1
+        return config
+
+    assert backend.update_honeypot("honeypot_0", bump)["interaction_count"] == 4
+    assert backend.get_honeypot("honeypot_0")["interaction_count"] == 4
+    assert backend.honeypot_changes_since(version) == (
+        backend.honeypots_version(),
+        {"honeypot_0"},
+    )
+
+
+def test_update_honeypot_skips_missing_and_declined(backend):
+    backend.put_honeypot("honeypot_0", {"status": "active"})
+    version = backend.honeypots_version()
+
+    assert backend.update_honeypot("honeypot_9", lambda config: config) is None
+    assert backend.update_honeypot("honeypot_0", lambda config: None) is None
+    assert backend.get_honeypot("honeypot_9") is None
+    assert backend.honeypots_version() == version
+
+
+def test_update_honeypot_loses_no_updates(backend):
+    backend.put_honeypot("honeypot_0", {"interaction_count": 0})
+
+    def bump(config):
+        config["interaction_count"] += 1
+        return config
+
+    def worker():
+        for _ in range(50):
+            backend.update_honeypot("honeypot_0", bump)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert backend.get_honeypot("honeypot_0")["interaction_count"] == 200
+
+
+def test_declined_update_leaves_no_trace(backend):
+    backend.put_honeypot("honeypot_0", {"tags": ["a"]})
+    version = backend.honeypots_version()
+
+    def decline(config):
+        config["tags"].append("b")
+
+    assert backend.update_honeypot("honeypot_0", decline) is None
+    assert backend.get_honeypot("honeypot_0") == {"tags": ["a"]}
+    assert backend.honeypots_version() == version
+
+
+def test_interactions_wrap_without_touching_honeypots(backend):
+    backend.put_honeypot("honeypot_0", {})
+    version = backend.honeypots_version()
+    for n in range(60):
+        backend.append_interaction({"honeypot_id": f"honeypot_{n % 2}", "n": n})
+    assert backend.honeypots_version() == version
+    assert backend.count_interactions() == 60
+
+    newest = backend.list_interactions(limit=3)
+    assert [i["n"] for i in newest] == [59, 58, 57]
+    assert newest[0]["id"] == "int_59_honeypot_1"
+    page = backend.list_interactions("honeypot_0", limit=2, offset=1)
+    assert [i["n"] for i in page] == [56, 54]
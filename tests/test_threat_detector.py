@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from core import threat_detector
+from core.threat_detector import ThreatDetector
+from services.state import MemoryStateBackend
+
+
+def test_anomalies_raise_the_shared_level():
+    state = MemoryStateBackend()
+    detector = ThreatDetector(state=state)
+    detector.record_anomaly({"type": "scan", "key": "10.0.0.1", "count": 12})
+    detector.record_anomaly({"type": "unknown"})
+    assert state.get_value("threat_level") == 35.0
+    assert ThreatDetector(state=state).threat_level == 35.0
+
+
+def test_level_is_clamped_and_decays_to_baseline():
+    detector = ThreatDetector()
+    detector.simulate_attack(500)
+    assert detector.threat_level == 100
+    detector.decay(30, baseline=80)
+    assert detector.threat_level == 80
+    detector.decay(30, baseline=80)
+    assert detector.threat_level == 80
+
+
+def test_indicators_and_history_are_bounded(monkeypatch):
+    monkeypatch.setattr(threat_detector, "MAX_INDICATORS", 5)
+    detector = ThreatDetector()
+    for n in range(8):
+        detector.record_anomaly({"type": "rate_burst", "key": str(n), "count": n})
+    assert [i["key"] for i in detector.indicators] == ["3", "4", "5", "6", "7"]
+    assert detector.indicators_total == 8
+    assert detector.threat_history[-1]["indicators"] == 8
+
+    # Entries older than a day are trimmed from the front
+    for entry in list(detector.threat_history)[:5]:
+        entry["timestamp"] = datetime.utcnow() - timedelta(hours=25)
+    detector.reduce_threat(1)
+    assert len(detector.threat_history) == 4
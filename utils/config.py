@@ -23,6 +23,75 @@ class Config:
         "BTC_TESTNET_RPC_URL", "https://api.blockcypher.com/v1/btc/test3"
     )
 
+    # Shared state backend: "memory" (single worker), "sqlite" or "shm"
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+    STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH", "data/quantdog_state.db")
+    STATE_SHM_NAME = os.getenv("STATE_SHM_NAME", "quantdog_state")
+    STATE_SHM_SIZE = int(os.getenv("STATE_SHM_SIZE", str(64 * 1024 * 1024)))
+    STATE_SHM_MAX_INTERACTIONS = int(os.getenv("STATE_SHM_MAX_INTERACTIONS", "10000"))
+    STATE_SHM_INTERACTION_SIZE = int(os.getenv("STATE_SHM_INTERACTION_SIZE", "2048"))
+
+    # Cross-worker WebSocket fan-out over a Unix domain socket
+    EVENT_BUS_ENABLED = os.getenv("EVENT_BUS_ENABLED", "false").lower() == "true"
+    EVENT_BUS_SOCKET = os.getenv("EVENT_BUS_SOCKET", "/tmp/quantdog_bus.sock")
+
+    # Honeypot registry persistence (write-behind)
+    REGISTRY_PATH = os.getenv("REGISTRY_PATH", "data/registry/honeypots.json")
+    REGISTRY_FLUSH_INTERVAL = float(os.getenv("REGISTRY_FLUSH_INTERVAL", "1.0"))
+    REGISTRY_SNAPSHOT_INTERVAL = float(os.getenv("REGISTRY_SNAPSHOT_INTERVAL", "30"))
+
+    # Routed transactions kept for GET /transactions (per worker)
+    TRANSACTION_FEED_SIZE = int(os.getenv("TRANSACTION_FEED_SIZE", "10000"))
+
+    # Pending transactions are mined and new blocks scanned for dormant
+    # address activations every CHAIN_SCAN_INTERVAL seconds (0 disables)
+    DORMANT_WALLET_YEARS = float(os.getenv("DORMANT_WALLET_YEARS", "5"))
+    CHAIN_SCAN_INTERVAL = float(os.getenv("CHAIN_SCAN_INTERVAL", "10"))
+    # Scanned blocks beyond the newest CHAIN_RETAINED_BLOCKS are dropped
+    CHAIN_RETAINED_BLOCKS = int(os.getenv("CHAIN_RETAINED_BLOCKS", "1000"))
+
+    # Sliding-window sketches of interaction sources (GET /attackers)
+    SKETCH_WINDOW_SECONDS = float(os.getenv("SKETCH_WINDOW_SECONDS", "3600"))
+    SKETCH_BUCKETS = int(os.getenv("SKETCH_BUCKETS", "12"))
+    SKETCH_TOP_K = int(os.getenv("SKETCH_TOP_K", "10"))
+    SKETCH_MAX_HONEYPOTS = int(os.getenv("SKETCH_MAX_HONEYPOTS", "256"))
+
+    # Streaming rate anomaly detection on recorded interactions
+    ANOMALY_BUCKET_SECONDS = float(os.getenv("ANOMALY_BUCKET_SECONDS", "1"))
+    ANOMALY_HALFLIFE_SECONDS = float(os.getenv("ANOMALY_HALFLIFE_SECONDS", "60"))
+    ANOMALY_ZSCORE = float(os.getenv("ANOMALY_ZSCORE", "4"))
+    ANOMALY_MIN_EVENTS = int(os.getenv("ANOMALY_MIN_EVENTS", "10"))  # per bucket
+    SCAN_HONEYPOT_THRESHOLD = int(os.getenv("SCAN_HONEYPOT_THRESHOLD", "5"))
+    SCAN_WINDOW_SECONDS = float(os.getenv("SCAN_WINDOW_SECONDS", "10"))
+
+    # Columnar interaction table for GET /analytics/interactions (per worker)
+    ANALYTICS_MAX_ROWS = int(os.getenv("ANALYTICS_MAX_ROWS", "1000000"))
+
+    # Event loop lag sampling and slow request/task profiling
+    LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+    LOOP_STALL_THRESHOLD_MS = float(os.getenv("LOOP_STALL_THRESHOLD_MS", "250"))
+    PROFILE_SLOW_REQUESTS = os.getenv("PROFILE_SLOW_REQUESTS", "false").lower() == "true"
+    PROFILE_BUDGET_MS = float(os.getenv("PROFILE_BUDGET_MS", "200"))
+    PROFILE_MODE = os.getenv("PROFILE_MODE", "stack")
+
+    # Timer wheel for delayed work (simulation expiry, threat decay, re-arming)
+    SCHEDULER_RESOLUTION_MS = float(os.getenv("SCHEDULER_RESOLUTION_MS", "100"))
+    THREAT_BASELINE = float(os.getenv("THREAT_BASELINE", "20"))
+    THREAT_DECAY_INTERVAL = float(os.getenv("THREAT_DECAY_INTERVAL", "0"))  # 0 disables
+    THREAT_DECAY_AMOUNT = float(os.getenv("THREAT_DECAY_AMOUNT", "1.0"))
+    HONEYPOT_REARM_SECONDS = float(os.getenv("HONEYPOT_REARM_SECONDS", "0"))  # 0 disables
+
+    # Logging pipeline and operator alerts
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" or "json"
+    LOG_FILE = os.getenv("LOG_FILE", "")
+    LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "20"))  # alerts per event per window
+    LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", "10"))
+    LOG_INTERACTION_SAMPLE_RATE = float(os.getenv("LOG_INTERACTION_SAMPLE_RATE", "1.0"))
+    ALERT_SINKS = os.getenv("ALERT_SINKS", "banner")
+
     @classmethod
     def get(cls, key: str, default: Any = None) -> Any:
         """Get configuration value."""
@@ -0,0 +1,30 @@
+"""Helper functions shared across QuantDog modules."""
+
+import secrets
+
+# Address body length in bytes and prefix for each supported blockchain
+WALLET_ADDRESS_FORMATS = {
+    "ethereum": (20, "0x"),
+    "bitcoin": (16, "bc1q"),
+    "quantum": (20, "0x"),
+}
+
+# Funds placed in a freshly deployed honeypot wallet
+INITIAL_HONEYPOT_BALANCES = {
+    "ethereum": 1.0,
+    "bitcoin": 0.01,
+    "quantum": 100.0,
+}
+
+
+def generate_wallet_addresses(blockchain: str, count: int) -> list[str]:
+    """Generate ``count`` random wallet addresses with a single entropy read."""
+    size, prefix = WALLET_ADDRESS_FORMATS.get(blockchain, WALLET_ADDRESS_FORMATS["ethereum"])
+    width = size * 2
+    raw = secrets.token_bytes(size * count).hex()
+    return [prefix + raw[i : i + width] for i in range(0, len(raw), width)]
+
+
+def initial_honeypot_balance(blockchain: str) -> float:
+    """Get the initial balance for a honeypot on ``blockchain``."""
+    return INITIAL_HONEYPOT_BALANCES.get(blockchain, 100.0)
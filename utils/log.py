@@ -0,0 +1,384 @@
+"""Queue-backed structured logging and operator alerts.
+
+Handlers on the event loop only build a log record and put it on a queue; a
+listener thread formats and writes records in batches, with one write per
+batch. When the queue is full records are dropped (and counted) rather than
+blocking the caller.
+
+- ``log_event`` logs a named event with structured fields, optionally sampled.
+- Alerts are rate limited per event name, by a filter on the alert logger;
+  suppressed alerts are counted and reported on the next alert of that kind
+  that gets through.
+- ``raise_alert`` sends an operator alert through the same pipeline. On the
+  writer thread, alerts are handed to the registered ``AlertSink``s (by
+  default ``BannerAlertSink``, which prints the banners that handlers used
+  to print inline).
+
+With ``LOG_ASYNC=false`` the same handlers are attached directly to the root
+logger, which is useful for comparing throughput.
+
+Nothing is installed at import: the app calls ``configure_logging`` when it
+starts.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from datetime import datetime
+from typing import TextIO
+
+from utils.metrics import metrics
+
+ALERT_LOGGER = "quantdog.alerts"
+
+# LogRecord attributes that are not structured fields
+_RECORD_ATTRS = frozenset(
+    vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()
+) | {"message", "asctime", "event", "fields", "alert", "suppressed"}
+
+_SEVERITY_LEVELS = {
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "high": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+
+class Alert:
+    """An operator alert passed to alert sinks."""
+
+    __slots__ = ("event", "title", "severity", "fields", "timestamp", "suppressed")
+
+    def __init__(
+        self,
+        event: str,
+        title: str,
+        severity: str,
+        fields: dict,
+        timestamp: float,
+        suppressed: int = 0,
+    ):
+        self.event = event
+        self.title = title
+        self.severity = severity
+        self.fields = fields
+        self.timestamp = timestamp
+        self.suppressed = suppressed
+
+
+class AlertSink:
+    """Destination for operator alerts. Called on the log writer thread."""
+
+    def emit(self, alert: Alert) -> None:
+        raise NotImplementedError
+
+
+class BannerAlertSink(AlertSink):
+    """Prints alerts as framed banners for operators watching the console."""
+
+    def __init__(self, stream: TextIO | None = None, width: int = 80):
+        self.stream = stream
+        self.width = width
+
+    def emit(self, alert: Alert) -> None:
+        rule = "=" * self.width
+        lines = [rule, alert.title]
+        lines.extend(
+            f"{name.replace('_', ' ').capitalize()}: {value}"
+            for name, value in alert.fields.items()
+        )
+        if alert.suppressed:
+            lines.append(f"({alert.suppressed} similar alerts suppressed)")
+        lines.append(rule)
+        stream = self.stream or sys.stdout
+        stream.write("\n" + "\n".join(lines) + "\n\n")
+        stream.flush()
+
+
+class AlertHandler(logging.Handler):
+    """Dispatches alert records to the registered alert sinks."""
+
+    def __init__(self, sinks: list[AlertSink] | None = None):
+        super().__init__()
+        self.sinks = list(sinks or [])
+        self.addFilter(lambda record: getattr(record, "alert", False))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        alert = Alert(
+            event=record.event,
+            title=record.getMessage(),
+            severity=record.alert,
+            fields=record.fields,
+            timestamp=record.created,
+            suppressed=getattr(record, "suppressed", 0),
+        )
+        for sink in self.sinks:
+            try:
+                sink.emit(alert)
+            except Exception:
+                self.handleError(record)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as JSON lines or as ``key=value`` text."""
+
+    def __init__(self, json_output: bool = True):
+        super().__init__()
+        self.json_output = json_output
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = dict(getattr(record, "fields", None) or {})
+        fields.update(
+            (key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS
+        )
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            fields["suppressed"] = suppressed
+        timestamp = datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds")
+
+        if self.json_output:
+            entry = {
+                "ts": timestamp,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            }
+            event = getattr(record, "event", None)
+            if event:
+                entry["event"] = event
+            entry.update(fields)
+            if record.exc_info:
+                entry["exc_info"] = self.formatException(record.exc_info)
+            elif record.exc_text:
+                entry["exc_info"] = record.exc_text
+            return json.dumps(entry, default=str)
+
+        line = f"{timestamp} {record.levelname} {record.name}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        elif record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``limit`` alerts per event name per ``window``.
+
+    Ordinary log records are not limited. The number of alerts suppressed in
+    a window is attached to the first alert of the next one.
+    """
+
+    def __init__(self, limit: int = 20, window: float = 10.0):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._windows: dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "alert", False) or self.limit <= 0:
+            return True
+
+        event = record.event
+        now = time.monotonic()
+        window = self._windows.get(event)
+        if window is None or now - window[0] >= self.window:
+            suppressed = window[2] if window else 0
+            self._windows[event] = [now, 1, 0]
+            if suppressed:
+                record.suppressed = suppressed
+            return True
+
+        if window[1] < self.limit:
+            window[1] += 1
+            return True
+
+        window[2] += 1
+        metrics.counter("log_records_suppressed_total", event=event).inc()
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when full."""
+
+    def __init__(self, max_size: int = 10000):
+        super().__init__(queue.SimpleQueue())
+        self.max_size = max_size
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, since they may be mutated after the call
+        # returns. Formatting is left to the writer thread, and the record is
+        # handed over as is because no other handler sees it on this side.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue is unbounded and lock-free to put on; the bound is
+        # approximate, which is enough to cap memory if the writer falls behind
+        if self.queue.qsize() >= self.max_size:
+            metrics.counter("log_records_dropped_total").inc()
+            return
+        self.queue.put_nowait(record)
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """Stream handler that only writes when flushed.
+
+    The batching listener flushes it once per batch of records, so a burst
+    of log lines costs a single write to the stream.
+    """
+
+    def __init__(self, stream: TextIO | None = None):
+        super().__init__(stream)
+        self._buffer: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        with self.lock:
+            if self._buffer:
+                self.stream.write("".join(self._buffer))
+                self._buffer.clear()
+            super().flush()
+
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """Queue listener that handles records in batches and flushes once per batch."""
+
+    def __init__(self, log_queue, *handlers, batch_size: int = 512):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+
+    def _monitor(self) -> None:
+        log_queue = self.queue
+        while True:
+            record = self.dequeue(True)
+            stop = record is self._sentinel
+            batch = [] if stop else [record]
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    record = log_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    batch.append(record)
+
+            for record in batch:
+                self.handle(record)
+            for handler in self.handlers:
+                handler.flush()
+            if stop:
+                return
+
+
+alert_handler = AlertHandler()
+_listener: logging.handlers.QueueListener | None = None
+_rate_limit: RateLimitFilter | None = None
+
+
+def configure_logging(settings) -> None:
+    """Install the logging pipeline on the root logger."""
+    global _listener, _rate_limit
+    stop_logging()
+
+    handler_class = BufferedStreamHandler if settings.LOG_ASYNC else logging.StreamHandler
+    console = handler_class(sys.stdout)
+    console.setFormatter(StructuredFormatter(json_output=settings.LOG_FORMAT == "json"))
+    # When alert sinks are configured, alerts reach the console through them
+    console.addFilter(
+        lambda record: not (getattr(record, "alert", False) and alert_handler.sinks)
+    )
+    handlers: list[logging.Handler] = [console, alert_handler]
+    if settings.LOG_FILE:
+        file_handler = logging.FileHandler(settings.LOG_FILE, encoding="utf-8")
+        file_handler.setFormatter(StructuredFormatter(json_output=True))
+        handlers.append(file_handler)
+
+    alert_handler.sinks = [
+        ALERT_SINKS[name.strip()]()
+        for name in settings.ALERT_SINKS.split(",")
+        if name.strip() and name.strip() != "none"
+    ]
+
+    # Alerts are only logged on the alert logger, so one filter there sees
+    # each of them exactly once, whatever the handlers
+    alert_logger = logging.getLogger(ALERT_LOGGER)
+    if _rate_limit is not None:
+        alert_logger.removeFilter(_rate_limit)
+    _rate_limit = RateLimitFilter(settings.LOG_RATE_LIMIT, settings.LOG_RATE_WINDOW)
+    alert_logger.addFilter(_rate_limit)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    if settings.LOG_ASYNC:
+        queue_handler = NonBlockingQueueHandler(settings.LOG_QUEUE_SIZE)
+        root.addHandler(queue_handler)
+        _listener = BatchingQueueListener(queue_handler.queue, *handlers)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def add_alert_sink(sink: AlertSink) -> None:
+    """Register an additional alert sink (e.g. a pager or chat webhook)."""
+    alert_handler.sinks.append(sink)
+
+
+def log_event(
+    logger: logging.Logger,
+    level: int,
+    event: str,
+    message: str,
+    sample_rate: float = 1.0,
+    **fields,
+) -> None:
+    """Log a named event with structured fields.
+
+    With ``sample_rate`` below 1, only that fraction of calls is logged; the
+    decision is made before a record is built.
+    """
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"event": event, "fields": fields})
+
+
+def raise_alert(event: str, title: str, severity: str = "warning", **fields) -> None:
+    """Send an operator alert to the alert sinks (and the structured log)."""
+    logger = logging.getLogger(ALERT_LOGGER)
+    level = _SEVERITY_LEVELS.get(severity, logging.WARNING)
+    if logger.isEnabledFor(level):
+        logger.log(level, title, extra={"event": event, "fields": fields, "alert": severity})
+
+
+ALERT_SINKS: dict[str, type[AlertSink]] = {
+    "banner": BannerAlertSink,
+}
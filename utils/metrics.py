@@ -0,0 +1,318 @@
+"""Low-overhead runtime metrics for QuantDog.
+
+Counters and latency histograms are plain Python objects updated without
+locks: the API updates them from the event loop thread, and a single
+``+=`` on an attribute is atomic enough under the GIL for monitoring
+purposes. Metrics are per process; with several workers each one reports
+its own values, labelled with its pid in the Prometheus output.
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from collections.abc import Iterator
+
+import psutil
+
+# Quantiles reported for every histogram in the Prometheus output
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Counter:
+    """Monotonically increasing counter."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        """Increment the counter."""
+        self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        """Set the gauge value."""
+        self.value = value
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of durations.
+
+    Values are tracked in microseconds. Values below ``2**sub_bucket_bits``
+    get exact buckets; above that, every power of two is split into
+    ``2**(sub_bucket_bits - 1)`` linear sub-buckets, which bounds the
+    relative error of any reported percentile to ``2**-(sub_bucket_bits - 1)``
+    (about 3% with the default of 6 bits) using a fixed array of counts.
+    """
+
+    __slots__ = ("sub_bucket_bits", "_sub_count", "_half", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, sub_bucket_bits: int = 6, max_seconds: float = 3600.0):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        self._half = self._sub_count >> 1
+        max_index = self._index(int(max_seconds * 1_000_000))
+        self.counts = [0] * (max_index + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def _index(self, micros: int) -> int:
+        if micros < self._sub_count:
+            return micros
+        shift = micros.bit_length() - self.sub_bucket_bits
+        return self._sub_count + (shift - 1) * self._half + (micros >> shift) - self._half
+
+    def _upper_bound(self, index: int) -> int:
+        """Largest value (in microseconds) that falls in bucket ``index``."""
+        if index < self._sub_count:
+            return index
+        shift, offset = divmod(index - self._sub_count, self._half)
+        shift += 1
+        return ((offset + self._half + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        """Record a duration in seconds."""
+        index = self._index(int(seconds * 1_000_000))
+        if index >= len(self.counts):
+            index = len(self.counts) - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, quantile: float) -> float:
+        """Get the value at ``quantile`` (0-1) in seconds."""
+        if self.count == 0:
+            return 0.0
+        target = max(1, quantile * self.count)
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self._upper_bound(index) / 1_000_000, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        """Get summary statistics for this histogram."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else 0.0,
+            **{f"p{int(q * 100)}": self.percentile(q) for q in SUMMARY_QUANTILES},
+        }
+
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Registry of named, labelled counters, gauges and histograms."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.counters: dict[str, dict[LabelKey, Counter]] = {}
+        self.gauges: dict[str, dict[LabelKey, Gauge]] = {}
+        self.histograms: dict[str, dict[LabelKey, LatencyHistogram]] = {}
+        self.help: dict[str, str] = {}
+
+    @staticmethod
+    def _key(labels: dict[str, str]) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Attach a help string shown in the Prometheus output."""
+        self.help[name] = help_text
+
+    def counter(self, name: str, **labels) -> Counter:
+        """Get or create a counter."""
+        series = self.counters.setdefault(name, {})
+        key = self._key(labels)
+        counter = series.get(key)
+        if counter is None:
+            counter = series[key] = Counter()
+        return counter
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        """Get or create a gauge."""
+        series = self.gauges.setdefault(name, {})
+        key = self._key(labels)
+        gauge = series.get(key)
+        if gauge is None:
+            gauge = series[key] = Gauge()
+        return gauge
+
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        """Get or create a latency histogram."""
+        series = self.histograms.setdefault(name, {})
+        key = self._key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = LatencyHistogram()
+        return histogram
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels) -> Iterator[dict]:
+        """Record the duration of the ``with`` block in a histogram.
+
+        The block receives the label dict, so labels only known at the end
+        (such as an outcome) can be added before the series is chosen.
+        """
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.histogram(name, **labels).record(time.perf_counter() - start)
+
+    def total(self, name: str) -> float:
+        """Sum a counter across all of its label sets."""
+        return sum(counter.value for counter in self.counters.get(name, {}).values())
+
+    def uptime(self) -> float:
+        """Seconds since this process started collecting metrics."""
+        return time.monotonic() - self.started_at
+
+    def snapshot(self) -> dict:
+        """Get all metrics as plain data, e.g. for a JSON debug endpoint."""
+
+        def labelled(series: dict, value) -> list[dict]:
+            return [{"labels": dict(key), **value(metric)} for key, metric in series.items()]
+
+        return {
+            "uptime_seconds": self.uptime(),
+            "counters": {
+                name: labelled(series, lambda c: {"value": c.value})
+                for name, series in self.counters.items()
+            },
+            "gauges": {
+                name: labelled(series, lambda g: {"value": g.value})
+                for name, series in self.gauges.items()
+            },
+            "histograms": {
+                name: labelled(series, LatencyHistogram.snapshot)
+                for name, series in self.histograms.items()
+            },
+        }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        pid = str(os.getpid())
+        lines: list[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def fmt(key: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+            pairs = (*key, *extra, ("pid", pid))
+            escaped = (
+                (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for name, value in pairs
+            )
+            return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+        header("quantdog_uptime_seconds", "gauge")
+        lines.append(f"quantdog_uptime_seconds{fmt(())} {self.uptime()}")
+
+        for name, series in self.counters.items():
+            header(name, "counter")
+            for key, counter in series.items():
+                lines.append(f"{name}{fmt(key)} {counter.value}")
+
+        for name, series in self.gauges.items():
+            header(name, "gauge")
+            for key, gauge in series.items():
+                lines.append(f"{name}{fmt(key)} {gauge.value}")
+
+        for name, series in self.histograms.items():
+            header(name, "summary")
+            for key, histogram in series.items():
+                for quantile in SUMMARY_QUANTILES:
+                    labels = fmt(key, (("quantile", str(quantile)),))
+                    lines.append(f"{name}{labels} {histogram.percentile(quantile)}")
+                lines.append(f"{name}_sum{fmt(key)} {histogram.sum}")
+                lines.append(f"{name}_count{fmt(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+class ProcessSampler:
+    """Samples process and host statistics in the background.
+
+    psutil calls run in a worker thread on a fixed interval, so handlers
+    read the latest sample instead of blocking the event loop.
+    """
+
+    def __init__(self, registry: MetricsRegistry, interval: float = 5.0):
+        self.registry = registry
+        self.interval = interval
+        self.process = psutil.Process()
+        self.cpu_percent = 0.0
+        self.memory_percent = 0.0
+        self._task: asyncio.Task | None = None
+
+        # Prime the counters so the first real sample covers a full interval
+        psutil.cpu_percent(interval=None)
+        self.process.cpu_percent(interval=None)
+
+    async def start(self) -> None:
+        """Start sampling in the background."""
+        await asyncio.to_thread(self.sample)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await asyncio.to_thread(self.sample)
+
+    def sample(self) -> None:
+        """Take one sample. Blocking; call from a worker thread."""
+        self.cpu_percent = psutil.cpu_percent(interval=None)
+        self.memory_percent = psutil.virtual_memory().percent
+
+        registry = self.registry
+        registry.gauge("system_cpu_percent").set(self.cpu_percent)
+        registry.gauge("system_memory_percent").set(self.memory_percent)
+        with self.process.oneshot():
+            registry.gauge("process_cpu_percent").set(self.process.cpu_percent(interval=None))
+            registry.gauge("process_resident_memory_bytes").set(self.process.memory_info().rss)
+            registry.gauge("process_threads").set(self.process.num_threads())
+            registry.gauge("process_open_fds").set(self.process.num_fds())
+
+
+metrics = MetricsRegistry()
+metrics.describe("http_requests_total", "HTTP requests by route, method and status")
+metrics.describe("http_request_duration_seconds", "HTTP request latency by route")
+metrics.describe("ingest_duration_seconds", "Time to ingest an event by ingest path")
+metrics.describe("ingest_events_total", "Events ingested by ingest path")
+metrics.describe("routing_decisions_total", "Cryptographic routing decisions by path")
+metrics.describe("routing_decision_duration_seconds", "Time to pick a routing path by path chosen")
+metrics.describe("threats_detected_total", "High or critical threat events detected")
+metrics.describe("event_loop_lag_seconds", "How late the event loop woke from a timed sleep")
+metrics.describe("event_loop_stalls_total", "Event loop lag samples over the stall threshold")
+metrics.describe("slow_operation_captures_total", "Stall and slow operation captures by kind")
@@ -0,0 +1,246 @@
+"""Event loop lag monitoring and slow operation profiling.
+
+- ``LoopLagMonitor`` measures how late the event loop wakes up from a short
+  sleep. A watchdog thread notices when the loop stops ticking altogether
+  and captures the loop thread's stack while it is still stuck.
+- ``SlowOperationProfiler`` tracks requests and background tasks against a
+  latency budget. In ``stack`` mode the watchdog samples the loop thread's
+  stack once an operation overruns; in ``cprofile`` mode the operation runs
+  under cProfile and the top functions are kept if it was slow.
+
+Captures are kept in a bounded buffer and served by ``/debug/loop``.
+"""
+
+import asyncio
+import contextlib
+import cProfile
+import io
+import itertools
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Iterator
+from datetime import datetime
+
+from utils.metrics import metrics
+
+PROFILE_MODES = ("stack", "cprofile")
+
+
+def sample_thread_stack(thread_id: int | None) -> str | None:
+    """Format the current stack of another thread."""
+    if thread_id is None:
+        return None
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return None
+    return "".join(traceback.format_stack(frame))
+
+
+class _Operation:
+    __slots__ = ("name", "start", "stack")
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+        self.stack: str | None = None
+
+
+class SlowOperationProfiler:
+    """Captures diagnostics for operations that exceed a latency budget."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        budget: float = 0.2,
+        mode: str = "stack",
+        max_captures: int = 50,
+    ):
+        self.enabled = enabled
+        self.budget = budget
+        self.mode = mode
+        self.captures: deque[dict] = deque(maxlen=max_captures)
+        self.loop_thread_id: int | None = None
+        self._inflight: dict[int, _Operation] = {}
+        self._ids = itertools.count()
+        self._active_profile: cProfile.Profile | None = None
+
+    def configure(
+        self,
+        enabled: bool | None = None,
+        budget: float | None = None,
+        mode: str | None = None,
+    ) -> None:
+        """Change profiler settings at runtime."""
+        if mode is not None:
+            if mode not in PROFILE_MODES:
+                raise ValueError(f"Unknown profiling mode: {mode}")
+            self.mode = mode
+        if budget is not None:
+            self.budget = budget
+        if enabled is not None:
+            self.enabled = enabled
+
+    def record_capture(self, capture: dict) -> None:
+        """Store a capture and count it."""
+        capture.setdefault("timestamp", datetime.utcnow().isoformat())
+        self.captures.append(capture)
+        metrics.counter("slow_operation_captures_total", kind=capture["kind"]).inc()
+
+    @contextlib.contextmanager
+    def track(self, name: str) -> Iterator[None]:
+        """Track an operation (request or background task step) by name."""
+        if not self.enabled:
+            yield
+            return
+
+        operation_id = next(self._ids)
+        operation = _Operation(name, time.perf_counter())
+        self._inflight[operation_id] = operation
+
+        # cProfile instruments the whole thread, so only one operation at a
+        # time is profiled; overlapping ones fall back to stack sampling
+        profile = None
+        if self.mode == "cprofile" and self._active_profile is None:
+            profile = self._active_profile = cProfile.Profile()
+            profile.enable()
+
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - operation.start
+            del self._inflight[operation_id]
+            if profile is not None:
+                profile.disable()
+                self._active_profile = None
+
+            if duration >= self.budget:
+                capture = {
+                    "kind": "slow_operation",
+                    "name": name,
+                    "duration_ms": round(duration * 1000, 3),
+                    "budget_ms": round(self.budget * 1000, 3),
+                }
+                if operation.stack:
+                    capture["stack"] = operation.stack
+                if profile is not None:
+                    capture["profile"] = self._format_profile(profile)
+                self.record_capture(capture)
+
+    def check_inflight(self) -> None:
+        """Sample the loop stack for overrunning operations (watchdog thread)."""
+        if not self.enabled or self.mode != "stack":
+            return
+        now = time.perf_counter()
+        for operation in list(self._inflight.values()):
+            if operation.stack is None and now - operation.start >= self.budget:
+                operation.stack = sample_thread_stack(self.loop_thread_id)
+
+    def inflight(self) -> list[dict]:
+        """Describe the operations currently being tracked."""
+        now = time.perf_counter()
+        return [
+            {"name": op.name, "elapsed_ms": round((now - op.start) * 1000, 3)}
+            for op in list(self._inflight.values())
+        ]
+
+    @staticmethod
+    def _format_profile(profile: cProfile.Profile, limit: int = 25) -> str:
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+class LoopLagMonitor:
+    """Samples event loop lag and watches for stalls from a separate thread."""
+
+    def __init__(
+        self,
+        profiler: SlowOperationProfiler,
+        interval: float = 0.1,
+        stall_threshold: float = 0.25,
+    ):
+        self.profiler = profiler
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.histogram = metrics.histogram("event_loop_lag_seconds")
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._stall_captured = False
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def start(self) -> None:
+        """Start sampling on the running loop and start the watchdog thread."""
+        self.profiler.loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop sampling and the watchdog thread."""
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self._heartbeat = time.monotonic()
+            self.histogram.record(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.stall_threshold:
+                self.stalls += 1
+                metrics.counter("event_loop_stalls_total").inc()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            stalled_for = time.monotonic() - self._heartbeat - self.interval
+            if stalled_for >= self.stall_threshold:
+                if not self._stall_captured:
+                    self._stall_captured = True
+                    self.profiler.record_capture(
+                        {
+                            "kind": "loop_stall",
+                            "name": "event_loop",
+                            "stalled_for_ms": round(stalled_for * 1000, 3),
+                            "stack": sample_thread_stack(self.profiler.loop_thread_id),
+                        }
+                    )
+            else:
+                self._stall_captured = False
+            self.profiler.check_inflight()
+
+    def snapshot(self) -> dict:
+        """Get lag statistics."""
+        return {
+            "interval_ms": self.interval * 1000,
+            "stall_threshold_ms": self.stall_threshold * 1000,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "stalls": self.stalls,
+            "histogram": self.histogram.snapshot(),
+        }
+
+
+profiler = SlowOperationProfiler()
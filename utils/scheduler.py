@@ -0,0 +1,247 @@
+"""Hierarchical timer wheel for delayed work on the event loop.
+
+One driver task serves every timer, instead of one sleeping task per delay.
+Timers live in a hierarchy of wheels (Linux-style): the first wheel has one
+slot per tick, each higher wheel one slot per full turn of the wheel below.
+Insert and cancel are O(1) set operations; when a lower wheel wraps, the
+matching slot of the wheel above is cascaded down.
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ROOT_BITS = 8  # 256 slots of one tick each
+LEVEL_BITS = 6  # 64 slots per higher wheel
+LEVELS = 4  # with 100ms ticks, covers about 77 days
+
+
+class Timer:
+    """Handle for a scheduled callback."""
+
+    __slots__ = ("expires", "callback", "args", "name", "key", "slot", "scheduler")
+
+    def __init__(self, scheduler, expires: int, callback: Callable, args: tuple, name: str, key):
+        self.scheduler = scheduler
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.name = name
+        self.key = key
+        self.slot: set | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.slot is not None
+
+    def cancel(self) -> bool:
+        """Cancel the timer. Returns False if it already fired or was cancelled."""
+        return self.scheduler.cancel(self)
+
+
+class TimerWheel:
+    """Schedules callbacks with ``resolution``-second granularity.
+
+    Callbacks run on the event loop and must not block. If a callback returns
+    a coroutine it is run as a task.
+    """
+
+    def __init__(self, resolution: float = 0.1):
+        self.resolution = resolution
+        self.origin = time.monotonic()
+        self.current_tick = 0
+        self.wheels: list[list[set[Timer]]] = [
+            [set() for _ in range(1 << (ROOT_BITS if level == 0 else LEVEL_BITS))]
+            for level in range(LEVELS)
+        ]
+        self.max_ticks = (1 << (ROOT_BITS + LEVEL_BITS * (LEVELS - 1))) - 1
+        self.keyed: dict[Any, Timer] = {}
+        self.pending = 0
+        self.fired = 0
+        self.cancelled = 0
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup: asyncio.Event | None = None
+        self._driver: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return self.pending
+
+    # Scheduling
+
+    def call_later(
+        self,
+        delay: float,
+        callback: Callable,
+        *args,
+        name: str | None = None,
+        key=None,
+    ) -> Timer:
+        """Run ``callback(*args)`` after ``delay`` seconds.
+
+        Scheduling with a ``key`` replaces any pending timer with the same key.
+        """
+        if key is not None:
+            previous = self.keyed.get(key)
+            if previous is not None:
+                self.cancel(previous)
+
+        # Count from now rather than from the driver's last tick, which can
+        # lag behind while the wheel is idle
+        now_tick = max(self.current_tick, self._tick_at(time.monotonic()))
+        ticks = max(1, -(-delay // self.resolution))
+        timer = Timer(
+            self,
+            now_tick + int(ticks),
+            callback,
+            args,
+            name or getattr(callback, "__name__", "timer"),
+            key,
+        )
+        self._insert(timer)
+        self.pending += 1
+        if key is not None:
+            self.keyed[key] = timer
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return timer
+
+    def cancel(self, timer: Timer) -> bool:
+        """Cancel a pending timer."""
+        if timer.slot is None:
+            return False
+        timer.slot.discard(timer)
+        timer.slot = None
+        self._forget(timer)
+        self.cancelled += 1
+        return True
+
+    def cancel_key(self, key) -> bool:
+        """Cancel the pending timer scheduled with ``key``, if any."""
+        timer = self.keyed.get(key)
+        return timer.cancel() if timer is not None else False
+
+    def _insert(self, timer: Timer) -> None:
+        delta = min(timer.expires - self.current_tick, self.max_ticks)
+        expires = self.current_tick + delta
+        if delta < (1 << ROOT_BITS):
+            slot = self.wheels[0][expires & ((1 << ROOT_BITS) - 1)]
+        else:
+            level = 1
+            while delta >= 1 << (ROOT_BITS + LEVEL_BITS * level):
+                level += 1
+            shift = ROOT_BITS + LEVEL_BITS * (level - 1)
+            slot = self.wheels[level][(expires >> shift) & ((1 << LEVEL_BITS) - 1)]
+        slot.add(timer)
+        timer.slot = slot
+
+    def _forget(self, timer: Timer) -> None:
+        self.pending -= 1
+        if timer.key is not None and self.keyed.get(timer.key) is timer:
+            del self.keyed[timer.key]
+
+    # Driving
+
+    def _tick_at(self, now: float) -> int:
+        return int((now - self.origin) / self.resolution)
+
+    def advance(self, now: float | None = None) -> int:
+        """Fire every timer due by ``now``. Returns the number fired."""
+        target = self._tick_at(time.monotonic() if now is None else now)
+        if self.pending == 0:
+            self.current_tick = max(self.current_tick, target)
+            return 0
+
+        fired = 0
+        root_mask = (1 << ROOT_BITS) - 1
+        while self.current_tick < target and self.pending:
+            self.current_tick += 1
+            tick = self.current_tick
+            if tick & root_mask == 0:
+                self._cascade(tick)
+
+            slot = self.wheels[0][tick & root_mask]
+            if slot:
+                due = list(slot)
+                slot.clear()
+                for timer in due:
+                    timer.slot = None
+                    self._forget(timer)
+                    self._fire(timer)
+                fired += len(due)
+
+        self.current_tick = max(self.current_tick, target)
+        return fired
+
+    def _cascade(self, tick: int) -> None:
+        """Move timers from higher wheels down as the lower wheels wrap."""
+        for level in range(1, LEVELS):
+            shift = ROOT_BITS + LEVEL_BITS * (level - 1)
+            index = (tick >> shift) & ((1 << LEVEL_BITS) - 1)
+            slot = self.wheels[level][index]
+            timers = list(slot)
+            slot.clear()
+            for timer in timers:
+                self._insert(timer)
+            if index != 0:
+                break
+
+    def _fire(self, timer: Timer) -> None:
+        self.fired += 1
+        metrics.counter("scheduler_timers_fired_total", timer=timer.name).inc()
+        try:
+            result = timer.callback(*timer.args)
+        except Exception:
+            logger.exception(f"Scheduled callback {timer.name} failed")
+            return
+        if asyncio.iscoroutine(result):
+            task = asyncio.create_task(result)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def start(self) -> None:
+        """Start the driver task."""
+        # Created here so the wheel can be started again on a new event loop
+        self._wakeup = asyncio.Event()
+        self._driver = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the driver task. Pending timers are not run."""
+        if self._driver:
+            self._driver.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._driver
+            self._driver = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            if self.pending == 0:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            next_tick = self.origin + (self.current_tick + 1) * self.resolution
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            self.advance()
+
+    def snapshot(self) -> dict:
+        """Get scheduler statistics and pending timers by name."""
+        by_name: dict[str, int] = {}
+        for wheel in self.wheels:
+            for slot in wheel:
+                for timer in slot:
+                    by_name[timer.name] = by_name.get(timer.name, 0) + 1
+        return {
+            "resolution_ms": self.resolution * 1000,
+            "pending": self.pending,
+            "fired": self.fired,
+            "cancelled": self.cancelled,
+            "pending_by_name": by_name,
+        }